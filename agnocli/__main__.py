@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 import sys
 
 try:
@@ -10,8 +11,27 @@ try:
 except Exception:
     pass
 
-from .cli import run
+from .completion import COMPLETE_ENV, complete
 
 
-if __name__ == "__main__":
+def main():
+    # Shell completion answers from its index, before anything heavy is imported
+    shell = os.environ.get(COMPLETE_ENV)
+    if shell:
+        sys.exit(complete(shell, sys.argv[1:]))
+    from .daemon import forward_argv
+
+    # Forward to a running `agnocli serve` daemon before paying for the full CLI imports
+    code = forward_argv(sys.argv[1:])
+    if code is not None:
+        sys.exit(code)
+    from .metrics import span
+
+    with span("import"):
+        from .cli import run
+
     run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from .output import jsonable
+from .runner import WorkflowRuntime
+from .workflows import get_workflow
+
+
+def _parse_job(line: str) -> Dict[str, Any]:
+    job = json.loads(line)
+    if not isinstance(job, dict) or not isinstance(job.get("workflow"), str):
+        raise ValueError("job must be an object with a 'workflow' string")
+    params = job.get("params") or {}
+    if not isinstance(params, dict):
+        raise ValueError("'params' must be an object")
+    job["params"] = params
+    return job
+
+
+async def _run_job(runtime: WorkflowRuntime, index: int, line: str, cache_mode: str) -> Dict[str, Any]:
+    record: Dict[str, Any] = {"index": index}
+    start = time.perf_counter()
+    try:
+        job = _parse_job(line)
+        record["workflow"] = job["workflow"]
+        if "id" in job:
+            record["id"] = job["id"]
+        wf = get_workflow(job["workflow"])
+        if not wf:
+            raise LookupError(f"Workflow '{job['workflow']}' not found")
+        # Reject bad params before the job takes up a worker
+        params = wf.coerce_params(job["params"])
+        result = await runtime.run_async(wf, params, cache_mode)
+        record["status"] = "ok"
+        record["result"] = jsonable(result)
+    except Exception as e:
+        # A failing job is reported in its own record; the batch carries on
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["duration"] = round(time.perf_counter() - start, 6)
+    return record
+
+
+async def run_batch_async(
+    runtime: WorkflowRuntime,
+    lines: Iterable[str],
+    emit: Callable[[Dict[str, Any]], None],
+    concurrency: int = 8,
+    ordered: bool = False,
+    cache_mode: str = "use",
+) -> Dict[str, int]:
+    """Run one job per JSONL line, at most `concurrency` at a time.
+
+    Records go to `emit` in completion order, or input order if `ordered`.
+    Returns counts of ok/error jobs.
+    """
+    concurrency = max(1, concurrency)
+    slots = asyncio.Semaphore(concurrency)
+    counts = {"ok": 0, "error": 0}
+    pending: Dict[int, Dict[str, Any]] = {}
+    next_index = 0
+    tasks = set()
+
+    def _done(record: Dict[str, Any]) -> None:
+        nonlocal next_index
+        counts[record["status"]] += 1
+        if not ordered:
+            emit(record)
+            return
+        pending[record["index"]] = record
+        while next_index in pending:
+            emit(pending.pop(next_index))
+            next_index += 1
+
+    async def _guarded(index: int, line: str) -> None:
+        try:
+            _done(await _run_job(runtime, index, line, cache_mode))
+        finally:
+            slots.release()
+
+    index = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        # Acquire before creating the task so huge inputs are not all scheduled at once
+        await slots.acquire()
+        task = asyncio.create_task(_guarded(index, line))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        index += 1
+    if tasks:
+        await asyncio.gather(*tasks)
+    return counts
+
+
+def run_batch(
+    lines: Iterable[str],
+    emit: Callable[[Dict[str, Any]], None],
+    concurrency: int = 8,
+    ordered: bool = False,
+    executor: str = "thread",
+    process_workers: Optional[int] = None,
+    preload: Iterable[str] = (),
+    cache_mode: str = "use",
+    default_timeout: Optional[float] = None,
+    default_max_concurrency: Optional[int] = None,
+) -> Dict[str, int]:
+    # A dedicated runtime so the thread pool matches the concurrency limit
+    with WorkflowRuntime(
+        max_workers=concurrency,
+        executor=executor,
+        process_workers=process_workers,
+        preload=preload,
+        default_timeout=default_timeout,
+        default_max_concurrency=default_max_concurrency,
+    ) as runtime:
+        return runtime.call(
+            run_batch_async(runtime, lines, emit, concurrency=concurrency, ordered=ordered, cache_mode=cache_mode)
+        )
+
+
+def format_record(record: Dict[str, Any]) -> str:
+    return json.dumps(record, default=str, ensure_ascii=False)
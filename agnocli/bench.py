@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .runner import WorkflowRuntime
+from .store import percentile
+from .workflows import Workflow
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class _TimedThreadPool(ThreadPoolExecutor):
+    """A thread pool that adds up the time its workers spend running jobs."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.busy = 0.0
+        self._busy_lock = threading.Lock()
+
+    def submit(self, fn, /, *args, **kwargs):
+        def _timed():
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._busy_lock:
+                    self.busy += elapsed
+
+        return super().submit(_timed)
+
+
+class _BenchRuntime(WorkflowRuntime):
+    def _make_thread_pool(self) -> ThreadPoolExecutor:
+        return _TimedThreadPool(max_workers=self.max_workers, thread_name_prefix="agnocli-worker")
+
+
+@dataclass
+class BenchResult:
+    concurrency: int
+    runs: int
+    errors: int
+    seconds: float
+    throughput: float
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+    # High-water mark of this process (plus process workers) so far, in bytes
+    peak_rss: Optional[int] = None
+    # Share of thread pool capacity spent in workflow code; None if the pool was unused
+    utilization: Optional[float] = None
+
+
+@dataclass
+class Regression:
+    concurrency: int
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        return (self.current - self.baseline) / self.baseline if self.baseline else 0.0
+
+
+def peak_rss() -> Optional[int]:
+    if resource is None:
+        return None
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) * scale
+
+
+async def _bench_level(
+    runtime: _BenchRuntime, wf: Workflow, params: Dict[str, Any], n: int, warmup: int, concurrency: int, cache_mode: str
+) -> BenchResult:
+    latencies: List[float] = []
+    errors = 0
+
+    async def _drive(count: int, record: bool) -> None:
+        remaining = count
+
+        async def _worker():
+            nonlocal remaining, errors
+            # Closed loop: each worker keeps exactly one call in flight
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                try:
+                    # Through the runtime, so timeouts and concurrency limits apply as in real runs
+                    await runtime.run_async(wf, params, cache_mode)
+                except Exception:
+                    if record:
+                        errors += 1
+                if record:
+                    latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(_worker() for _ in range(min(concurrency, count))))
+
+    await _drive(warmup, record=False)
+    pool = runtime.executor
+    busy_before = pool.busy
+    start = time.perf_counter()
+    await _drive(n, record=True)
+    seconds = time.perf_counter() - start
+    busy = pool.busy - busy_before
+
+    latencies.sort()
+    return BenchResult(
+        concurrency=concurrency,
+        runs=len(latencies),
+        errors=errors,
+        seconds=seconds,
+        throughput=len(latencies) / seconds if seconds else 0.0,
+        mean=sum(latencies) / len(latencies) if latencies else 0.0,
+        p50=percentile(latencies, 50),
+        p95=percentile(latencies, 95),
+        p99=percentile(latencies, 99),
+        max=latencies[-1] if latencies else 0.0,
+        peak_rss=peak_rss(),
+        utilization=min(1.0, busy / (seconds * concurrency)) if busy and seconds else None,
+    )
+
+
+def run_bench(
+    wf: Workflow,
+    params: Dict[str, Any],
+    n: int = 100,
+    warmup: int = 10,
+    concurrency: Iterable[int] = (1,),
+    cache_mode: str = "off",
+    executor: str = "thread",
+    process_workers: Optional[int] = None,
+    preload: Iterable[str] = (),
+    default_timeout: Optional[float] = None,
+    default_max_concurrency: Optional[int] = None,
+    on_result: Optional[Callable[[BenchResult], None]] = None,
+) -> List[BenchResult]:
+    """Run `wf` n times (after `warmup` unmeasured runs) at each concurrency level.
+
+    Each level gets a fresh runtime whose thread pool matches its concurrency, as
+    `agnocli batch` does, so levels do not share warm workers.
+    """
+    results = []
+    for level in concurrency:
+        with _BenchRuntime(
+            max_workers=level,
+            executor=executor,
+            process_workers=process_workers,
+            preload=preload,
+            default_timeout=default_timeout,
+            default_max_concurrency=default_max_concurrency,
+        ) as runtime:
+            result = runtime.call(_bench_level(runtime, wf, params, n, warmup, level, cache_mode))
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+    return results
+
+
+def save_baseline(
+    path: Path, wf: Workflow, params: Dict[str, Any], n: int, warmup: int, results: List[BenchResult], **settings: Any
+) -> None:
+    data = {
+        "workflow": wf.name,
+        "params": params,
+        "n": n,
+        "warmup": warmup,
+        **settings,
+        "created": time.time(),
+        "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "results": [asdict(r) for r in results],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2, default=str) + "\n", encoding="utf-8")
+
+
+def load_baseline(path: Path) -> Dict[str, Any]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(data, dict) or not isinstance(data.get("results"), list):
+        raise ValueError(f"{path} is not an agnocli bench baseline")
+    return data
+
+
+# Metric and the direction that counts as worse
+_COMPARED = (("p50", 1), ("p95", 1), ("p99", 1), ("throughput", -1))
+
+
+def compare_baseline(baseline: Dict[str, Any], results: List[BenchResult], threshold: float) -> List[Regression]:
+    """Metrics that got worse than the baseline by more than `threshold` (0.1 = 10%).
+
+    Only concurrency levels present in both runs are compared.
+    """
+    by_level = {int(r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        base = by_level.get(result.concurrency)
+        if base is None:
+            continue
+        for metric, worse in _COMPARED:
+            old, new = float(base.get(metric) or 0.0), getattr(result, metric)
+            if old and (new - old) / old * worse > threshold:
+                regressions.append(Regression(result.concurrency, metric, old, new))
+    return regressions
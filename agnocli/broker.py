@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import hmac
+import ipaddress
+import json
+import logging
+import socket
+import socketserver
+import threading
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
+
+from .jobs import Job, JobError, JobQueue
+from .output import jsonable
+
+DEFAULT_PORT = 7420
+CONNECT_TIMEOUT = 5.0
+
+# Queue methods a remote client may call
+_OPS = ("submit", "claim", "heartbeat", "complete", "fail", "release", "get", "list", "counts")
+
+
+def _send(conn: socket.socket, msg: Dict[str, Any]) -> None:
+    conn.sendall(json.dumps(msg, default=str).encode("utf-8") + b"\n")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "BrokerServer"
+
+    def handle(self) -> None:
+        # One connection carries any number of requests, one JSON line each
+        for line in self.rfile:
+            try:
+                reply = self.server.dispatch(json.loads(line))
+            except ValueError:
+                reply = {"error": "malformed request"}
+            try:
+                _send(self.connection, reply)
+            except (BrokenPipeError, ConnectionResetError):
+                return
+
+
+class BrokerServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """Serves a JobQueue over TCP so workers on other hosts can share it."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str, port: int, queue: JobQueue, token: Optional[str] = None):
+        self.queue = queue
+        self.token = token
+        super().__init__((host, port), _Handler)
+
+    def dispatch(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        if not isinstance(msg, dict):
+            return {"error": "malformed request"}
+        if self.token and not hmac.compare_digest(str(msg.get("token") or ""), self.token):
+            return {"error": "invalid broker token"}
+        op = msg.get("op")
+        if op not in _OPS:
+            return {"error": f"unknown op '{op}'"}
+        try:
+            value = getattr(self.queue, op)(**(msg.get("args") or {}))
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+        if isinstance(value, Job):
+            value = asdict(value)
+        elif isinstance(value, list) and value and isinstance(value[0], Job):
+            value = [asdict(job) for job in value]
+        return {"value": value}
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def serve_broker(
+    host: str, port: int, queue: JobQueue, token: Optional[str], logger: logging.Logger, insecure: bool = False
+) -> None:
+    """Serve `queue` until interrupted.
+
+    Without a token only loopback hosts are allowed, unless `insecure`: anyone who
+    can queue a job can run code through the workers.
+    """
+    if not token and not insecure and not is_loopback(host):
+        raise JobError(f"Refusing to serve {host}:{port} without queue.token; set a token or pass --insecure")
+    if not token and not is_loopback(host):
+        logger.warning("broker on %s:%s accepts jobs from anyone who can reach it (no queue.token)", host, port)
+    server = BrokerServer(host, port, queue, token)
+    logger.info("broker listening on %s:%s (queue %s)", host, server.server_address[1], queue.path)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info("broker stopped")
+
+
+class RemoteQueue:
+    """Same interface as JobQueue, backed by an `agnocli broker` on another host."""
+
+    def __init__(self, host: str, port: int, token: Optional[str] = None):
+        self.host = host
+        self.port = port
+        self.token = token
+        self._sock: Optional[socket.socket] = None
+        self._file = None
+        # One request at a time per connection (the worker's heartbeat thread shares it)
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"tcp://{self.host}:{self.port}"
+
+    def _connect(self) -> None:
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=CONNECT_TIMEOUT)
+        except OSError as e:
+            raise JobError(f"Cannot reach broker at {self!r}: {e}") from e
+        sock.settimeout(None)
+        self._sock, self._file = sock, sock.makefile("rb")
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
+
+    def _disconnect(self) -> None:
+        if self._sock is not None:
+            try:
+                self._file.close()
+            finally:
+                self._sock.close()
+        self._sock = self._file = None
+
+    def _call(self, op: str, **args: Any) -> Any:
+        msg = {"op": op, "args": args, "token": self.token}
+        with self._lock:
+            # Reconnect once if the broker was restarted since the last request
+            for attempt in (1, 2):
+                if self._sock is None:
+                    self._connect()
+                try:
+                    _send(self._sock, msg)
+                    line = self._file.readline()
+                except OSError:
+                    line = b""
+                if line:
+                    break
+                self._disconnect()
+                if attempt == 2:
+                    raise JobError(f"Broker at {self!r} closed the connection")
+        reply = json.loads(line)
+        if "error" in reply:
+            raise JobError(reply["error"])
+        return reply.get("value")
+
+    def submit(self, workflow: str, params: Dict[str, Any], retries: int = 0) -> str:
+        return self._call("submit", workflow=workflow, params=params, retries=retries)
+
+    def claim(self, worker: str, lease: float, workflows: Optional[List[str]] = None) -> Optional[Job]:
+        data = self._call("claim", worker=worker, lease=lease, workflows=workflows)
+        return Job(**data) if data else None
+
+    def heartbeat(self, leases: List[str], lease: float) -> List[str]:
+        return self._call("heartbeat", leases=leases, lease=lease)
+
+    def complete(self, lease: str, result: Any) -> bool:
+        return self._call("complete", lease=lease, result=jsonable(result))
+
+    def fail(self, lease: str, error: str, retry: bool = True, retry_delay: float = 5.0) -> bool:
+        return self._call("fail", lease=lease, error=error, retry=retry, retry_delay=retry_delay)
+
+    def release(self, lease: str) -> bool:
+        return self._call("release", lease=lease)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        data = self._call("get", job_id=job_id)
+        return Job(**data) if data else None
+
+    def list(self, limit: int = 20, status: Optional[str] = None) -> List[Job]:
+        return [Job(**data) for data in self._call("list", limit=limit, status=status)]
+
+    def counts(self, workflows: Optional[List[str]] = None) -> Dict[str, int]:
+        return self._call("counts", workflows=workflows)
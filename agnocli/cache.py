@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .config import _platform_config_dir
+
+
+CACHE_MODES = ("use", "off", "refresh")
+
+_MISS = object()
+
+
+def _default_cache_dir() -> Path:
+    return _platform_config_dir() / "cache" / "results"
+
+
+@dataclass
+class CacheStats:
+    memory_entries: int
+    disk_entries: int
+    disk_bytes: int
+    expired: int
+    per_workflow: Dict[str, int]
+    hits: int
+    misses: int
+
+
+_SOURCE_HASHES: "weakref.WeakKeyDictionary[Any, str]" = weakref.WeakKeyDictionary()
+
+
+def _module_source(func: Any) -> bytes:
+    module = sys.modules.get(getattr(func, "__module__", None) or "")
+    path = getattr(module, "__file__", None)
+    if not path:
+        return b""
+    try:
+        return Path(path).read_bytes()
+    except OSError:
+        return b""
+
+
+def source_hash(func: Any) -> str:
+    """Hash of the workflow's source and of its module's, so edits invalidate its cached results.
+
+    The module covers globals and helpers the workflow uses (e.g. a model name constant).
+    """
+    cached = _SOURCE_HASHES.get(func)
+    if cached is not None:
+        return cached
+    try:
+        material = inspect.getsource(func).encode("utf-8")
+    except (OSError, TypeError):
+        code = getattr(func, "__code__", None)
+        material = code.co_code + repr(code.co_consts).encode("utf-8") if code is not None else repr(func).encode()
+    digest = hashlib.sha256(material + b"\0" + _module_source(func)).hexdigest()[:16]
+    try:
+        _SOURCE_HASHES[func] = digest
+    except TypeError:
+        pass
+    return digest
+
+
+def cache_key(name: str, params: Dict[str, Any], func: Any) -> str:
+    normalized = json.dumps(params, sort_keys=True, separators=(",", ":"), default=repr)
+    raw = f"{name}\0{normalized}\0{source_hash(func)}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _safe_dirname(name: str) -> str:
+    cleaned = "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+    return cleaned or "_"
+
+
+class ResultCache:
+    """Two-tier (memory LRU, then disk) cache of workflow results."""
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        max_entries: int = 1000,
+        max_bytes: int = 100 * 1024 * 1024,
+        memory_entries: int = 256,
+        default_ttl: Optional[float] = None,
+    ):
+        self.directory = Path(directory) if directory else _default_cache_dir()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.default_ttl = default_ttl
+        # Pickled, so every hit gets its own copy just as a disk hit does
+        self._memory: "OrderedDict[str, Tuple[Optional[float], bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Running disk usage, seeded by one scan on the first write; None until then
+        self._disk_count: Optional[int] = None
+        self._disk_bytes = 0
+
+    def _path(self, workflow: str, key: str) -> Path:
+        return self.directory / _safe_dirname(workflow) / f"{key}.pkl"
+
+    def get(self, workflow: str, key: str) -> Any:
+        """Return the cached value, or the module-level _MISS sentinel."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires, payload = entry
+                if expires is None or expires > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                else:
+                    del self._memory[key]
+                    payload = None
+            else:
+                payload = None
+        if payload is not None:
+            return pickle.loads(payload)
+
+        path = self._path(workflow, key)
+        try:
+            with path.open("rb") as f:
+                meta = pickle.load(f)
+                expires = meta.get("expires")
+                if expires is not None and expires <= now:
+                    raise FileNotFoundError
+                payload = f.read()
+                value = pickle.loads(payload)
+        except FileNotFoundError:
+            self._discard(path)
+            with self._lock:
+                self.misses += 1
+            return _MISS
+        except Exception:
+            # Corrupt or incompatible entry
+            self._discard(path)
+            with self._lock:
+                self.misses += 1
+            return _MISS
+        with self._lock:
+            self.hits += 1
+            self._remember(key, expires, payload)
+        return value
+
+    def put(self, workflow: str, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        ttl = ttl if ttl is not None else self.default_ttl
+        expires = time.time() + ttl if ttl else None
+        try:
+            payload = pickle.dumps(value)
+        except Exception:
+            return False
+        with self._lock:
+            self._remember(key, expires, payload)
+
+        path = self._path(workflow, key)
+        self._seed_usage()
+        old_size = self._file_size(path)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with tmp.open("wb") as f:
+                pickle.dump({"workflow": workflow, "created": time.time(), "expires": expires}, f)
+                f.write(payload)
+            os.replace(tmp, path)
+        except OSError:
+            return False
+        new_size = self._file_size(path) or 0
+        with self._lock:
+            if self._disk_count is not None:
+                self._disk_count += old_size is None
+                self._disk_bytes += new_size - (old_size or 0)
+            over = self._over_limit()
+        if over:
+            self._evict_disk()
+        return True
+
+    def _remember(self, key: str, expires: Optional[float], payload: bytes) -> None:
+        self._memory[key] = (expires, payload)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    @staticmethod
+    def _file_size(path: Path) -> Optional[int]:
+        try:
+            return path.stat().st_size
+        except OSError:
+            return None
+
+    def _discard(self, path: Path) -> None:
+        size = self._file_size(path)
+        try:
+            path.unlink()
+        except OSError:
+            return
+        with self._lock:
+            if self._disk_count is not None and size is not None:
+                self._disk_count = max(0, self._disk_count - 1)
+                self._disk_bytes = max(0, self._disk_bytes - size)
+
+    def _seed_usage(self) -> None:
+        with self._lock:
+            if self._disk_count is not None:
+                return
+        entries = self._disk_entries()
+        with self._lock:
+            if self._disk_count is None:
+                self._disk_count = len(entries)
+                self._disk_bytes = sum(size for _, size, _ in entries)
+
+    def _over_limit(self) -> bool:
+        return self._disk_count is not None and (
+            self._disk_count > self.max_entries or self._disk_bytes > self.max_bytes
+        )
+
+    def _disk_entries(self):
+        if not self.directory.exists():
+            return []
+        entries = []
+        for sub in os.scandir(self.directory):
+            if not sub.is_dir():
+                continue
+            for e in os.scandir(sub.path):
+                if e.name.endswith(".pkl"):
+                    st = e.stat()
+                    entries.append((st.st_mtime, st.st_size, Path(e.path)))
+        return entries
+
+    def _evict_disk(self) -> None:
+        # Only reached past a limit; the scan also resyncs with writes from other processes
+        entries = self._disk_entries()
+        total = sum(size for _, size, _ in entries)
+        # Oldest first
+        entries.sort()
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, path = entries.pop(0)
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total -= size
+        with self._lock:
+            self._disk_count = len(entries)
+            self._disk_bytes = total
+
+    def stats(self) -> CacheStats:
+        now = time.time()
+        per_workflow: Dict[str, int] = {}
+        expired = 0
+        entries = self._disk_entries()
+        for _, _, path in entries:
+            try:
+                with path.open("rb") as f:
+                    meta = pickle.load(f)
+            except Exception:
+                continue
+            if meta.get("expires") is not None and meta["expires"] <= now:
+                expired += 1
+            wf = meta.get("workflow", path.parent.name)
+            per_workflow[wf] = per_workflow.get(wf, 0) + 1
+        with self._lock:
+            return CacheStats(
+                memory_entries=len(self._memory),
+                disk_entries=len(entries),
+                disk_bytes=sum(size for _, size, _ in entries),
+                expired=expired,
+                per_workflow=per_workflow,
+                hits=self.hits,
+                misses=self.misses,
+            )
+
+    def clear(self, workflow: Optional[str] = None) -> int:
+        with self._lock:
+            self._memory.clear()
+            # Reseeded on the next write
+            self._disk_count = None
+            self._disk_bytes = 0
+        if workflow is not None:
+            target = self.directory / _safe_dirname(workflow)
+        else:
+            target = self.directory
+        removed = sum(1 for _, _, p in self._disk_entries() if workflow is None or p.parent == target)
+        shutil.rmtree(target, ignore_errors=True)
+        return removed
+
+
+_CACHE: Optional[ResultCache] = None
+
+
+def configure_cache(settings: Any) -> None:
+    """Create the process-wide cache from CacheSettings (or disable it)."""
+    global _CACHE
+    if not settings.enabled:
+        _CACHE = None
+        return
+    _CACHE = ResultCache(
+        directory=settings.dir,
+        max_entries=settings.max_entries,
+        max_bytes=settings.max_bytes,
+        memory_entries=settings.memory_entries,
+        default_ttl=settings.ttl,
+    )
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    return _CACHE
+
+
+def is_miss(value: Any) -> bool:
+    return value is _MISS
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+from contextlib import ExitStack
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
 from typing import Dict, List, Optional
-import shlex
-import inspect
+import re
+import sys
+import time
 
 import click
 import typer
@@ -10,12 +15,31 @@ from rich.panel import Panel
 from rich.table import Table
 from rich.text import Text
 
-from .config import load_config
+from .batch import format_record, run_batch
+from .bench import BenchResult, compare_baseline, load_baseline, run_bench, save_baseline
+from .cache import configure_cache, get_result_cache
+from .completion import completion_script, load_index
+from .config import ConfigError, HistorySettings, load_config, module_list
+from .daemon import DaemonClient, DaemonError, RemoteResult, RemoteStream, serve as serve_daemon
+from .broker import DEFAULT_PORT, is_loopback, serve_broker
+from .discovery import discover_modules, expand_modules, failed_modules, import_modules, record_failures
+from .jobs import JOB_STATUSES, Job, JobError, job_record, open_queue, run_worker, wait_for_job, worker_name
 from .logging_setup import setup_logging
-from .markdown import get_console, render_markdown, render_plain
-from .runner import run_workflow
+from .manifest import WorkflowInfo, info_from_workflow, load_manifests
+from .markdown import get_console, render_result, render_stream, write_raw
+from .menu import WorkflowMenu, parse_command
+from .metrics import label, profile_call, report_timings, span, trace_memory_call
+from .ollama_stub import HOST_ENV, OllamaStub, StubError, stub_ollama
+from .params import ParamError, converter_for
+from .pipeline import PipelineError, StepResult, load_pipeline, run_pipeline
+from .reload import HotReloader
+from .resources import ResourceError, resource_session
+from .runner import WorkflowRuntime, WorkflowTimeout, configure_runtime, get_runtime, run_inline, run_workflow
+from .script import run_script
 from .state import get_current_workflow, set_current_workflow
-from .workflows import discover_from_module, get_workflow, list_workflows, Workflow
+from .store import RUN_STATUSES, configure_history, get_store
+from .throughput import LLMUsage, collect_usage
+from .workflows import discover_from_module, get_workflow, list_workflows, registry_version, Workflow
 
 app = typer.Typer(add_completion=False, help="Agno CLI to discover and run workflows.")
 
@@ -30,11 +54,79 @@ def _parse_args(kvs: List[str]) -> Dict[str, str]:
     return parsed
 
 
-def _ensure_discovery(cfg_module: Optional[str]):
-    if not cfg_module:
+def _ensure_discovery(cfg_module):
+    if not module_list(cfg_module):
         raise typer.Exit("workflows_module is not configured in agnocli.yaml and not provided via --module")
     discover_from_module(cfg_module)
 
+
+def _workflow_infos(cfg_module) -> Dict[str, WorkflowInfo]:
+    """Workflow metadata from the static manifest; imports only as a fallback.
+
+    Packages are expanded to their submodules; only the modules that cannot be
+    scanned statically are imported (concurrently, failures recorded).
+    """
+    modules = module_list(cfg_module)
+    if not modules:
+        raise typer.Exit("workflows_module is not configured in agnocli.yaml and not provided via --module")
+    sources, errors = expand_modules(modules)
+    record_failures(errors)
+    infos, pending = load_manifests(sources)
+    if pending:
+        import_modules(pending)
+        for name, wf in list_workflows().items():
+            infos.setdefault(name, info_from_workflow(wf))
+    return infos
+
+
+def _not_found(name: str) -> str:
+    message = f"Workflow '{name}' not found"
+    failed = failed_modules()
+    if failed:
+        message += f" ({len(failed)} workflow module(s) failed to import; see 'agnocli modules')"
+    return message
+
+def _write_chunk(data: str) -> None:
+    sys.stdout.write(data)
+    sys.stdout.flush()
+
+
+def _cache_mode(no_cache: bool, refresh: bool) -> str:
+    if no_cache:
+        return "off"
+    return "refresh" if refresh else "use"
+
+
+def _run_via_daemon(
+    cfg,
+    name: str,
+    params: Dict[str, object],
+    cache_mode: str = "use",
+    on_stream: Optional[RemoteStream] = None,
+    config_path: Optional[str] = None,
+) -> Optional[RemoteResult]:
+    """Run on a warm `agnocli serve` daemon; None means run in-process instead."""
+    client = DaemonClient.connect()
+    if client is None:
+        return None
+    try:
+        return client.run(
+            name,
+            params,
+            module=cfg.workflows_module,
+            config_path=config_path,
+            on_chunk=_write_chunk,
+            cache_mode=cache_mode,
+            on_stream=on_stream,
+        )
+    except DaemonError as e:
+        if e.code in ("mismatch", "disconnected"):
+            return None
+        raise
+    finally:
+        client.close()
+
+
 def _should_render_markdown(
     markdown_option: Optional[bool],
     wf: Workflow,
@@ -50,12 +142,18 @@ def _should_render_markdown(
 @app.callback()
 def main(
     ctx: typer.Context,
-    module: Optional[str] = typer.Option(None, "--module", help="Python module path to workflows (overrides config)"),
+    module: Optional[str] = typer.Option(
+        None, "--module", help="Workflows module or package; comma-separate several (overrides config)"
+    ),
     config: Optional[str] = typer.Option(None, "--config", help="Path to agnocli.yaml"),
     render: Optional[bool] = typer.Option(None, "--render/--no-render", help="Render markdown output"),
     force_ansi: Optional[bool] = typer.Option(None, "--force-ansi/--no-force-ansi", help="Force ANSI output"),
 ):
-    cfg = load_config(config)
+    with span("load_config"):
+        try:
+            cfg = load_config(config)
+        except ConfigError as e:
+            raise typer.Exit(f"Invalid configuration:\n{e}")
     if module:
         cfg.workflows_module = module
     if render is not None:
@@ -63,30 +161,80 @@ def main(
     if force_ansi is not None:
         cfg.ansi.force = force_ansi
 
-    logger = setup_logging(cfg.log_dir)
-    ctx.obj = {"cfg": cfg, "logger": logger}
+    configure_cache(cfg.cache)
+    configure_history(cfg.history)
+    configure_runtime(
+        max_workers=cfg.runtime.max_workers,
+        executor=cfg.runtime.executor,
+        process_workers=cfg.runtime.process_workers,
+        preload=cfg.workflow_modules,
+        default_timeout=cfg.runtime.timeout,
+        default_max_concurrency=cfg.runtime.max_concurrency,
+    )
+
+    with span("setup_logging"):
+        try:
+            logger = setup_logging(cfg.log_dir, cfg.logging)
+        except ValueError as e:
+            raise typer.Exit(f"Invalid logging config: {e}")
+    ctx.obj = {"cfg": cfg, "logger": logger, "config_path": config}
+    # Session-scoped resources live for this command (a whole TUI session, batch or serve)
+    ctx.with_resource(resource_session())
+    # Runs after the command finishes, including on errors and typer.Exit
+    ctx.call_on_close(lambda: report_timings(logger, ctx.invoked_subcommand, cfg.metrics))
 
 @app.command()
 def list():
     """List available workflows."""
     ctx = click.get_current_context()
     cfg = ctx.obj["cfg"]
-    _ensure_discovery(cfg.workflows_module)
+    with span("discovery"):
+        infos = _workflow_infos(cfg.workflows_module)
 
     console = get_console(cfg.ansi.force)
     table = Table(title="Available Workflows")
     table.add_column("Name", style="bold cyan")
     table.add_column("Description")
-    for name, wf in list_workflows().items():
+    for name, wf in infos.items():
         table.add_row(name, wf.description or "")
+    # Broken modules are listed rather than aborting the whole command
+    for status in failed_modules():
+        table.add_row(Text(status.name, style="red"), Text(f"import failed: {status.error}", style="red"))
     console.print(table)
 
+
+@app.command()
+def modules():
+    """Import every workflows module and report per-module import time."""
+    ctx = click.get_current_context()
+    cfg = ctx.obj["cfg"]
+    if not cfg.workflow_modules:
+        raise typer.Exit("workflows_module is not configured in agnocli.yaml and not provided via --module")
+    start = time.perf_counter()
+    statuses = discover_modules(cfg.workflow_modules)
+    elapsed = time.perf_counter() - start
+
+    console = get_console(cfg.ansi.force)
+    table = Table(title="Workflow Modules")
+    table.add_column("Module", style="bold cyan")
+    table.add_column("Status")
+    table.add_column("Workflows", justify="right")
+    table.add_column("Import ms", justify="right")
+    for status in sorted(statuses, key=lambda st: st.seconds, reverse=True):
+        state = Text("ok", style="green") if status.ok else Text(f"failed: {status.error}", style="red")
+        table.add_row(status.name, state, str(len(status.workflows)), f"{status.seconds * 1000:.1f}")
+    console.print(table)
+    failed = sum(1 for st in statuses if not st.ok)
+    console.print(f"{len(statuses)} modules, {failed} failed, {elapsed * 1000:.1f} ms wall time")
+    if failed:
+        raise typer.Exit(1)
+
 @app.command()
 def current():
     """Show current active workflow (from state)."""
     ctx = click.get_current_context()
     cfg = ctx.obj["cfg"]
-    _ensure_discovery(cfg.workflows_module)
+    _workflow_infos(cfg.workflows_module)
     cur = get_current_workflow() or cfg.default_workflow
     console = get_console(cfg.ansi.force)
     if cur:
@@ -100,9 +248,8 @@ def switch(name: str):
     """Set current active workflow."""
     ctx = click.get_current_context()
     cfg = ctx.obj["cfg"]
-    _ensure_discovery(cfg.workflows_module)
-    if name not in list_workflows():
-        raise typer.Exit(f"Workflow '{name}' not found")
+    if name not in _workflow_infos(cfg.workflows_module):
+        raise typer.Exit(_not_found(name))
     set_current_workflow(name)
     console = get_console(cfg.ansi.force)
     console.print(Panel.fit(Text(f"Switched to workflow: {name}", style="green")))
@@ -113,59 +260,874 @@ def run(
     name: Optional[str] = typer.Argument(None, help="Workflow name; if omitted uses current/default"),
     arg: List[str] = typer.Option([], "--arg", help="Pass parameter as key=value. Repeatable."),
     markdown: Optional[bool] = typer.Option(None, "--markdown/--plain", help="Render output as markdown or plain"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Bypass the result cache for this run"),
+    refresh: bool = typer.Option(False, "--refresh", help="Re-run and overwrite any cached result"),
+    output: Optional[str] = typer.Option(None, "--output", "-o", help="Write the raw result to this file"),
+    pager: Optional[bool] = typer.Option(None, "--pager/--no-pager", help="Page large results on a terminal"),
+    profile: Optional[str] = typer.Option(None, "--profile", help="Write a cProfile (pstats) dump of the workflow run here"),
+    trace_memory: int = typer.Option(0, "--trace-memory", min=0, help="Report the top N allocations of the workflow run"),
+    stats: bool = typer.Option(False, "--stats", help="Show LLM time-to-first-token, tokens and tokens/s after the run"),
 ):
     """Run a workflow with optional parameters."""
     ctx = click.get_current_context()
     cfg = ctx.obj["cfg"]
-    _ensure_discovery(cfg.workflows_module)
+    logger = ctx.obj["logger"]
+    selected = name or get_current_workflow() or cfg.default_workflow
+    if not selected:
+        raise typer.Exit("No workflow selected. Provide a name or set current/default.")
+    label(workflow=selected)
+
+    with span("params"):
+        params = _parse_args(arg)
+    cache_mode = _cache_mode(no_cache, refresh)
+    console = get_console(cfg.ansi.force)
+    # Profiling has to observe this process, so it never goes through the daemon
+    diagnose = bool(profile or trace_memory)
+    # --output streams the raw result to disk instead of the terminal
+    out = open(output, "w", encoding="utf-8") if output else None
+    usage_scope = ExitStack()
+    # The run's LLM metrics are collected in this process, so --stats skips the daemon too
+    usage = usage_scope.enter_context(collect_usage()) if stats else None
+    try:
+        remote = None
+        if not diagnose and usage is None:
+            stream = RemoteStream(console, markdown, cfg.markdown.render, settings=cfg.output, file=out)
+            try:
+                with span("daemon"):
+                    remote = _run_via_daemon(
+                        cfg, selected, params, cache_mode, on_stream=stream, config_path=ctx.obj["config_path"]
+                    )
+            except DaemonError as e:
+                raise typer.Exit(str(e))
+            finally:
+                stream.close()
+        if remote is not None:
+            if remote.streamed:
+                return
+            # RemoteResult carries the workflow's render_markdown preference
+            wf, result = remote, remote.result
+        else:
+            with span("discovery"):
+                _ensure_discovery(cfg.workflows_module)
+            wf = get_workflow(selected)
+            if not wf:
+                raise typer.Exit(_not_found(selected))
+            with span("params"):
+                try:
+                    params = wf.coerce_params(params)
+                except ParamError as e:
+                    raise typer.Exit(f"Invalid params for '{selected}': {e}")
+            try:
+                if wf.streaming and not diagnose:
+                    render_md = _should_render_markdown(markdown, wf, cfg.markdown.render)
+                    with span("stream"):
+                        chunks = get_runtime().stream(wf, params, cache_mode)
+                        render_stream(console, chunks, render_md, cfg.output, file=out)
+                    return
+                with span("execute"):
+                    result = _diagnosed_run(wf, params, cache_mode, profile, trace_memory, logger)
+            except (WorkflowTimeout, ResourceError) as e:
+                logger.warning("%s", e)
+                raise typer.Exit(str(e))
+
+        with span("render"):
+            if out is not None:
+                write_raw(out, result, cfg.output.chunk_size)
+                return
+            render_md = _should_render_markdown(markdown, wf, cfg.markdown.render)
+            render_result(console, result, render_md, cfg.output, pager=pager)
+    finally:
+        if out is not None:
+            out.close()
+        usage_scope.close()
+        if usage is not None:
+            _print_usage(usage.usage())
+
+
+def _format_optional(value: Optional[float], fmt: str) -> str:
+    return "-" if value is None else format(value, fmt)
+
+
+def _print_usage(usage: List[LLMUsage]) -> None:
+    err = get_console(stderr=True)
+    if not usage:
+        err.print("No LLM metrics were reported by this run", style="dim", highlight=False)
+        return
+    table = Table(title="LLM Throughput")
+    table.add_column("Model", style="bold cyan")
+    for column in ("Calls", "TTFT ms", "In", "Out", "Tokens/s", "Seconds"):
+        table.add_column(column, justify="right")
+    for u in usage:
+        table.add_row(
+            u.model,
+            str(u.calls),
+            _format_optional(None if u.ttft is None else u.ttft * 1000, ".1f"),
+            _format_optional(u.input_tokens, "d"),
+            _format_optional(u.output_tokens, "d"),
+            _format_optional(u.tokens_per_second, ".1f"),
+            _format_optional(u.seconds, ".2f"),
+        )
+    err.print(table)
+
+
+def _diagnosed_run(wf: Workflow, params: Dict[str, object], cache_mode: str, profile: Optional[str], trace_memory: int, logger):
+    """run_workflow, optionally under cProfile and/or tracemalloc."""
+    if not profile and not trace_memory:
+        return run_workflow(wf, params, cache_mode=cache_mode)
+    err = get_console(stderr=True)
+
+    def _execute():
+        if profile:
+            # cProfile only sees the calling thread, so run the workflow inline
+            return profile_call(lambda: run_inline(wf, params), Path(profile))
+        return run_workflow(wf, params, cache_mode="off")
+
+    if trace_memory:
+        result, report = trace_memory_call(_execute, top=trace_memory)
+        logger.info("memory trace for %s:\n%s", wf.name, report)
+        err.print(report, style="dim", highlight=False, soft_wrap=True)
+    else:
+        result = _execute()
+    if profile:
+        logger.info("profile for %s written to %s", wf.name, profile)
+        err.print(f"Profile written to {profile} (inspect with: python -m pstats {profile})", style="dim", highlight=False)
+    return result
+
+
+@app.command()
+def batch(
+    jobs: str = typer.Argument(..., help="JSONL file of {\"workflow\": ..., \"params\": {...}} lines, or - for stdin"),
+    concurrency: int = typer.Option(8, "--concurrency", "-c", min=1, help="Maximum jobs running at once"),
+    output: Optional[str] = typer.Option(None, "--output", "-o", help="Write JSONL results to this file instead of stdout"),
+    ordered: bool = typer.Option(False, "--ordered", help="Emit results in input order instead of completion order"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Bypass the result cache"),
+    refresh: bool = typer.Option(False, "--refresh", help="Re-run and overwrite cached results"),
+):
+    """Run many workflow jobs from a JSONL file on one event loop."""
+    ctx = click.get_current_context()
+    cfg = ctx.obj["cfg"]
+    logger = ctx.obj["logger"]
+    with span("discovery"):
+        _ensure_discovery(cfg.workflows_module)
+
+    src = sys.stdin if jobs == "-" else open(jobs, "r", encoding="utf-8")
+    out = open(output, "w", encoding="utf-8") if output else sys.stdout
+
+    def _emit(record):
+        out.write(format_record(record) + "\n")
+        out.flush()
+
+    try:
+        with span("execute"):
+            counts = run_batch(
+                src,
+                _emit,
+                concurrency=concurrency,
+                ordered=ordered,
+                executor=cfg.runtime.executor,
+                process_workers=cfg.runtime.process_workers,
+                preload=cfg.workflow_modules,
+                cache_mode=_cache_mode(no_cache, refresh),
+                default_timeout=cfg.runtime.timeout,
+                default_max_concurrency=cfg.runtime.max_concurrency,
+            )
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if out is not sys.stdout:
+            out.close()
+    logger.info("batch %s: %d ok, %d failed", jobs, counts["ok"], counts["error"])
+    if counts["error"]:
+        raise typer.Exit(1)
+
 
+_STEP_STYLES = {"ok": "green", "error": "red", "skipped": "yellow", "cancelled": "yellow"}
+
+
+@app.command()
+def pipeline(
+    path: str = typer.Argument(..., help="Pipeline YAML file"),
+    arg: List[str] = typer.Option([], "--arg", help="Set a pipeline param as key=value. Repeatable."),
+    markdown: Optional[bool] = typer.Option(None, "--markdown/--plain", help="Render output as markdown or plain"),
+    as_json: bool = typer.Option(False, "--json", help="Print one JSON record per step instead of the outputs"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Bypass the result cache"),
+    refresh: bool = typer.Option(False, "--refresh", help="Re-run and overwrite cached results"),
+):
+    """Run a DAG of workflows; steps whose inputs are ready run concurrently."""
+    ctx = click.get_current_context()
+    cfg = ctx.obj["cfg"]
+    logger = ctx.obj["logger"]
+    try:
+        spec = load_pipeline(Path(path))
+    except PipelineError as e:
+        raise typer.Exit(f"Invalid pipeline: {e}")
+    label(workflow=f"pipeline:{spec.name}")
+    with span("discovery"):
+        _ensure_discovery(cfg.workflows_module)
+    err = get_console(stderr=True)
+
+    def _progress(result: StepResult) -> None:
+        detail = f" ({result.error})" if result.error else ""
+        reused = ", shared" if result.shared else ""
+        err.print(
+            f"[{_STEP_STYLES[result.status]}]{result.status:>9}[/] {result.id} "
+            f"[dim]{result.workflow}, {result.seconds:.2f}s{reused}[/]{detail}",
+            highlight=False,
+            soft_wrap=True,
+        )
+
+    try:
+        with span("execute"):
+            results = run_pipeline(spec, _parse_args(arg), _cache_mode(no_cache, refresh), on_step=_progress)
+    except PipelineError as e:
+        raise typer.Exit(f"Invalid pipeline: {e}")
+    failed = [r for r in results.values() if r.status != "ok"]
+    logger.info("pipeline %s: %d steps, %d not ok", spec.name, len(results), len(failed))
+
+    with span("render"):
+        if as_json:
+            for result in results.values():
+                record = {k: v for k, v in vars(result).items() if v is not None}
+                record["seconds"] = round(result.seconds, 6)
+                sys.stdout.write(format_record(record) + "\n")
+        else:
+            console = get_console(cfg.ansi.force)
+            for sid in spec.outputs:
+                if results[sid].status != "ok":
+                    continue
+                wf = get_workflow(spec.steps[sid].workflow)
+                render_result(console, results[sid].output, _should_render_markdown(markdown, wf, cfg.markdown.render), cfg.output)
+    if failed:
+        raise typer.Exit(1)
+
+
+def _parse_levels(value: str) -> List[int]:
+    try:
+        levels = [int(v) for v in value.split(",") if v.strip()]
+    except ValueError:
+        levels = []
+    if not levels or min(levels) < 1:
+        raise typer.BadParameter(f"Invalid concurrency '{value}'. Use e.g. 1,8,32")
+    return levels
+
+
+def _format_bytes(size: Optional[int]) -> str:
+    return "-" if size is None else f"{size / (1024 * 1024):.0f}M"
+
+
+@app.command()
+def bench(
+    name: Optional[str] = typer.Argument(None, help="Workflow name; if omitted uses current/default"),
+    arg: List[str] = typer.Option([], "--arg", help="Pass parameter as key=value. Repeatable."),
+    n: int = typer.Option(100, "-n", "--runs", min=1, help="Measured runs per concurrency level"),
+    warmup: int = typer.Option(10, "--warmup", min=0, help="Unmeasured runs before each level"),
+    concurrency: str = typer.Option("1", "--concurrency", "-c", help="Comma-separated concurrency levels, e.g. 1,8,32"),
+    use_cache: bool = typer.Option(False, "--cache", help="Let cache=True workflows hit the result cache"),
+    save: Optional[str] = typer.Option(None, "--save", help="Write the results to this JSON baseline"),
+    compare: Optional[str] = typer.Option(None, "--compare", help="Compare against this JSON baseline"),
+    threshold: float = typer.Option(0.1, "--threshold", min=0.0, help="Allowed slowdown vs the baseline (0.1 = 10%)"),
+    stub: bool = typer.Option(False, "--stub", help="Point Ollama models at a local stub server (see the `stub` config)"),
+):
+    """Benchmark a workflow: latency percentiles, throughput, memory and executor use."""
+    ctx = click.get_current_context()
+    cfg = ctx.obj["cfg"]
+    logger = ctx.obj["logger"]
     selected = name or get_current_workflow() or cfg.default_workflow
     if not selected:
         raise typer.Exit("No workflow selected. Provide a name or set current/default.")
+    label(workflow=selected)
+    levels = _parse_levels(concurrency)
+    baseline = None
+    if compare:
+        try:
+            baseline = load_baseline(Path(compare))
+        except (OSError, ValueError) as e:
+            raise typer.Exit(f"Cannot read baseline: {e}")
 
+    with span("discovery"):
+        _ensure_discovery(cfg.workflows_module)
     wf = get_workflow(selected)
     if not wf:
-        raise typer.Exit(f"Workflow '{selected}' not found")
+        raise typer.Exit(_not_found(selected))
+    with span("params"):
+        try:
+            params = wf.coerce_params(_parse_args(arg))
+        except ParamError as e:
+            raise typer.Exit(f"Invalid params for '{selected}': {e}")
+    # Thousands of benchmark runs would drown the real ones in history
+    configure_history(HistorySettings(enabled=False, path=cfg.history.path))
 
-    params = _parse_args(arg)
-    result = run_workflow(wf, params)
+    console = get_console(cfg.ansi.force)
+    table = Table(title=f"Benchmark: {selected} (n={n}, warmup={warmup}, latency in ms)")
+    table.add_column("Conc", justify="right", style="bold cyan")
+    for column in ("Runs", "Err", "Runs/s", "Mean", "p50", "p95", "p99", "Max", "Peak RSS", "Util"):
+        table.add_column(column, justify="right", no_wrap=True)
 
+    def _progress(result: BenchResult) -> None:
+        logger.info(
+            "bench %s c=%d: %.1f/s p50=%.1fms p95=%.1fms p99=%.1fms errors=%d",
+            selected,
+            result.concurrency,
+            result.throughput,
+            result.p50 * 1000,
+            result.p95 * 1000,
+            result.p99 * 1000,
+            result.errors,
+        )
+
+    with ExitStack() as stack, span("execute"):
+        if stub:
+            try:
+                server = stack.enter_context(stub_ollama(cfg.stub))
+            except (StubError, OSError) as e:
+                raise typer.Exit(f"Cannot start the Ollama stub: {e}")
+            get_console(stderr=True).print(f"Ollama stub ({cfg.stub.mode}) on {server.url}", style="dim", highlight=False)
+        results = run_bench(
+            wf,
+            params,
+            n=n,
+            warmup=warmup,
+            concurrency=levels,
+            cache_mode="use" if use_cache else "off",
+            executor=cfg.runtime.executor,
+            process_workers=cfg.runtime.process_workers,
+            preload=cfg.workflow_modules,
+            default_timeout=cfg.runtime.timeout,
+            default_max_concurrency=cfg.runtime.max_concurrency,
+            on_result=_progress,
+        )
+    for result in results:
+        table.add_row(
+            str(result.concurrency),
+            str(result.runs),
+            Text(str(result.errors), style="red" if result.errors else ""),
+            f"{result.throughput:.1f}",
+            *(f"{v * 1000:.1f}" for v in (result.mean, result.p50, result.p95, result.p99, result.max)),
+            _format_bytes(result.peak_rss),
+            "-" if result.utilization is None else f"{result.utilization:.0%}",
+        )
+    console.print(table)
+
+    if save:
+        settings = {"cache": use_cache, "executor": cfg.runtime.executor}
+        if stub:
+            settings["stub"] = {"mode": cfg.stub.mode, "ttft": cfg.stub.ttft, "tokens_per_second": cfg.stub.tokens_per_second}
+        save_baseline(Path(save), wf, params, n, warmup, results, **settings)
+        console.print(f"Baseline written to {save}")
+    if baseline is None:
+        return
+    if baseline.get("workflow") != selected:
+        console.print(Text(f"Baseline is for workflow '{baseline.get('workflow')}', not '{selected}'", style="yellow"))
+    regressions = compare_baseline(baseline, results, threshold)
+    if not regressions:
+        console.print(Text(f"No regressions beyond {threshold:.0%} against {compare}", style="green"))
+        return
+    diff = Table(title=f"Regressions against {compare}")
+    diff.add_column("Concurrency", justify="right", style="bold cyan")
+    diff.add_column("Metric")
+    diff.add_column("Baseline", justify="right")
+    diff.add_column("Current", justify="right")
+    diff.add_column("Change", justify="right", style="red")
+    for reg in regressions:
+        unit = (lambda v: f"{v:.1f}/s") if reg.metric == "throughput" else (lambda v: f"{v * 1000:.1f} ms")
+        diff.add_row(str(reg.concurrency), reg.metric, unit(reg.baseline), unit(reg.current), f"{reg.change:+.0%}")
+    console.print(diff)
+    logger.warning("bench %s: %d regression(s) beyond %.0f%% against %s", selected, len(regressions), threshold * 100, compare)
+    raise typer.Exit(1)
+
+
+_RELATIVE_TIME = re.compile(r"^(\d+(?:\.\d+)?)([smhdw])$")
+_TIME_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    """'30m', '2h', '7d' ago, or an ISO date/time, as a Unix timestamp."""
+    if not value:
+        return None
+    match = _RELATIVE_TIME.match(value.strip())
+    if match:
+        return time.time() - float(match.group(1)) * _TIME_UNITS[match.group(2)]
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise typer.BadParameter(f"Invalid time '{value}'. Use e.g. 30m, 2h, 7d or 2024-05-01T12:00")
+
+
+@app.command()
+def history(
+    workflow: Optional[str] = typer.Option(None, "--workflow", "-w", help="Only runs of this workflow"),
+    status: Optional[str] = typer.Option(None, "--status", help="ok, error, cancelled or timeout"),
+    since: Optional[str] = typer.Option(None, "--since", help="Runs started after this (30m, 2h, 7d or ISO time)"),
+    until: Optional[str] = typer.Option(None, "--until", help="Runs started before this"),
+    limit: int = typer.Option(20, "--limit", "-n", min=1, help="Number of runs to show"),
+    stats: bool = typer.Option(False, "--stats", help="Show latency statistics per workflow instead"),
+    llm: bool = typer.Option(False, "--llm", help="Show LLM throughput per workflow and model instead"),
+    model: Optional[str] = typer.Option(None, "--model", help="With --llm: only this model"),
+):
+    """Show recorded runs, latency statistics with --stats, or LLM throughput with --llm."""
+    ctx = click.get_current_context()
+    cfg = ctx.obj["cfg"]
+    if status is not None and status not in RUN_STATUSES:
+        raise typer.BadParameter(f"--status must be one of {', '.join(RUN_STATUSES)}")
+    start, end = _parse_time(since), _parse_time(until)
+    store = get_store()
     console = get_console(cfg.ansi.force)
-    render_md = _should_render_markdown(markdown, wf, cfg.markdown.render)
-    if isinstance(result, str) and render_md:
-        render_markdown(console, result)
+
+    if llm:
+        table = Table(title="LLM Throughput (tokens per run, TTFT in ms)")
+        table.add_column("Workflow", style="bold cyan")
+        table.add_column("Model", style="cyan")
+        for column in ("Runs", "In", "Out", "TTFT p50", "TTFT p95", "Tok/s p50", "Tok/s avg"):
+            table.add_column(column, justify="right")
+        for row in store.throughput_stats(workflow, model, start, end):
+            table.add_row(
+                row.workflow,
+                row.model,
+                str(row.runs),
+                _format_optional(row.input_tokens, ".0f"),
+                _format_optional(row.output_tokens, ".0f"),
+                *(_format_optional(None if v is None else v * 1000, ".1f") for v in (row.ttft_p50, row.ttft_p95)),
+                _format_optional(row.tps_p50, ".1f"),
+                _format_optional(row.tps_mean, ".1f"),
+            )
+        console.print(table)
+        return
+
+    if stats:
+        table = Table(title="Run Latency (ms)")
+        table.add_column("Workflow", style="bold cyan")
+        for column in ("Runs", "Errors", "Mean", "p50", "p95", "p99", "Max"):
+            table.add_column(column, justify="right")
+        for row in sorted(store.latency_stats(workflow, status, start, end), key=lambda r: r.workflow):
+            table.add_row(
+                row.workflow,
+                str(row.runs),
+                str(row.errors),
+                *(f"{v * 1000:.1f}" for v in (row.mean, row.p50, row.p95, row.p99, row.max)),
+            )
+        console.print(table)
+        return
+
+    table = Table(title="Run History")
+    table.add_column("Started", style="dim", no_wrap=True)
+    table.add_column("Workflow", style="bold cyan")
+    table.add_column("Status")
+    table.add_column("ms", justify="right")
+    table.add_column("Size", justify="right")
+    table.add_column("Hash", style="dim")
+    table.add_column("Params")
+    styles = {"ok": "green", "error": "red", "cancelled": "yellow", "timeout": "red"}
+    for run_row in store.query_runs(workflow, status, start, end, limit=limit):
+        status_text = run_row.status + (" (cached)" if run_row.cached else "")
+        table.add_row(
+            datetime.fromtimestamp(run_row.started).strftime("%Y-%m-%d %H:%M:%S"),
+            run_row.workflow,
+            Text(status_text, style=styles.get(run_row.status, "")),
+            f"{run_row.duration * 1000:.1f}",
+            "" if run_row.result_size is None else str(run_row.result_size),
+            run_row.result_hash or "",
+            Text(run_row.error or run_row.params or "", overflow="ellipsis", no_wrap=True),
+        )
+    console.print(table)
+
+
+cache_app = typer.Typer(help="Inspect or clear the workflow result cache.")
+app.add_typer(cache_app, name="cache")
+
+
+def _require_cache():
+    cache = get_result_cache()
+    if cache is None:
+        raise typer.Exit("Result cache is disabled (cache.enabled: false)")
+    return cache
+
+
+@cache_app.command("stats")
+def cache_stats():
+    """Show result cache size and per-workflow entries."""
+    ctx = click.get_current_context()
+    cfg = ctx.obj["cfg"]
+    stats = _require_cache().stats()
+    console = get_console(cfg.ansi.force)
+    table = Table(title="Result Cache")
+    table.add_column("Workflow", style="bold cyan")
+    table.add_column("Entries", justify="right")
+    for wf_name, count in sorted(stats.per_workflow.items()):
+        table.add_row(wf_name, str(count))
+    console.print(table)
+    console.print(
+        f"{stats.disk_entries} entries, {stats.disk_bytes / 1024:.1f} KiB on disk"
+        f" ({stats.expired} expired) in {_require_cache().directory}"
+    )
+
+
+@cache_app.command("clear")
+def cache_clear(
+    workflow: Optional[str] = typer.Option(None, "--workflow", "-w", help="Only clear entries for this workflow"),
+):
+    """Delete cached results."""
+    ctx = click.get_current_context()
+    cfg = ctx.obj["cfg"]
+    removed = _require_cache().clear(workflow)
+    console = get_console(cfg.ansi.force)
+    console.print(Panel.fit(Text(f"Removed {removed} cached result(s)", style="green")))
+
+
+@app.command()
+def serve(
+    reload: bool = typer.Option(True, "--reload/--no-reload", help="Re-import workflow modules when their source changes"),
+):
+    """Run a warm daemon that serves `run`/`list`/`tui` over a local socket."""
+    ctx = click.get_current_context()
+    cfg = ctx.obj["cfg"]
+    logger = ctx.obj["logger"]
+    _ensure_discovery(cfg.workflows_module)
+
+    # stdout is left to workflow output; the daemon logs its own start and stop
+    console = get_console(cfg.ansi.force, stderr=True)
+    console.print(Panel.fit(Text(f"Serving '{', '.join(cfg.workflow_modules)}' (Ctrl-C to stop)", style="green")))
+    try:
+        serve_daemon(cfg, logger, config_path=ctx.obj["config_path"], reload=reload)
+    except DaemonError as e:
+        raise typer.Exit(str(e))
+
+
+_BROKER_HELP = "SQLite queue path or tcp://host:port of an `agnocli broker` (overrides queue.broker)"
+
+
+def _open_queue(cfg, broker: Optional[str]):
+    try:
+        return open_queue(broker or cfg.queue.broker, cfg.queue.token)
+    except JobError as e:
+        raise typer.Exit(str(e))
+
+
+@app.command()
+def submit(
+    name: str = typer.Argument(..., help="Workflow name"),
+    arg: List[str] = typer.Option([], "--arg", help="Pass parameter as key=value. Repeatable."),
+    broker: Optional[str] = typer.Option(None, "--broker", help=_BROKER_HELP),
+    retries: Optional[int] = typer.Option(None, "--retries", min=0, help="Extra attempts if the job fails (default: queue.retries)"),
+    wait: bool = typer.Option(False, "--wait", help="Wait for the result and print it"),
+    timeout: Optional[float] = typer.Option(None, "--timeout", min=0, help="With --wait, give up after this many seconds"),
+    markdown: Optional[bool] = typer.Option(None, "--markdown/--plain", help="Render output as markdown or plain"),
+):
+    """Queue a workflow run for `agnocli worker` processes; prints the job id."""
+    ctx = click.get_current_context()
+    cfg = ctx.obj["cfg"]
+    logger = ctx.obj["logger"]
+    queue = _open_queue(cfg, broker)
+    try:
+        job_id = queue.submit(name, _parse_args(arg), cfg.queue.retries if retries is None else retries)
+        logger.info("submitted job %s (%s)", job_id, name)
+        if not wait:
+            typer.echo(job_id)
+            return
+        get_console(stderr=True).print(f"Queued job {job_id}", style="dim", highlight=False)
+        job = wait_for_job(queue, job_id, timeout)
+    except (JobError, TimeoutError) as e:
+        raise typer.Exit(str(e))
+    finally:
+        queue.close()
+    if job.status != "ok":
+        raise typer.Exit(f"Job {job.id} failed after {job.attempts} attempt(s): {job.error}")
+    render_md = markdown if markdown is not None else cfg.markdown.render
+    render_result(get_console(cfg.ansi.force), job.result, render_md, cfg.output)
+
+
+@app.command()
+def worker(
+    broker: Optional[str] = typer.Option(None, "--broker", help=_BROKER_HELP),
+    concurrency: int = typer.Option(4, "--concurrency", "-c", min=1, help="Jobs run at once by this worker"),
+    only: List[str] = typer.Option([], "--only", help="Only claim jobs of this workflow. Repeatable."),
+    drain: bool = typer.Option(False, "--drain", help="Exit once no job is queued or running"),
+):
+    """Pull queued jobs and run them until interrupted."""
+    ctx = click.get_current_context()
+    cfg = ctx.obj["cfg"]
+    logger = ctx.obj["logger"]
+    if cfg.queue.heartbeat >= cfg.queue.lease:
+        raise typer.Exit("queue.heartbeat must be shorter than queue.lease")
+    _ensure_discovery(cfg.workflows_module)
+    queue = _open_queue(cfg, broker)
+    err = get_console(stderr=True)
+    styles = {"ok": "green", "error": "red"}
+
+    def _on_job(job: Job, status: str, error: Optional[str]) -> None:
+        logger.info("job %s (%s) attempt %d: %s%s", job.id, job.workflow, job.attempts, status, f" ({error})" if error else "")
+        detail = f" ({error})" if error else ""
+        err.print(
+            f"[{styles[status]}]{status:>5}[/] {job.id} [dim]{job.workflow}, attempt {job.attempts}/{job.max_attempts}[/]{detail}",
+            highlight=False,
+            soft_wrap=True,
+        )
+
+    err.print(f"Worker {worker_name()} pulling from {queue!r} (Ctrl-C to stop)", style="dim", highlight=False)
+    with WorkflowRuntime(
+        max_workers=concurrency,
+        executor=cfg.runtime.executor,
+        process_workers=cfg.runtime.process_workers,
+        preload=cfg.workflow_modules,
+        default_timeout=cfg.runtime.timeout,
+        default_max_concurrency=cfg.runtime.max_concurrency,
+    ) as runtime:
+        try:
+            counts = run_worker(
+                queue,
+                runtime,
+                concurrency=concurrency,
+                lease=cfg.queue.lease,
+                heartbeat=cfg.queue.heartbeat,
+                retry_delay=cfg.queue.retry_delay,
+                workflows=only or None,
+                drain=drain,
+                on_job=_on_job,
+            )
+        except KeyboardInterrupt:
+            counts = None
+        except JobError as e:
+            raise typer.Exit(str(e))
+        finally:
+            queue.close()
+    if counts is not None:
+        logger.info("worker done: %d ok, %d failed", counts["ok"], counts["error"])
+
+
+@app.command()
+def broker(
+    host: str = typer.Option("127.0.0.1", "--host", help="Interface to listen on (0.0.0.0 for every host)"),
+    port: int = typer.Option(DEFAULT_PORT, "--port", help="TCP port"),
+    db: Optional[str] = typer.Option(None, "--db", help="SQLite queue file (default: queue.broker or <config dir>/jobs.db)"),
+    insecure: bool = typer.Option(False, "--insecure", help="Listen on a non-loopback host without queue.token"),
+):
+    """Serve the job queue over TCP for workers and submitters on other hosts."""
+    ctx = click.get_current_context()
+    cfg = ctx.obj["cfg"]
+    logger = ctx.obj["logger"]
+    path = db or (cfg.queue.broker if cfg.queue.broker and not cfg.queue.broker.startswith("tcp://") else None)
+    queue = open_queue(path)
+    console = get_console(cfg.ansi.force)
+    if not cfg.queue.token and not is_loopback(host):
+        if not insecure:
+            raise typer.Exit(
+                f"Refusing to listen on {host} without queue.token: anyone who can reach the port could run jobs. "
+                "Set queue.token (or AGNOCLI_QUEUE__TOKEN), or pass --insecure."
+            )
+        console.print(Text("Warning: no queue.token set; anyone who can reach this port can queue jobs", style="yellow"))
+    console.print(Panel.fit(Text(f"Broker for {queue.path} on {host}:{port} (Ctrl-C to stop)", style="green")))
+    try:
+        serve_broker(host, port, queue, cfg.queue.token, logger, insecure=insecure)
+    except OSError as e:
+        raise typer.Exit(f"Cannot listen on {host}:{port}: {e}")
+
+
+@app.command()
+def jobs(
+    job_id: Optional[str] = typer.Argument(None, help="Show this job in full"),
+    broker: Optional[str] = typer.Option(None, "--broker", help=_BROKER_HELP),
+    status: Optional[str] = typer.Option(None, "--status", help="queued, running, ok or error"),
+    limit: int = typer.Option(20, "--limit", "-n", min=1, help="Number of jobs to show"),
+):
+    """List queued and finished jobs, or show one job."""
+    ctx = click.get_current_context()
+    cfg = ctx.obj["cfg"]
+    if status is not None and status not in JOB_STATUSES:
+        raise typer.BadParameter(f"--status must be one of {', '.join(JOB_STATUSES)}")
+    queue = _open_queue(cfg, broker)
+    console = get_console(cfg.ansi.force)
+    try:
+        if job_id:
+            job = queue.get(job_id)
+            if job is None:
+                raise typer.Exit(f"Job '{job_id}' not found")
+            console.print_json(data=job_record(job))
+            return
+        rows, counts = queue.list(limit, status), queue.counts()
+    except JobError as e:
+        raise typer.Exit(str(e))
+    finally:
+        queue.close()
+
+    styles = {"queued": "dim", "running": "cyan", "ok": "green", "error": "red"}
+    table = Table(title="Jobs  " + "  ".join(f"{k}: {v}" for k, v in counts.items()))
+    table.add_column("Created", style="dim", no_wrap=True)
+    table.add_column("Id", no_wrap=True)
+    table.add_column("Workflow", style="bold cyan")
+    table.add_column("Status")
+    table.add_column("Attempts", justify="right")
+    table.add_column("Worker", style="dim")
+    table.add_column("Error")
+    for job in rows:
+        table.add_row(
+            datetime.fromtimestamp(job.created).strftime("%Y-%m-%d %H:%M:%S"),
+            job.id,
+            job.workflow,
+            Text(job.status, style=styles[job.status]),
+            f"{job.attempts}/{job.max_attempts}",
+            job.worker or "",
+            Text(job.error or "", overflow="ellipsis", no_wrap=True),
+        )
+    console.print(table)
+
+
+@app.command("ollama-stub")
+def ollama_stub(
+    port: Optional[int] = typer.Option(None, "--port", min=0, help="Port to listen on (default: stub.port)"),
+    host: str = typer.Option("127.0.0.1", "--host", help="Interface to listen on"),
+    mode: Optional[str] = typer.Option(None, "--mode", help="synthetic, record or replay (default: stub.mode)"),
+    cassette: Optional[str] = typer.Option(None, "--cassette", help="Recordings file for record/replay"),
+    ttft: Optional[float] = typer.Option(None, "--ttft", min=0, help="Seconds to the first token"),
+    tps: Optional[float] = typer.Option(None, "--tps", min=0.001, help="Tokens per second after the first"),
+):
+    """Serve an offline Ollama-compatible API with scripted timing, or record/replay a real one."""
+    ctx = click.get_current_context()
+    cfg = ctx.obj["cfg"]
+    logger = ctx.obj["logger"]
+    settings = replace(
+        cfg.stub,
+        **{
+            k: v
+            for k, v in {
+                "mode": mode,
+                "cassette": Path(cassette) if cassette else None,
+                "ttft": ttft,
+                "tokens_per_second": tps,
+            }.items()
+            if v is not None
+        },
+    )
+    try:
+        server = OllamaStub(settings, host, port)
+    except (StubError, OSError) as e:
+        raise typer.Exit(f"Cannot start the Ollama stub: {e}")
+    console = get_console(cfg.ansi.force)
+    if settings.mode == "synthetic":
+        detail = f"ttft {settings.ttft:g}s, {settings.tokens_per_second:g} tokens/s"
+    elif settings.mode == "record":
+        detail = f"recording {settings.upstream} into {settings.cassette}"
     else:
-        render_plain(console, str(result))
+        detail = f"replaying {len(server.cassette)} recordings from {settings.cassette}"
+    console.print(Panel.fit(Text(f"Ollama stub on {server.url}: {detail}", style="green")))
+    console.print(f"Point clients at it with {HOST_ENV}={server.url} (Ctrl-C to stop)", style="dim", highlight=False)
+    logger.info("ollama stub listening on %s (%s)", server.url, settings.mode)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info("ollama stub stopped after %d requests", server.requests)
+
+
+@app.command()
+def completion(
+    shell: str = typer.Argument(..., help="bash, zsh or fish"),
+    prog: str = typer.Option("agnocli", "--prog", help="Name of the executable to complete"),
+):
+    """Print a shell completion script: eval "$(agnocli completion bash)"."""
+    ctx = click.get_current_context()
+    cfg = ctx.obj["cfg"]
+    try:
+        script = completion_script(shell, prog)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+    # Build the index now so the first TAB is as fast as the rest
+    load_index(ctx.obj["config_path"], ",".join(cfg.workflow_modules))
+    sys.stdout.write(script)
+
+
+@app.command()
+def shell(
+    script: str = typer.Option("-", "--script", help="File of TUI commands, or - for stdin"),
+    fail_fast: bool = typer.Option(False, "--fail-fast", help="Stop at the first command that fails"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Bypass the result cache"),
+    refresh: bool = typer.Option(False, "--refresh", help="Re-run and overwrite cached results"),
+):
+    """Run TUI commands from a file or pipe in one process; one JSON result per command."""
+    ctx = click.get_current_context()
+    cfg = ctx.obj["cfg"]
+    logger = ctx.obj["logger"]
+    infos = _workflow_infos(cfg.workflows_module)
+    imported = False
+
+    def _resolve(name: str) -> Optional[Workflow]:
+        # As in the TUI, modules are imported only once something runs
+        nonlocal imported
+        if not imported:
+            _ensure_discovery(cfg.workflows_module)
+            imported = True
+        return get_workflow(name)
+
+    def _emit(record: Dict[str, object]) -> None:
+        sys.stdout.write(format_record(record) + "\n")
+        sys.stdout.flush()
+
+    try:
+        source = sys.stdin if script == "-" else open(script, "r", encoding="utf-8")
+    except OSError as e:
+        raise typer.Exit(f"Cannot read {script}: {e.strerror or e}")
+    menu = WorkflowMenu(get_console(cfg.ansi.force, stderr=True))
+    try:
+        with source:
+            counts = run_script(
+                source,
+                infos,
+                menu,
+                _resolve,
+                get_runtime(),
+                _emit,
+                fail_fast=fail_fast,
+                cache_mode=_cache_mode(no_cache, refresh),
+            )
+    except KeyboardInterrupt:
+        raise typer.Exit(130)
+    logger.info("shell script %s: %d ok, %d failed", script, counts["ok"], counts["error"])
+    if counts["error"]:
+        raise typer.Exit(1)
 
 
 @app.command()
-def tui():
+def tui(
+    reload: bool = typer.Option(True, "--reload/--no-reload", help="Pick up edits to workflow modules without restarting"),
+):
     """Interactive terminal mode (no windows/tabs)."""
     ctx = click.get_current_context()
     cfg = ctx.obj["cfg"]
-    _ensure_discovery(cfg.workflows_module)
+    infos = _workflow_infos(cfg.workflows_module)
 
     console = get_console(cfg.ansi.force)
+    imported = False
+    # Until something runs nothing is imported, so edits only refresh the manifest
+    reloader = HotReloader(cfg.workflow_modules, import_new=False) if reload else None
+    infos_version = 0
 
-    def _list(wfs: List[Workflow]) -> List[Workflow]:
-        return sorted(wfs, key=lambda wf: wf.name.lower())
+    def _resolve(name: str) -> Optional[Workflow]:
+        # The menu comes from the manifest; import the module only once something runs
+        nonlocal imported
+        if not imported:
+            _ensure_discovery(cfg.workflows_module)
+            imported = True
+            if reloader is not None:
+                reloader.import_new = True
+        return get_workflow(name)
 
-    def _prompt_for_params(wf: Workflow, provided: Dict[str, str]) -> Dict[str, object]:
-        try:
-            sig = inspect.signature(wf.func)
-        except (ValueError, TypeError):
-            return provided
+    def _refresh() -> None:
+        nonlocal infos, infos_version
+        if reloader is not None and reloader.poll():
+            infos = _workflow_infos(cfg.workflows_module)
+            infos_version += 1
+
+    def _prompt_for_params(wf: WorkflowInfo, provided: Dict[str, str]) -> Dict[str, object]:
         params: Dict[str, object] = dict(provided)
-        for name, param in sig.parameters.items():
-            if param.kind in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD):
+        for param in wf.params:
+            name = param.name
+            if param.kind in ("VAR_POSITIONAL", "VAR_KEYWORD"):
                 continue
             if name in params:
                 continue
-            default = param.default
-            has_default = default is not inspect._empty
             while True:
-                if has_default:
-                    prompt = f"{name} [default={default}]: "
+                if param.has_default:
+                    prompt = f"{name} [default={param.display_default()}]: "
                 else:
                     prompt = f"{name}: "
                 try:
@@ -174,10 +1136,18 @@ def tui():
                     console.print("Exiting.")
                     raise typer.Exit()
                 if value:
+                    convert = converter_for(param.annotation) if param.annotation else None
+                    try:
+                        if convert is not None:
+                            convert(value)
+                    except (ValueError, TypeError) as e:
+                        # Re-ask now rather than failing after every param is entered
+                        console.print(Text(f"Invalid value for '{name}': {e}", style="red"))
+                        continue
                     params[name] = value
                     break
-                if has_default:
-                    params[name] = default
+                if param.has_default:
+                    # Leave it out so the workflow applies its own default
                     break
                 console.print(Text(f"'{name}' is required", style="red"))
         return params
@@ -191,115 +1161,122 @@ def tui():
         except (EOFError, KeyboardInterrupt):
             pass
 
-    def draw_menu():
-        console.clear()
-        console.rule("AgnoCLI")
-        table = Table(show_header=True, header_style="bold magenta")
-        table.add_column("#", style="dim", width=4)
-        table.add_column("Name", style="cyan")
-        table.add_column("Description")
-        wfs = _list(list_workflows().values())
-        for i, wf in enumerate(wfs, start=1):
-            table.add_row(str(i), wf.name, wf.description or "")
-        console.print(table)
-        console.print(
-            "Commands: [number]=run, s [number]=switch, r [name]=run, <name> [key=value ...]=run with args, q=quit"
-        )
-        return wfs
+    def _execute(info: WorkflowInfo, params: Dict[str, object]):
+        # A hung or unwanted run must not end the session
+        try:
+            _run_and_show(info, params)
+        except KeyboardInterrupt:
+            console.print()
+            console.print(Text(f"Cancelled '{info.name}'", style="yellow"))
+            _pause()
+        except WorkflowTimeout as e:
+            console.print(Text(str(e), style="red"))
+            _pause()
+
+    def _run_and_show(info: WorkflowInfo, params: Dict[str, object]):
+        render_md = _should_render_markdown(None, info, cfg.markdown.render)
+        stream = RemoteStream(console, None, cfg.markdown.render, settings=cfg.output)
+        try:
+            remote = _run_via_daemon(cfg, info.name, params, on_stream=stream, config_path=ctx.obj["config_path"])
+        except DaemonError as e:
+            console.print(Text(str(e), style="red"))
+            _pause()
+            return
+        finally:
+            stream.close()
+        if remote is not None:
+            if remote.streamed:
+                _pause()
+                return
+            result = remote.result
+        else:
+            wf = _resolve(info.name)
+            if not wf:
+                console.print(Text(_not_found(info.name), style="red"))
+                return
+            try:
+                params = wf.coerce_params(params)
+            except ParamError as e:
+                console.print(Text(f"Invalid params for '{info.name}': {e}", style="red"))
+                _pause()
+                return
+            if wf.streaming:
+                render_stream(console, get_runtime().stream(wf, params), render_md, cfg.output)
+                _pause()
+                return
+            result = run_workflow(wf, params)
+        render_result(console, result, render_md, cfg.output)
+        _pause()
+
+    menu = WorkflowMenu(console)
 
     while True:
-        wfs = draw_menu()
+        _refresh()
+        menu.set_workflows(infos, (infos_version, registry_version()))
+        menu.draw()
         try:
             cmd = input(": ").strip()
         except (EOFError, KeyboardInterrupt):
             console.print("Exiting.")
             break
-        if not cmd:
+        # Catch edits made while the prompt was waiting
+        _refresh()
+        command = parse_command(cmd, infos)
+        if command is None:
             continue
-        if cmd.lower() in {"q", "quit", "exit"}:
+        if command.action == "quit":
             break
-        # Unified command parsing: support both ": image ..." and "image ..."
-        # If the line starts with a colon, strip it, then fall through to the same parser.
-        if cmd.startswith(":"):
-            cmd = cmd[1:].lstrip()
-        # Try to interpret the command as: <workflow_name> [key=value ...]
-        try:
-            parts = shlex.split(cmd)
-        except ValueError as e:
-            # If it wasn't a colon form and also not parsable, we'll handle other commands below
-            parts = []
-        if parts:
-            name = parts[0]
-            wf = get_workflow(name)
-            if wf:
-                kv_items = [p for p in parts[1:] if "=" in p]
-                try:
-                    params = _parse_args(kv_items)
-                except typer.BadParameter as e:
-                    console.print(Text(str(e), style="red"))
-                    continue
-                # Filter unknown params based on workflow signature to avoid TypeError
-                try:
-                    sig = inspect.signature(wf.func)
-                    valid_keys = set(sig.parameters.keys())
-                    filtered_params = {k: v for k, v in params.items() if k in valid_keys}
-                    unknown = set(params.keys()) - valid_keys
-                    if unknown:
-                        console.print(Text(f"Ignoring unknown params: {', '.join(sorted(unknown))}", style="yellow"))
-                except (ValueError, TypeError):
-                    # If signature unavailable, pass as-is
-                    filtered_params = params
-                filtered_params = _prompt_for_params(wf, filtered_params)
-                result = run_workflow(wf, filtered_params)
-                render_md = _should_render_markdown(None, wf, cfg.markdown.render)
-                if isinstance(result, str) and render_md:
-                    render_markdown(console, result)
-                else:
-                    render_plain(console, str(result))
+        if command.action == "next":
+            menu.next_page()
+            continue
+        if command.action == "prev":
+            menu.prev_page()
+            continue
+        if command.action == "search":
+            previous = menu.query
+            if not menu.search(command.query):
+                console.print(Text(f"No workflows match '{command.query.strip()}'", style="yellow"))
+                menu.search(previous)
                 _pause()
+            continue
+        if command.action == "invalid":
+            console.print(Text(command.error, style="red"))
+            continue
+        if command.action == "run":
+            info = infos.get(command.name)
+            if not info:
+                console.print(Text(f"Workflow '{command.name}' not found", style="red"))
                 continue
-        if cmd[0].isdigit():
+            # Filter unknown params based on workflow signature to avoid TypeError
+            if any(p.kind == "VAR_KEYWORD" for p in info.params):
+                filtered_params = command.params
+            else:
+                valid_keys = {p.name for p in info.params}
+                filtered_params = {k: v for k, v in command.params.items() if k in valid_keys}
+                unknown = set(command.params) - valid_keys
+                if unknown:
+                    console.print(Text(f"Ignoring unknown params: {', '.join(sorted(unknown))}", style="yellow"))
+            filtered_params = _prompt_for_params(info, filtered_params)
+            _execute(info, filtered_params)
+            continue
+        if command.action == "select":
             try:
-                idx = int(cmd) - 1
-                wf = wfs[idx]
+                info = menu.item(command.number)
             except Exception:
                 console.print(Text("Invalid selection", style="red"))
                 continue
-            params = _prompt_for_params(wf, {})
-            result = run_workflow(wf, params)
-            render_md = _should_render_markdown(None, wf, cfg.markdown.render)
-            if isinstance(result, str) and render_md:
-                render_markdown(console, result)
-            else:
-                render_plain(console, str(result))
-            _pause()
+            params = _prompt_for_params(info, {})
+            _execute(info, params)
             continue
-        if cmd.startswith("s "):
+        if command.action == "switch":
             try:
-                idx = int(cmd.split()[1]) - 1
-                wf = wfs[idx]
+                wf = menu.item(command.number)
                 set_current_workflow(wf.name)
                 console.print(Text(f"Switched to {wf.name}", style="green"))
             except Exception:
                 console.print(Text("Invalid switch command", style="red"))
             continue
-        if cmd.startswith("r "):
-            name = cmd.split(maxsplit=1)[1]
-            wf = get_workflow(name)
-            if not wf:
-                console.print(Text(f"Workflow '{name}' not found", style="red"))
-                continue
-            params = _prompt_for_params(wf, {})
-            result = run_workflow(wf, params)
-            render_md = _should_render_markdown(None, wf, cfg.markdown.render)
-            if isinstance(result, str) and render_md:
-                render_markdown(console, result)
-            else:
-                render_plain(console, str(result))
-            _pause()
-            continue
         console.print(Text("Unknown command", style="yellow"))
 
-
 def run():
     app()
@@ -0,0 +1,398 @@
+from __future__ import annotations
+
+# Imported on every TAB press: only the standard library at module level.
+# The index is rebuilt (importing config, manifest and the CLI) only when stale.
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+# Set by the shell scripts below to the shell's name
+COMPLETE_ENV = "_AGNOCLI_COMPLETE"
+SHELLS = ("bash", "zsh", "fish")
+INDEX_VERSION = 1
+_INDEX_ENTRIES = 16
+
+# Arguments and options whose values are workflow names
+_WORKFLOW_PARAMS = ("name", "workflow", "only")
+_ARG_OPTION = "--arg"
+_BOOL_VALUES = ("true", "false")
+
+
+def _config_dir() -> str:
+    # Same location as config._platform_config_dir(), without importing yaml
+    if sys.platform.startswith("win"):
+        return os.path.join(os.getenv("APPDATA", os.path.join(os.path.expanduser("~"), "AppData", "Roaming")), "agnocli")
+    if sys.platform == "darwin":
+        return os.path.join(os.path.expanduser("~"), "Library", "Application Support", "agnocli")
+    return os.path.join(os.path.expanduser("~"), ".config", "agnocli")
+
+
+INDEX_FILE = os.path.join(_config_dir(), "completion.json")
+
+
+def _stamp(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _fresh(stamps: List[List[Any]]) -> bool:
+    return all(_stamp(path) == stamp for path, stamp in stamps)
+
+
+def _read_index() -> Dict[str, Any]:
+    try:
+        with open(INDEX_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return {}
+    if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+        return {}
+    return data
+
+
+def _write_index(index: Dict[str, Any]) -> None:
+    for section in ("configs", "workflows"):
+        entries = index.get(section, {})
+        while len(entries) > _INDEX_ENTRIES:
+            entries.pop(next(iter(entries)))
+    try:
+        os.makedirs(os.path.dirname(INDEX_FILE), exist_ok=True)
+        tmp = f"{INDEX_FILE}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp, INDEX_FILE)
+    except Exception:
+        # The index is an optimization only
+        pass
+
+
+def _cli_source() -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli.py")
+
+
+def _describe_params(params: List[Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    import click
+
+    options, arguments = [], []
+    for p in params:
+        if isinstance(p, click.Option):
+            if p.hidden:
+                continue
+            options.append(
+                {
+                    "names": [*p.opts, *p.secondary_opts],
+                    "help": (p.help or "").split("\n")[0],
+                    "value": not p.is_flag and not p.count,
+                    "workflow": p.name in _WORKFLOW_PARAMS,
+                }
+            )
+        elif isinstance(p, click.Argument):
+            arguments.append({"name": p.name, "workflow": p.name in _WORKFLOW_PARAMS})
+    return options, arguments
+
+
+def _describe_command(cmd: Any) -> Dict[str, Any]:
+    import click
+
+    options, arguments = _describe_params(cmd.params)
+    entry: Dict[str, Any] = {
+        "help": (cmd.short_help or cmd.help or "").strip().split("\n")[0],
+        "options": options,
+        "arguments": arguments,
+    }
+    if isinstance(cmd, click.Group):
+        entry["commands"] = {name: _describe_command(sub) for name, sub in cmd.commands.items() if not sub.hidden}
+    return entry
+
+
+def _build_commands() -> Dict[str, Any]:
+    import typer
+
+    from .cli import app
+
+    return {"stamp": _stamp(_cli_source()), **_describe_command(typer.main.get_command(app))}
+
+
+def _config_key(config_path: Optional[str]) -> str:
+    # What load_config reads: the candidate files and AGNOCLI_* variables
+    candidates = [os.path.join(_config_dir(), "agnocli.yaml"), os.path.join(os.getcwd(), "agnocli.yaml")]
+    if config_path:
+        candidates.append(os.path.abspath(config_path))
+    env = sorted((k, v) for k, v in os.environ.items() if k.startswith("AGNOCLI_"))
+    return json.dumps([[[p, _stamp(p)] for p in candidates], env])
+
+
+def _build_config(config_path: Optional[str]) -> Dict[str, Any]:
+    from .config import ConfigError, load_config, module_list
+
+    try:
+        cfg = load_config(config_path)
+    except ConfigError:
+        return {"modules": [], "default_workflow": None, "store": None}
+    return {
+        "modules": module_list(cfg.workflows_module),
+        "default_workflow": cfg.default_workflow,
+        "store": str(cfg.history.path) if cfg.history.path else None,
+    }
+
+
+def _build_workflows(modules: List[str]) -> Dict[str, Any]:
+    """Statically scanned workflows of `modules`; modules that need importing are left out."""
+    from dataclasses import asdict
+
+    from .discovery import expand_modules
+    from .manifest import load_manifests
+
+    sources, _ = expand_modules(modules)
+    infos, _ = load_manifests(sources)
+    paths = {str(p) for p in sources.values() if p is not None}
+    # Directories too, so a module added to a package is picked up
+    paths |= {os.path.dirname(p) for p in paths}
+    return {
+        "stamps": [[p, _stamp(p)] for p in sorted(paths)],
+        "workflows": {name: asdict(info) for name, info in sorted(infos.items())},
+    }
+
+
+def load_index(config_path: Optional[str] = None, module: Optional[str] = None) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """(commands, config, workflows) from the index, rebuilding stale parts."""
+    index = _read_index()
+    dirty = False
+    commands = index.get("commands")
+    if not commands or commands.get("stamp") != _stamp(_cli_source()):
+        commands = index["commands"] = _build_commands()
+        dirty = True
+
+    configs = index.setdefault("configs", {})
+    key = _config_key(config_path)
+    config = configs.get(key)
+    if config is None:
+        config = configs[key] = _build_config(config_path)
+        dirty = True
+
+    modules = [m.strip() for m in module.split(",") if m.strip()] if module else config["modules"]
+    workflows_index = index.setdefault("workflows", {})
+    modules_key = ",".join(modules)
+    workflows = workflows_index.get(modules_key)
+    if modules and (workflows is None or not _fresh(workflows["stamps"])):
+        workflows = workflows_index[modules_key] = _build_workflows(modules)
+        dirty = True
+
+    if dirty:
+        index["version"] = INDEX_VERSION
+        _write_index(index)
+    return commands, config, (workflows or {}).get("workflows", {})
+
+
+def _current_workflow(store: Optional[str]) -> Optional[str]:
+    # Read straight from the store, as state.get_current_workflow would
+    import sqlite3
+
+    path = store or os.path.join(_config_dir(), "agnocli.db")
+    if not os.path.exists(path):
+        return None
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=0.1)
+        try:
+            row = conn.execute("SELECT value FROM state WHERE key = 'current_workflow'").fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+def _find_option(options: List[Dict[str, Any]], word: str) -> Optional[Dict[str, Any]]:
+    return next((o for o in options if word in o["names"]), None)
+
+
+def _param_help(param: Dict[str, Any]) -> str:
+    kind = f"{param['annotation']}, " if param.get("annotation") else ""
+    if not param.get("has_default"):
+        return f"{kind}required"
+    return f"{kind}default: {param.get('default')}"
+
+
+def _arg_candidates(current: str, workflow: Optional[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """Completions of a `--arg` value: `key=` names, then `key=<default>` once the key is typed."""
+    if workflow is None:
+        return []
+    params = [p for p in workflow.get("params", []) if p["kind"] not in ("VAR_POSITIONAL", "VAR_KEYWORD")]
+    key, eq, _ = current.partition("=")
+    if not eq:
+        return [(f"{p['name']}=", _param_help(p)) for p in params]
+    param = next((p for p in params if p["name"] == key), None)
+    if param is None:
+        return []
+    values: Dict[str, str] = {}
+    if param.get("has_default") and param.get("default") is not None:
+        import ast
+
+        try:
+            value = ast.literal_eval(param["default"])
+            default = str(value).lower() if isinstance(value, bool) else str(value)
+        except (ValueError, SyntaxError):
+            default = param["default"]
+        values[f"{key}={default}"] = "default"
+    if param.get("annotation") == "bool":
+        for value in _BOOL_VALUES:
+            values.setdefault(f"{key}={value}", "")
+    return list(values.items())
+
+
+def candidates(words: List[str]) -> List[Tuple[str, str]]:
+    """(value, description) completions for the last of `words`, the word being typed."""
+    *before, current = words or [""]
+    module = config_path = None
+    i = 0
+    # Global options that change what is completed
+    while i < len(before) and before[i].startswith("-"):
+        opt, eq, value = before[i].partition("=")
+        if opt in ("--module", "--config") and not eq and i + 1 < len(before):
+            value = before[i + 1]
+            i += 1
+        if opt == "--module":
+            module = value
+        elif opt == "--config":
+            config_path = value
+        i += 1
+    if i == len(before) and before and before[-1] in ("--module", "--config"):
+        return []
+
+    commands, config, workflows = load_index(config_path, module)
+
+    def _workflow_names() -> List[Tuple[str, str]]:
+        return [(name, info.get("description", "")) for name, info in workflows.items()]
+
+    def _options(entry: Dict[str, Any]) -> List[Tuple[str, str]]:
+        return [(name, o["help"]) for o in entry["options"] for name in o["names"] if name.startswith("--")]
+
+    group = commands
+    # Descend into the command (and subcommand) being typed
+    while i < len(before) and "commands" in group and before[i] in group["commands"]:
+        group = group["commands"][before[i]]
+        i += 1
+    if "commands" in group:
+        if current.startswith("-"):
+            return [c for c in _options(group) if c[0].startswith(current)]
+        return [(name, sub["help"]) for name, sub in group["commands"].items() if name.startswith(current)]
+
+    positionals: List[str] = []
+    while i < len(before):
+        word = before[i]
+        opt = _find_option(group["options"], word.partition("=")[0]) if word.startswith("-") else None
+        if opt is not None and opt["value"] and "=" not in word:
+            i += 1
+        elif not word.startswith("-"):
+            positionals.append(word)
+        i += 1
+
+    expecting = _find_option(group["options"], before[-1]) if before and before[-1].startswith("-") else None
+    prefix = ""
+    if expecting is None and current.startswith("--") and "=" in current:
+        # --option=value
+        expecting = _find_option(group["options"], current.partition("=")[0])
+        if expecting is not None:
+            prefix, current = current.partition("=")[0] + "=", current.partition("=")[2]
+    if expecting is not None and expecting["value"]:
+        if _ARG_OPTION in expecting["names"]:
+            name = next(
+                (p for p, a in zip(positionals, group["arguments"]) if a["workflow"]),
+                None,
+            ) or _current_workflow(config.get("store")) or config.get("default_workflow")
+            found = _arg_candidates(current, workflows.get(name) if name else None)
+        elif expecting["workflow"]:
+            found = _workflow_names()
+        else:
+            # Paths and free text: the shell's own completion takes over
+            return []
+        return [(prefix + value, desc) for value, desc in found if value.startswith(current)]
+    if current.startswith("-"):
+        return [c for c in _options(group) if c[0].startswith(current)]
+    arguments = group["arguments"]
+    if len(positionals) < len(arguments) and arguments[len(positionals)]["workflow"]:
+        return [c for c in _workflow_names() if c[0].startswith(current)]
+    return []
+
+
+def complete(shell: str, words: List[str]) -> int:
+    """Print completions for `words` in the format the shell script expects."""
+    try:
+        found = candidates(words)
+    except Exception:
+        # A broken index or config must never break the shell
+        return 1
+    lines = []
+    for value, desc in found:
+        desc = " ".join(desc.split())
+        lines.append(value if shell == "bash" or not desc else f"{value}\t{desc}")
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+    return 0
+
+
+_BASH = r"""_{func}_complete() {{
+    local line=${{COMP_LINE:0:COMP_POINT}} cur IFS=$'\n'
+    local -a words
+    IFS=$' \t' read -ra words <<< "$line"
+    [[ $line == *[[:space:]] ]] && words+=("")
+    cur=${{words[${{#words[@]}}-1]}}
+    COMPREPLY=($({env}=bash "${{words[0]}}" "${{words[@]:1}}" 2>/dev/null))
+    # bash completes only the part after the last '=' of key=value words
+    if [[ $cur == *=* && $COMP_WORDBREAKS == *=* ]]; then
+        COMPREPLY=("${{COMPREPLY[@]#"${{cur%=*}}="}}")
+    fi
+    if [[ ${{#COMPREPLY[@]}} -eq 1 && ${{COMPREPLY[0]}} == *= ]]; then
+        compopt -o nospace
+    fi
+}}
+complete -o default -F _{func}_complete {prog}
+"""
+
+_ZSH = r"""#compdef {prog}
+_{func}_complete() {{
+    local -a lines values descs open_values open_descs
+    local line value desc
+    lines=("${{(@f)$({env}=zsh "${{words[1]}}" "${{(@)words[2,$CURRENT]}}" 2>/dev/null)}}")
+    for line in $lines; do
+        value=${{line%%$'\t'*}}
+        [[ -z $value ]] && continue
+        desc=$value
+        [[ $line == *$'\t'* ]] && desc="$value  -- ${{line#*$'\t'}}"
+        if [[ $value == *= ]]; then
+            open_values+=("$value"); open_descs+=("$desc")
+        else
+            values+=("$value"); descs+=("$desc")
+        fi
+    done
+    (( ${{#values}} )) && compadd -l -d descs -- $values
+    (( ${{#open_values}} )) && compadd -S '' -l -d open_descs -- $open_values
+    (( ${{#values}} + ${{#open_values}} )) || _files
+}}
+compdef _{func}_complete {prog}
+"""
+
+_FISH = r"""function __{func}_complete
+    set -l tokens (commandline -opc) (commandline -ct)
+    set -l found (env {env}=fish $tokens 2>/dev/null)
+    if test (count $found) -gt 0
+        printf '%s\n' $found
+    else
+        __fish_complete_path (commandline -ct)
+    end
+end
+complete -c {prog} -f -a '(__{func}_complete)'
+"""
+
+_SCRIPTS = {"bash": _BASH, "zsh": _ZSH, "fish": _FISH}
+
+
+def completion_script(shell: str, prog: str = "agnocli") -> str:
+    if shell not in _SCRIPTS:
+        raise ValueError(f"shell must be one of {', '.join(SHELLS)}, not {shell!r}")
+    func = "".join(c if c.isalnum() else "_" for c in prog)
+    return _SCRIPTS[shell].format(prog=prog, func=func, env=COMPLETE_ENV)
@@ -1,15 +1,28 @@
 from __future__ import annotations
 
+import difflib
+import json
 import os
 import sys
-from dataclasses import dataclass, field
+import typing
+from dataclasses import dataclass, field, fields
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import yaml
 
 
 DEFAULT_CONFIG_FILE = "agnocli.yaml"
+ENV_PREFIX = "AGNOCLI_"
+LOG_FORMATS = ("text", "json")
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+
+# libyaml's loader is several times faster than the pure-Python one
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class ConfigError(ValueError):
+    """A config file or AGNOCLI_* variable is unreadable or invalid."""
 
 
 def _platform_config_dir() -> Path:
@@ -37,48 +50,511 @@ class AnsiSettings:
     force: bool = False
 
 
+@dataclass
+class OutputSettings:
+    # Results larger than this (in characters/bytes) skip Rich and are written raw
+    large_threshold: int = 1024 * 1024
+    # Page large results on a terminal through $PAGER instead of printing them
+    pager: bool = False
+    chunk_size: int = 64 * 1024
+
+
+@dataclass
+class RuntimeSettings:
+    # None lets the executor pick its own default size
+    max_workers: Optional[int] = None
+    # Default for sync workflows that don't set register_workflow(executor=...)
+    executor: str = "thread"
+    process_workers: Optional[int] = None
+    # Defaults for workflows that don't set register_workflow(timeout=..., max_concurrency=...)
+    timeout: Optional[float] = None
+    max_concurrency: Optional[int] = None
+
+
+@dataclass
+class HistorySettings:
+    # Record one row per run in the SQLite store
+    enabled: bool = True
+    # Defaults to <config dir>/agnocli.db
+    path: Optional[Path] = None
+
+
+@dataclass
+class MetricsSettings:
+    # Append one JSON line of phase timings per invocation
+    jsonl: Optional[Path] = None
+    # node_exporter textfile to update with the latest timings
+    prometheus: Optional[Path] = None
+
+
+@dataclass
+class LoggingSettings:
+    level: str = "INFO"
+    # "text" or "json" (one object per line, tagged with the run id)
+    format: str = "text"
+    max_bytes: int = 10 * 1024 * 1024
+    backups: int = 5
+    # Also echo records at or above this level to stderr; None keeps the terminal quiet
+    console_level: Optional[str] = None
+    # Fraction of DEBUG records kept, for chatty workflows
+    debug_sample_rate: float = 1.0
+
+
+@dataclass
+class CacheSettings:
+    enabled: bool = True
+    # Defaults to <config dir>/cache/results
+    dir: Optional[Path] = None
+    max_entries: int = 1000
+    max_bytes: int = 100 * 1024 * 1024
+    memory_entries: int = 256
+    # Seconds; None keeps entries until evicted (per-workflow ttl overrides)
+    ttl: Optional[float] = None
+
+
+@dataclass
+class QueueSettings:
+    # Path of the SQLite job queue (default: <config dir>/jobs.db) or tcp://host:port of an `agnocli broker`
+    broker: Optional[str] = None
+    # Shared secret required by the broker when set
+    token: Optional[str] = None
+    # Seconds a claimed job stays leased without a heartbeat before it is re-queued
+    lease: float = 30.0
+    heartbeat: float = 10.0
+    # Extra attempts for a failing job, with exponential backoff from retry_delay seconds
+    retries: int = 2
+    retry_delay: float = 5.0
+
+
+@dataclass
+class StubSettings:
+    # Not Ollama's own 11434, so a real server can run alongside (0 picks a free port)
+    port: int = 11435
+    # Name reported by /api/tags; requests may use any model name
+    model: str = "stub"
+    # synthetic: canned or default replies; record: proxy `upstream` into `cassette`; replay: serve `cassette`
+    mode: str = "synthetic"
+    # Seconds before the response starts, then until the first token
+    latency: float = 0.0
+    ttft: float = 0.2
+    tokens_per_second: float = 50.0
+    # Reply for prompts no `responses` rule matches (default: a line quoting the prompt)
+    response: Optional[str] = None
+    # YAML list of {match: <regex>, response: <text>}
+    responses: Optional[Path] = None
+    cassette: Optional[Path] = None
+    upstream: str = "http://127.0.0.1:11434"
+    upstream_timeout: float = 300.0
+    # Pace replays as recorded, or with latency/ttft/tokens_per_second
+    replay_timing: str = "recorded"
+
+
+def module_list(value: Any) -> List[str]:
+    """Normalize workflows_module: a name, a comma-separated string or a list."""
+    if not value:
+        return []
+    items = value.split(",") if isinstance(value, str) else value
+    return [str(m).strip() for m in items if str(m).strip()]
+
+
 @dataclass
 class Config:
-    workflows_module: Optional[str] = None
+    # A module or package name, or a list of them
+    workflows_module: Optional[Union[str, List[str]]] = None
     log_dir: Path = field(default_factory=_platform_log_dir)
     default_workflow: Optional[str] = None
     markdown: MarkdownSettings = field(default_factory=MarkdownSettings)
     ansi: AnsiSettings = field(default_factory=AnsiSettings)
+    output: OutputSettings = field(default_factory=OutputSettings)
+    runtime: RuntimeSettings = field(default_factory=RuntimeSettings)
+    cache: CacheSettings = field(default_factory=CacheSettings)
+    history: HistorySettings = field(default_factory=HistorySettings)
+    metrics: MetricsSettings = field(default_factory=MetricsSettings)
+    logging: LoggingSettings = field(default_factory=LoggingSettings)
+    queue: QueueSettings = field(default_factory=QueueSettings)
+    stub: StubSettings = field(default_factory=StubSettings)
+
+    @property
+    def workflow_modules(self) -> List[str]:
+        return module_list(self.workflows_module)
 
     @staticmethod
     def from_dict(d: Dict[str, Any]) -> "Config":
         markdown = d.get("markdown", {}) or {}
         ansi = d.get("ansi", {}) or {}
+        output = d.get("output", {}) or {}
+        runtime = d.get("runtime", {}) or {}
+        cache = d.get("cache", {}) or {}
+        history = d.get("history", {}) or {}
+        metrics = d.get("metrics", {}) or {}
+        log = d.get("logging", {}) or {}
+        jobs = d.get("queue", {}) or {}
+        stub = d.get("stub", {}) or {}
         return Config(
             workflows_module=d.get("workflows_module"),
             log_dir=Path(d.get("log_dir")) if d.get("log_dir") else _platform_log_dir(),
             default_workflow=d.get("default_workflow"),
             markdown=MarkdownSettings(render=bool(markdown.get("render", True))),
             ansi=AnsiSettings(force=bool(ansi.get("force", False))),
+            output=OutputSettings(
+                large_threshold=int(output.get("large_threshold", 1024 * 1024)),
+                pager=bool(output.get("pager", False)),
+                chunk_size=int(output.get("chunk_size", 64 * 1024)),
+            ),
+            runtime=RuntimeSettings(
+                max_workers=int(runtime["max_workers"]) if runtime.get("max_workers") else None,
+                executor=str(runtime.get("executor", "thread")),
+                process_workers=int(runtime["process_workers"]) if runtime.get("process_workers") else None,
+                timeout=float(runtime["timeout"]) if runtime.get("timeout") else None,
+                max_concurrency=int(runtime["max_concurrency"]) if runtime.get("max_concurrency") else None,
+            ),
+            cache=CacheSettings(
+                enabled=bool(cache.get("enabled", True)),
+                dir=Path(cache["dir"]) if cache.get("dir") else None,
+                max_entries=int(cache.get("max_entries", 1000)),
+                max_bytes=int(cache.get("max_bytes", 100 * 1024 * 1024)),
+                memory_entries=int(cache.get("memory_entries", 256)),
+                ttl=float(cache["ttl"]) if cache.get("ttl") else None,
+            ),
+            history=HistorySettings(
+                enabled=bool(history.get("enabled", True)),
+                path=Path(history["path"]) if history.get("path") else None,
+            ),
+            metrics=MetricsSettings(
+                jsonl=Path(metrics["jsonl"]) if metrics.get("jsonl") else None,
+                prometheus=Path(metrics["prometheus"]) if metrics.get("prometheus") else None,
+            ),
+            logging=LoggingSettings(
+                level=str(log.get("level", "INFO")).upper(),
+                format=str(log.get("format", "text")),
+                max_bytes=int(log.get("max_bytes", 10 * 1024 * 1024)),
+                backups=int(log.get("backups", 5)),
+                console_level=str(log["console_level"]).upper() if log.get("console_level") else None,
+                debug_sample_rate=float(log.get("debug_sample_rate", 1.0)),
+            ),
+            queue=QueueSettings(
+                broker=str(jobs["broker"]) if jobs.get("broker") else None,
+                token=str(jobs["token"]) if jobs.get("token") else None,
+                lease=float(jobs.get("lease", 30.0)),
+                heartbeat=float(jobs.get("heartbeat", 10.0)),
+                retries=int(jobs.get("retries", 2)),
+                retry_delay=float(jobs.get("retry_delay", 5.0)),
+            ),
+            stub=StubSettings(
+                port=int(stub.get("port", 11435)),
+                model=str(stub.get("model", "stub")),
+                mode=str(stub.get("mode", "synthetic")),
+                latency=float(stub.get("latency", 0.0)),
+                ttft=float(stub.get("ttft", 0.2)),
+                tokens_per_second=float(stub.get("tokens_per_second", 50.0)),
+                response=str(stub["response"]) if stub.get("response") else None,
+                responses=Path(stub["responses"]) if stub.get("responses") else None,
+                cassette=Path(stub["cassette"]) if stub.get("cassette") else None,
+                upstream=str(stub.get("upstream", "http://127.0.0.1:11434")),
+                upstream_timeout=float(stub.get("upstream_timeout", 300.0)),
+                replay_timing=str(stub.get("replay_timing", "recorded")),
+            ),
         )
 
 
-def load_config(explicit_path: Optional[str] = None) -> Config:
-    candidates = []
+_SECTIONS = {
+    "markdown": MarkdownSettings,
+    "ansi": AnsiSettings,
+    "output": OutputSettings,
+    "runtime": RuntimeSettings,
+    "cache": CacheSettings,
+    "history": HistorySettings,
+    "metrics": MetricsSettings,
+    "logging": LoggingSettings,
+    "queue": QueueSettings,
+    "stub": StubSettings,
+}
+_TOP_LEVEL = ("workflows_module", "log_dir", "default_workflow")
+_CHOICES = {
+    "runtime.executor": ("thread", "process"),
+    "logging.format": LOG_FORMATS,
+    "logging.level": LOG_LEVELS,
+    "logging.console_level": LOG_LEVELS,
+    "stub.mode": ("synthetic", "record", "replay"),
+    "stub.replay_timing": ("recorded", "configured"),
+}
+# Compared case-insensitively
+_CASELESS = {"logging.level", "logging.console_level"}
+_RANGES = {
+    "output.large_threshold": (0, None),
+    "output.chunk_size": (1, None),
+    "runtime.max_workers": (1, None),
+    "runtime.process_workers": (1, None),
+    "runtime.timeout": (0, None),
+    "runtime.max_concurrency": (1, None),
+    "cache.max_entries": (0, None),
+    "cache.max_bytes": (0, None),
+    "cache.memory_entries": (0, None),
+    "cache.ttl": (0, None),
+    "logging.max_bytes": (0, None),
+    "logging.backups": (0, None),
+    "logging.debug_sample_rate": (0, 1),
+    "queue.lease": (1, None),
+    "queue.heartbeat": (0.1, None),
+    "queue.retries": (0, None),
+    "queue.retry_delay": (0, None),
+    "stub.port": (0, 65535),
+    "stub.latency": (0, None),
+    "stub.ttft": (0, None),
+    "stub.tokens_per_second": (0.001, None),
+    "stub.upstream_timeout": (0, None),
+}
+
+
+def _hints(cls: type) -> Dict[str, Any]:
+    hints = typing.get_type_hints(cls)
+    return {f.name: hints[f.name] for f in fields(cls)}
+
+
+_SCHEMA: Dict[str, Dict[str, Any]] = {name: _hints(cls) for name, cls in _SECTIONS.items()}
+_SCHEMA[""] = {name: hint for name, hint in _hints(Config).items() if name in _TOP_LEVEL}
+
+
+def _expected(value: Any, hint: Any) -> Optional[str]:
+    """None if value fits the annotation, else a description of what was expected."""
+    if typing.get_origin(hint) is Union:
+        options = typing.get_args(hint)
+        if value is None and type(None) in options:
+            return None
+        wanted = [_expected(value, h) for h in options if h is not type(None)]
+        return None if None in wanted else " or ".join(wanted)
+    if typing.get_origin(hint) in (list, List):
+        if isinstance(value, list) and all(isinstance(v, str) for v in value):
+            return None
+        return "a list of strings"
+    if hint is bool:
+        return None if isinstance(value, bool) else "true or false"
+    if hint is int:
+        return None if isinstance(value, int) and not isinstance(value, bool) else "an integer"
+    if hint is float:
+        return None if isinstance(value, (int, float)) and not isinstance(value, bool) else "a number"
+    return None if isinstance(value, str) else "a string"
+
+
+def _check_value(key: str, value: Any, hint: Any) -> Optional[str]:
+    expected = _expected(value, hint)
+    if expected:
+        return f"expected {expected}, got {value!r}"
+    if value is None:
+        return None
+    choices = _CHOICES.get(key)
+    caseless = key in _CASELESS
+    if choices and (str(value).upper() if caseless else value) not in choices:
+        return f"must be one of {', '.join(choices)}, got {value!r}"
+    low, high = _RANGES.get(key, (None, None))
+    if low is not None and value < low:
+        return f"must be at least {low}, got {value!r}"
+    if high is not None and value > high:
+        return f"must be at most {high}, got {value!r}"
+    return None
+
+
+def _unknown(key: str, known: List[str]) -> str:
+    close = difflib.get_close_matches(key.rpartition(".")[2], known, n=1)
+    return "unknown setting" + (f" (did you mean '{close[0]}'?)" if close else "")
+
+
+def validate(data: Dict[str, Any], origins: Optional[Dict[str, str]] = None) -> None:
+    """Check merged config data against the settings dataclasses; raise one ConfigError listing every problem."""
+    origins = origins or {}
+    problems: List[Tuple[str, str]] = []
+    top_known = [*_TOP_LEVEL, *_SECTIONS]
+    for key, value in data.items():
+        if key in _SECTIONS:
+            if value is None:
+                continue
+            if not isinstance(value, dict):
+                problems.append((key, f"expected a mapping of {key} settings, got {value!r}"))
+                continue
+            schema = _SCHEMA[key]
+            for sub, sub_value in value.items():
+                path = f"{key}.{sub}"
+                if sub not in schema:
+                    problems.append((path, _unknown(path, list(schema))))
+                    continue
+                problem = _check_value(path, sub_value, schema[sub])
+                if problem:
+                    problems.append((path, problem))
+        elif key in _SCHEMA[""]:
+            problem = _check_value(key, value, _SCHEMA[""][key])
+            if problem:
+                problems.append((key, problem))
+        else:
+            problems.append((key, _unknown(key, top_known)))
+    if problems:
+        lines = []
+        for path, problem in problems:
+            origin = origins.get(path) or origins.get(path.partition(".")[0]) or "config"
+            lines.append(f"{origin}: {path}: {problem}")
+        raise ConfigError("\n".join(lines))
+
+
+def _merge(data: Dict[str, Any], layer: Dict[str, Any], source: str, origins: Dict[str, str], prefix: str = "") -> None:
+    """Merge layer into data in place; sections merge key by key, later layers win."""
+    for key, value in layer.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict) and isinstance(data.get(key), dict):
+            _merge(data[key], value, source, origins, f"{path}.")
+        else:
+            data[key] = dict(value) if isinstance(value, dict) else value
+            origins[path] = source
+            if isinstance(value, dict):
+                origins.update({f"{path}.{k}": source for k in value})
+
+
+def _config_candidates(explicit_path: Optional[str] = None) -> List[Path]:
+    """Config files in merge order: platform config dir, then CWD, then --config."""
+    candidates = [_platform_config_dir() / DEFAULT_CONFIG_FILE, Path.cwd() / DEFAULT_CONFIG_FILE]
     if explicit_path:
-        candidates.append(Path(explicit_path))
-    # CWD
-    candidates.append(Path.cwd() / DEFAULT_CONFIG_FILE)
-    # Platform config
-    candidates.append(_platform_config_dir() / DEFAULT_CONFIG_FILE)
+        candidates.append(Path(explicit_path).absolute())
+    return candidates
 
-    data: Dict[str, Any] = {}
-    for p in candidates:
-        try:
-            if p.exists():
-                with p.open("r", encoding="utf-8") as f:
-                    loaded = yaml.safe_load(f) or {}
-                    if isinstance(loaded, dict):
-                        data.update(loaded)
-                        break
-        except Exception:
-            # Ignore malformed config; continue to defaults
+
+def config_files(explicit_path: Optional[str] = None) -> List[Path]:
+    """The config files load_config merges, lowest precedence first."""
+    found: List[Path] = []
+    for p in _config_candidates(explicit_path):
+        if p.is_file():
+            resolved = p.resolve()
+            if resolved in found:
+                # Moves to its highest-precedence position
+                found.remove(resolved)
+            found.append(resolved)
+    return found
+
+
+def env_overrides(environ: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """AGNOCLI_* variables that name a setting: AGNOCLI_LOG_DIR, AGNOCLI_RUNTIME__MAX_WORKERS, ...
+
+    Other AGNOCLI_* variables (e.g. AGNOCLI_NO_DAEMON) are not config and are left out.
+    """
+    environ = os.environ if environ is None else environ
+    out = {}
+    for var, raw in environ.items():
+        if not var.startswith(ENV_PREFIX):
             continue
+        name = var[len(ENV_PREFIX):].lower()
+        if name.partition("__")[0] in _SECTIONS or name in _SCHEMA[""]:
+            out[var] = raw
+    return dict(sorted(out.items()))
+
+
+def _env_layer(overrides: Dict[str, str]) -> Dict[str, Any]:
+    layer: Dict[str, Any] = {}
+    for var, raw in overrides.items():
+        name = var[len(ENV_PREFIX):].lower()
+        try:
+            # YAML scalars, so "false", "8" and "[a, b]" mean what they do in the file
+            value = yaml.load(raw, Loader=_YAML_LOADER) if raw.strip() else None
+        except yaml.YAMLError:
+            value = raw
+        section, _, key = name.partition("__")
+        if key:
+            layer.setdefault(section, {})[key] = value
+        else:
+            layer[name] = value
+    return layer
+
+
+def config_identity(explicit_path: Optional[str] = None) -> str:
+    """Identifies the effective configuration: the files merged and any environment overrides."""
+    return json.dumps({"files": [str(p) for p in config_files(explicit_path)], "env": env_overrides()})
+
+
+CONFIG_CACHE_FILE = _platform_config_dir() / "config-cache.json"
+_CONFIG_CACHE_VERSION = 1
+_CONFIG_CACHE_ENTRIES = 16
+
+
+def _stamp(path: Path) -> Optional[List[int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _read_config_cache() -> Dict[str, Any]:
+    try:
+        data = json.loads(CONFIG_CACHE_FILE.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    if not isinstance(data, dict) or data.get("version") != _CONFIG_CACHE_VERSION:
+        return {}
+    return data
+
+
+def _write_config_cache(cache: Dict[str, Any]) -> None:
+    try:
+        text = json.dumps(cache)
+        CONFIG_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = CONFIG_CACHE_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, CONFIG_CACHE_FILE)
+    except Exception:
+        # Cache is an optimization only (and YAML dates are not JSON)
+        pass
+
+
+def _parse_file(path: Path) -> Dict[str, Any]:
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            loaded = yaml.load(f, Loader=_YAML_LOADER)
+    except OSError as e:
+        raise ConfigError(f"{path}: cannot read config: {e.strerror or e}") from e
+    except yaml.YAMLError as e:
+        raise ConfigError(f"{path}: invalid YAML: {e}") from e
+    if loaded is None:
+        return {}
+    if not isinstance(loaded, dict):
+        raise ConfigError(f"{path}: expected a mapping of settings at the top level, got {type(loaded).__name__}")
+    return loaded
+
+
+def _load_files(explicit_path: Optional[str]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Merged file layers and the file each key came from, cached on the files' mtimes."""
+    candidates = _config_candidates(explicit_path)
+    key = json.dumps([[str(p), _stamp(p)] for p in candidates])
+    cache = _read_config_cache()
+    entries = cache.get("entries", {})
+    hit = entries.get(key)
+    if hit is not None:
+        return hit["data"], hit["origins"]
+
+    data: Dict[str, Any] = {}
+    origins: Dict[str, str] = {}
+    for path in config_files(explicit_path):
+        _merge(data, _parse_file(path), str(path), origins)
+    entries.pop(key, None)
+    entries[key] = {"data": data, "origins": origins}
+    while len(entries) > _CONFIG_CACHE_ENTRIES:
+        entries.pop(next(iter(entries)))
+    _write_config_cache({"version": _CONFIG_CACHE_VERSION, "entries": entries})
+    return data, origins
+
+
+def load_config(explicit_path: Optional[str] = None) -> Config:
+    """Merge config layers: platform config dir < CWD < --config file < AGNOCLI_* variables.
+
+    Raises ConfigError for unreadable files and invalid settings.
+    """
+    if explicit_path and not Path(explicit_path).is_file():
+        raise ConfigError(f"{explicit_path}: config file not found")
+    data, origins = _load_files(explicit_path)
+    overrides = env_overrides()
+    if overrides:
+        env_origins: Dict[str, str] = {}
+        _merge(data, _env_layer(overrides), "environment", env_origins)
+        for path, source in env_origins.items():
+            section, _, key = path.partition(".")
+            var = ENV_PREFIX + (f"{section}__{key}" if key else section).upper()
+            origins[path] = var if var in overrides else source
+    validate(data, origins)
 
     cfg = Config.from_dict(data)
     # Ensure directories exist
@@ -0,0 +1,517 @@
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import os
+import socket
+import socketserver
+import sys
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .config import _platform_config_dir, config_identity, module_list
+from .output import install_stdout_router, routed_stdout
+
+
+SOCKET_PATH = _platform_config_dir() / "agnocli.sock"
+# Set to any non-empty value to always run in-process
+DISABLE_ENV = "AGNOCLI_NO_DAEMON"
+CONNECT_TIMEOUT = 0.5
+
+class DaemonError(Exception):
+    def __init__(self, message: str, code: str = "failed"):
+        super().__init__(message)
+        self.code = code
+
+
+def daemon_supported() -> bool:
+    return hasattr(socket, "AF_UNIX")
+
+
+def _send(conn: socket.socket, msg: Dict[str, Any]) -> None:
+    conn.sendall(json.dumps(msg).encode("utf-8") + b"\n")
+
+
+# --- client -----------------------------------------------------------------
+
+
+@dataclass
+class RemoteResult:
+    result: Any
+    render_markdown: Optional[bool]
+    config_render: bool
+    force_ansi: bool
+    # True when the output was already delivered as stream chunks
+    streamed: bool = False
+    # The daemon's OutputSettings, as a dict
+    output: Dict[str, Any] = field(default_factory=dict)
+
+
+class RemoteStream:
+    """Feeds streamed chunks from the daemon into a StreamRenderer."""
+
+    def __init__(
+        self,
+        console,
+        markdown_option: Optional[bool],
+        config_render: Optional[bool] = None,
+        settings=None,
+        file=None,
+    ):
+        self.console = console
+        self.markdown_option = markdown_option
+        self.config_render = config_render
+        self.settings = settings
+        self.file = file
+        self._renderer = None
+
+    def __call__(self, data: str, wf_render: Optional[bool], config_render: bool) -> None:
+        if self._renderer is None:
+            from .markdown import StreamRenderer
+
+            if self.markdown_option is not None:
+                render_md = self.markdown_option
+            elif wf_render is not None:
+                render_md = wf_render
+            else:
+                render_md = config_render if self.config_render is None else self.config_render
+            kwargs = {"large_threshold": self.settings.large_threshold} if self.settings else {}
+            self._renderer = StreamRenderer(self.console, render_md, file=self.file, **kwargs)
+        self._renderer.write(data)
+
+    def close(self) -> None:
+        if self._renderer is not None:
+            self._renderer.close()
+            self._renderer = None
+
+
+class DaemonClient:
+    def __init__(self, sock: socket.socket):
+        self._sock = sock
+        self._file = sock.makefile("rb")
+
+    @staticmethod
+    def connect(path: Optional[Path] = None) -> Optional["DaemonClient"]:
+        """Connect to a running daemon, or return None if there is none."""
+        if os.environ.get(DISABLE_ENV) or not daemon_supported():
+            return None
+        path = path or SOCKET_PATH
+        if not path.exists():
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(str(path))
+        except OSError:
+            sock.close()
+            return None
+        # Workflows may run for a long time once the request is accepted
+        sock.settimeout(None)
+        return DaemonClient(sock)
+
+    def close(self) -> None:
+        try:
+            self._file.close()
+        finally:
+            self._sock.close()
+
+    def request(self, msg: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        _send(self._sock, msg)
+        received = False
+        for line in self._file:
+            reply = json.loads(line)
+            received = True
+            yield reply
+            if reply.get("type") in ("result", "error"):
+                return
+        # Only safe to retry in-process if the daemon never started answering
+        raise DaemonError("daemon closed the connection", code="failed" if received else "disconnected")
+
+    def _base(self, op: str, module: Optional[str], config_path: Optional[str]) -> Dict[str, Any]:
+        return {
+            "op": op,
+            "modules": effective_modules(module, config_path),
+            # Files merged plus AGNOCLI_* overrides; must match what the daemon loaded
+            "config": config_identity(config_path),
+        }
+
+    def list(self, module: Optional[str] = None, config_path: Optional[str] = None) -> List[Dict[str, Any]]:
+        for reply in self.request(self._base("list", module, config_path)):
+            if reply["type"] == "error":
+                raise DaemonError(reply["error"], reply.get("code", "failed"))
+            if reply["type"] == "result":
+                return reply["workflows"]
+        return []
+
+    def run(
+        self,
+        name: Optional[str],
+        params: Dict[str, Any],
+        module: Optional[str] = None,
+        config_path: Optional[str] = None,
+        on_chunk: Optional[Callable[[str], None]] = None,
+        cache_mode: str = "use",
+        on_stream: Optional[Callable[[str, Optional[bool], bool], None]] = None,
+    ) -> RemoteResult:
+        """Run a workflow on the daemon.
+
+        on_chunk receives anything the workflow printed; on_stream receives chunks
+        yielded by streaming workflows, with the render preferences.
+        """
+        msg = self._base("run", module, config_path)
+        msg.update({"name": name, "params": params, "cache_mode": cache_mode})
+        for reply in self.request(msg):
+            kind = reply["type"]
+            if kind == "chunk" and reply.get("stream"):
+                if on_stream is not None:
+                    on_stream(reply["data"], reply.get("render_markdown"), reply.get("config_render", True))
+            elif kind == "chunk":
+                if on_chunk is not None:
+                    on_chunk(reply["data"])
+            elif kind == "error":
+                raise DaemonError(reply["error"], reply.get("code", "failed"))
+            elif kind == "result":
+                result = reply["result"]
+                if reply.get("encoding") == "base64":
+                    result = base64.b64decode(result)
+                return RemoteResult(
+                    result=result,
+                    output=reply.get("output") or {},
+                    render_markdown=reply.get("render_markdown"),
+                    config_render=reply.get("config_render", True),
+                    force_ansi=reply.get("force_ansi", False),
+                    streamed=bool(reply.get("streamed")),
+                )
+        raise DaemonError("no result from daemon", code="disconnected")
+
+
+def effective_modules(module: Optional[str], config_path: Optional[str] = None) -> Optional[List[str]]:
+    """The workflow modules a local run would load: --module, else the merged config layers.
+
+    None when the config cannot be loaded; the daemon then declines and the CLI reports the error.
+    """
+    if module:
+        return module_list(module)
+    from .config import ConfigError, load_config
+
+    try:
+        return load_config(config_path).workflow_modules
+    except ConfigError:
+        return None
+
+
+def _write_stdout(data: str) -> None:
+    sys.stdout.write(data)
+    sys.stdout.flush()
+
+
+def forward_argv(argv: List[str]) -> Optional[int]:
+    """Thin client used by `python -m agnocli` before the full CLI is imported.
+
+    Handles the plain `list` and `run` forms when a daemon is running. Returns the
+    exit code, or None to fall back to the in-process CLI.
+    """
+    module: Optional[str] = None
+    config_path: Optional[str] = None
+    args = list(argv)
+    # Global options that the daemon can honour
+    while args and args[0].startswith("--"):
+        opt = args.pop(0)
+        key, eq, value = opt.partition("=")
+        if key not in ("--module", "--config"):
+            return None
+        if not eq:
+            if not args:
+                return None
+            value = args.pop(0)
+        if key == "--module":
+            module = value
+        else:
+            config_path = value
+    if not args or args[0] not in ("list", "run"):
+        return None
+    command = args.pop(0)
+
+    name: Optional[str] = None
+    params: Dict[str, str] = {}
+    markdown: Optional[bool] = None
+    if command == "run":
+        while args:
+            item = args.pop(0)
+            if item == "--markdown":
+                markdown = True
+            elif item == "--plain":
+                markdown = False
+            elif item == "--arg" or item.startswith("--arg="):
+                kv = item[len("--arg="):] if item.startswith("--arg=") else (args.pop(0) if args else "")
+                if "=" not in kv:
+                    return None
+                k, v = kv.split("=", 1)
+                params[k] = v
+            elif not item.startswith("-") and name is None:
+                name = item
+            else:
+                return None
+    elif args:
+        return None
+
+    client = DaemonClient.connect()
+    if client is None:
+        return None
+    stream: Optional[RemoteStream] = None
+    try:
+        if command == "list":
+            workflows = client.list(module, config_path)
+            from .markdown import get_console
+            from rich.table import Table
+            from rich.text import Text
+
+            table = Table(title="Available Workflows")
+            table.add_column("Name", style="bold cyan")
+            table.add_column("Description")
+            for wf in workflows:
+                if wf.get("error"):
+                    table.add_row(Text(wf["name"], style="red"), Text(f"import failed: {wf['error']}", style="red"))
+                else:
+                    table.add_row(wf["name"], wf.get("description") or "")
+            get_console().print(table)
+            return 0
+
+        from .markdown import get_console
+
+        stream = RemoteStream(get_console(), markdown)
+        remote = client.run(name, params, module, config_path, on_chunk=_write_stdout, on_stream=stream)
+    except DaemonError as e:
+        if e.code in ("mismatch", "disconnected"):
+            return None
+        sys.stderr.write(f"{e}\n")
+        return 1
+    finally:
+        if stream is not None:
+            stream.close()
+        client.close()
+    if remote.streamed:
+        return 0
+
+    from .config import OutputSettings
+    from .markdown import get_console, render_result
+
+    console = get_console(remote.force_ansi)
+    if markdown is not None:
+        render_md = markdown
+    elif remote.render_markdown is not None:
+        render_md = remote.render_markdown
+    else:
+        render_md = remote.config_render
+    render_result(console, remote.result, render_md, OutputSettings(**remote.output))
+    return 0
+
+
+# --- server -----------------------------------------------------------------
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "_DaemonServer"
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            msg = json.loads(line)
+        except ValueError:
+            self._reply({"type": "error", "error": "malformed request", "code": "bad_request"})
+            return
+        try:
+            self.server.dispatch(msg, self._reply)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def setup(self) -> None:
+        super().setup()
+        self._lock = threading.Lock()
+
+    def _reply(self, msg: Dict[str, Any]) -> None:
+        # Workflow output may arrive from executor threads
+        with self._lock:
+            _send(self.connection, msg)
+
+
+class _DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: Path, cfg, logger: logging.Logger, config_path: Optional[str] = None):
+        self.cfg = cfg
+        self.logger = logger
+        self.config_identity = config_identity(config_path)
+        super().__init__(str(path), _Handler)
+
+    def _check_scope(self, msg: Dict[str, Any]) -> Optional[str]:
+        modules = msg.get("modules")
+        if modules != self.cfg.workflow_modules:
+            return f"daemon serves '{','.join(self.cfg.workflow_modules)}', not '{','.join(modules or [])}'"
+        # Even with a matching module, cache/timeout/output settings come from the config
+        if msg.get("config") != self.config_identity:
+            return "daemon was started with a different configuration"
+        return None
+
+    def dispatch(self, msg: Dict[str, Any], reply: Callable[[Dict[str, Any]], None]) -> None:
+        from .discovery import failed_modules
+        from .params import ParamError
+        from .runner import WorkflowTimeout, get_runtime, run_workflow
+        from .state import get_current_workflow
+        from .workflows import get_workflow, list_workflows
+
+        op = msg.get("op")
+        if op == "ping":
+            reply({"type": "result", "pid": os.getpid(), "module": self.cfg.workflows_module})
+            return
+
+        mismatch = self._check_scope(msg)
+        if mismatch:
+            reply({"type": "error", "error": mismatch, "code": "mismatch"})
+            return
+
+        if op == "list":
+            workflows = [{"name": n, "description": wf.description} for n, wf in list_workflows().items()]
+            workflows += [{"name": st.name, "description": "", "error": st.error} for st in failed_modules()]
+            reply({"type": "result", "workflows": workflows})
+            return
+
+        if op != "run":
+            reply({"type": "error", "error": f"unknown op '{op}'", "code": "bad_request"})
+            return
+
+        selected = msg.get("name") or get_current_workflow() or self.cfg.default_workflow
+        if not selected:
+            reply({"type": "error", "error": "No workflow selected. Provide a name or set current/default.", "code": "not_found"})
+            return
+        wf = get_workflow(selected)
+        if not wf:
+            reply({"type": "error", "error": f"Workflow '{selected}' not found", "code": "not_found"})
+            return
+
+        def _chunk(data: str) -> None:
+            reply({"type": "chunk", "data": data})
+
+        try:
+            params = wf.coerce_params(msg.get("params") or {})
+        except ParamError as e:
+            reply({"type": "error", "error": f"Invalid params for '{selected}': {e}", "code": "bad_params"})
+            return
+
+        self.logger.info("daemon run %s", selected)
+        cache_mode = msg.get("cache_mode") or "use"
+        try:
+            # What the workflow prints goes to this client, not the daemon's stdout
+            with routed_stdout(_chunk):
+                if wf.streaming:
+                    for part in get_runtime().stream(wf, params, cache_mode):
+                        reply(
+                            {
+                                "type": "chunk",
+                                "stream": True,
+                                "data": str(part),
+                                "render_markdown": wf.render_markdown,
+                                "config_render": self.cfg.markdown.render,
+                            }
+                        )
+                    result = ""
+                else:
+                    result = run_workflow(wf, params, cache_mode=cache_mode)
+        except (BrokenPipeError, ConnectionResetError):
+            raise
+        except WorkflowTimeout as e:
+            self.logger.warning("daemon run %s: %s", selected, e)
+            reply({"type": "error", "error": str(e), "code": "timeout"})
+            return
+        except Exception as e:
+            self.logger.exception("daemon run %s failed", selected)
+            reply({"type": "error", "error": f"Workflow '{selected}' failed: {e!r}", "code": "failed"})
+            return
+
+        encoding = None
+        if isinstance(result, (bytes, bytearray, memoryview)):
+            result, encoding = base64.b64encode(result).decode("ascii"), "base64"
+        elif not isinstance(result, str):
+            result = str(result)
+        reply(
+            {
+                "type": "result",
+                "result": result,
+                "encoding": encoding,
+                "output": asdict(self.cfg.output),
+                "render_markdown": wf.render_markdown,
+                "config_render": self.cfg.markdown.render,
+                "force_ansi": self.cfg.ansi.force,
+                "streamed": wf.streaming,
+            }
+        )
+
+
+def ping(path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    client = DaemonClient.connect(path)
+    if client is None:
+        return None
+    try:
+        for reply in client.request({"op": "ping"}):
+            return reply
+    except (OSError, DaemonError, ValueError):
+        return None
+    finally:
+        client.close()
+    return None
+
+
+def serve(
+    cfg,
+    logger: logging.Logger,
+    config_path: Optional[str] = None,
+    path: Optional[Path] = None,
+    reload: bool = True,
+) -> None:
+    """Serve requests on a Unix socket until interrupted.
+
+    With `reload`, edited workflow modules are re-imported while serving.
+    """
+    if not daemon_supported():
+        raise DaemonError("Unix sockets are not supported on this platform", code="unsupported")
+    path = path or SOCKET_PATH
+    if path.exists():
+        if ping(path) is not None:
+            raise DaemonError(f"A daemon is already listening on {path}", code="running")
+        # Stale socket from a daemon that did not shut down cleanly
+        path.unlink()
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    install_stdout_router()
+    # Create the socket owner-only; chmod after bind() would leave a window open to other users
+    old_umask = os.umask(0o177)
+    try:
+        server = _DaemonServer(path, cfg, logger, config_path)
+    finally:
+        os.umask(old_umask)
+    logger.info("daemon listening on %s (pid %s)", path, os.getpid())
+    reloader = None
+    if reload:
+        from .reload import HotReloader
+        from .runner import get_runtime
+
+        # Process workers hold the old code; replace them after a reload
+        reloader = HotReloader(cfg.workflow_modules, on_change=lambda _: get_runtime().recycle_process_pool()).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if reloader is not None:
+            reloader.stop()
+        server.server_close()
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        logger.info("daemon stopped")
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import logging
+import os
+import pkgutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+_logger = logging.getLogger("agnocli")
+
+# Importing these runs a program rather than defining workflows
+_SKIP_SUBMODULES = {"__main__"}
+
+_STATUS: Dict[str, "ModuleStatus"] = {}
+_STATUS_LOCK = threading.Lock()
+
+
+@dataclass
+class ModuleStatus:
+    name: str
+    ok: bool
+    seconds: float = 0.0
+    error: Optional[str] = None
+    workflows: List[str] = field(default_factory=list)
+
+
+def _walk_package(prefix: str, locations: Iterable[str], found: Dict[str, Optional[Path]]) -> None:
+    # Walk the filesystem instead of pkgutil.walk_packages, which imports every subpackage
+    for info in pkgutil.iter_modules(list(locations)):
+        if info.name in _SKIP_SUBMODULES:
+            continue
+        name = f"{prefix}.{info.name}"
+        base = getattr(info.module_finder, "path", None)
+        if info.ispkg:
+            sub = os.path.join(base, info.name) if base else None
+            init = Path(sub, "__init__.py") if sub else None
+            found[name] = init if init is not None and init.is_file() else None
+            if sub:
+                _walk_package(name, [sub], found)
+        else:
+            source = Path(base, f"{info.name}.py") if base else None
+            found[name] = source if source is not None and source.is_file() else None
+
+
+def expand_modules(specs: Iterable[str]) -> Tuple[Dict[str, Optional[Path]], Dict[str, str]]:
+    """Resolve module and package names to every module to load, without importing them.
+
+    Packages are expanded recursively into their submodules. Returns
+    {module: source path or None} and {spec: error} for names that cannot be found.
+    """
+    found: Dict[str, Optional[Path]] = {}
+    errors: Dict[str, str] = {}
+    for spec_name in specs:
+        try:
+            spec = importlib.util.find_spec(spec_name)
+        except Exception as e:
+            # A parent package failed to import, or the name is malformed
+            errors[spec_name] = f"{type(e).__name__}: {e}"
+            continue
+        if spec is None:
+            errors[spec_name] = f"ModuleNotFoundError: No module named '{spec_name}'"
+            continue
+        origin = Path(spec.origin) if spec.has_location and spec.origin else None
+        found[spec_name] = origin
+        if spec.submodule_search_locations:
+            _walk_package(spec_name, spec.submodule_search_locations, found)
+    return found, errors
+
+
+def _import_one(name: str) -> ModuleStatus:
+    start = time.perf_counter()
+    try:
+        importlib.import_module(name)
+    except (Exception, SystemExit) as e:
+        return ModuleStatus(name, ok=False, seconds=time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
+    return ModuleStatus(name, ok=True, seconds=time.perf_counter() - start)
+
+
+def import_modules(names: Iterable[str], max_workers: int = 8) -> List[ModuleStatus]:
+    """Import modules concurrently; a failing module is reported, never raised."""
+    from .workflows import list_workflows
+
+    names = list(names)
+    importlib.invalidate_caches()
+    if len(names) <= 1:
+        statuses = [_import_one(n) for n in names]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(names)), thread_name_prefix="agnocli-import") as pool:
+            statuses = list(pool.map(_import_one, names))
+
+    by_module: Dict[str, List[str]] = {}
+    for wf_name, wf in list_workflows().items():
+        by_module.setdefault(getattr(wf.func, "__module__", ""), []).append(wf_name)
+    with _STATUS_LOCK:
+        for status in statuses:
+            status.workflows = sorted(by_module.get(status.name, []))
+            _STATUS[status.name] = status
+    for status in statuses:
+        if status.ok:
+            _logger.debug("imported %s in %.1f ms (%d workflows)", status.name, status.seconds * 1000, len(status.workflows))
+        else:
+            _logger.warning("could not import workflows module %s: %s", status.name, status.error)
+    return statuses
+
+
+def discover_modules(specs: Iterable[str], max_workers: int = 8) -> List[ModuleStatus]:
+    """Expand `specs` and import everything found; returns one status per module."""
+    found, errors = expand_modules(specs)
+    statuses = import_modules(found, max_workers=max_workers)
+    return statuses + record_failures(errors)
+
+
+def record_failures(errors: Dict[str, str]) -> List[ModuleStatus]:
+    """Record modules that could not even be located (see expand_modules)."""
+    statuses = [ModuleStatus(name, ok=False, error=error) for name, error in errors.items()]
+    with _STATUS_LOCK:
+        for status in statuses:
+            _STATUS[status.name] = status
+    for status in statuses:
+        _logger.warning("could not import workflows module %s: %s", status.name, status.error)
+    return statuses
+
+
+def reload_module(name: str) -> ModuleStatus:
+    """Re-import one module into a fresh module object and swap its workflows in.
+
+    Other modules (agno, tools, sibling workflow modules) are not re-imported.
+    Old functions keep their old globals, so in-flight runs are unaffected. On
+    failure the previous workflows stay registered.
+    """
+    from .workflows import replace_module_workflows, staged_registrations
+
+    start = time.perf_counter()
+    old = sys.modules.get(name)
+    try:
+        importlib.invalidate_caches()
+        spec = importlib.util.find_spec(name) if old is None else old.__spec__
+        if spec is None:
+            raise ModuleNotFoundError(f"No module named '{name}'")
+        module = importlib.util.module_from_spec(spec)
+        with staged_registrations() as staged:
+            sys.modules[name] = module
+            try:
+                if spec.origin and spec.origin.endswith(".py"):
+                    # Compile from source: a .pyc written in the same second could be stale
+                    source = Path(spec.origin).read_bytes()
+                    exec(compile(source, spec.origin, "exec"), module.__dict__)
+                else:
+                    spec.loader.exec_module(module)
+            except BaseException:
+                if old is not None:
+                    sys.modules[name] = old
+                else:
+                    sys.modules.pop(name, None)
+                raise
+        parent_name, _, child = name.rpartition(".")
+        if parent_name and parent_name in sys.modules:
+            setattr(sys.modules[parent_name], child, module)
+    except (Exception, SystemExit) as e:
+        status = ModuleStatus(name, ok=False, seconds=time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
+        if old is not None:
+            # Keep serving the last good version
+            status.workflows = _STATUS.get(name, status).workflows
+        _logger.warning("could not reload %s: %s", name, status.error)
+    else:
+        replace_module_workflows(name, staged)
+        status = ModuleStatus(name, ok=True, seconds=time.perf_counter() - start, workflows=sorted(staged))
+        _logger.info("reloaded %s in %.1f ms (%d workflows)", name, status.seconds * 1000, len(staged))
+    with _STATUS_LOCK:
+        _STATUS[name] = status
+    return status
+
+
+def forget_module(name: str) -> None:
+    """Drop the workflows of a module whose source file was removed."""
+    from .workflows import replace_module_workflows
+
+    replace_module_workflows(name, {})
+    with _STATUS_LOCK:
+        _STATUS.pop(name, None)
+
+
+def module_statuses() -> Dict[str, ModuleStatus]:
+    with _STATUS_LOCK:
+        return dict(_STATUS)
+
+
+def failed_modules() -> List[ModuleStatus]:
+    with _STATUS_LOCK:
+        return [s for s in _STATUS.values() if not s.ok]
@@ -0,0 +1,405 @@
+from __future__ import annotations
+
+import concurrent.futures
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import _platform_config_dir
+from .output import jsonable
+from .params import ParamError
+from .runner import WorkflowRuntime
+from .workflows import get_workflow
+
+_logger = logging.getLogger("agnocli")
+
+JOBS_FILE = _platform_config_dir() / "jobs.db"
+
+JOB_STATUSES = ("queued", "running", "ok", "error")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    workflow TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    created REAL NOT NULL,
+    available REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    worker TEXT,
+    lease TEXT,
+    lease_until REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, available);
+CREATE INDEX IF NOT EXISTS jobs_lease ON jobs (status, lease_until);
+CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created);
+"""
+
+
+class JobError(RuntimeError):
+    """The job queue or broker could not be reached or rejected a request."""
+
+
+@dataclass
+class Job:
+    id: str
+    workflow: str
+    params: Dict[str, Any]
+    status: str
+    attempts: int
+    max_attempts: int
+    created: float
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    worker: Optional[str] = None
+    # Identifies one claim; a worker whose lease expired can no longer report on the job
+    lease: Optional[str] = None
+    result: Any = None
+    error: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("ok", "error")
+
+
+_COLUMNS = "id, workflow, params, status, attempts, max_attempts, created, started, finished, worker, lease, result, error"
+
+
+def _job(row: Tuple[Any, ...]) -> Job:
+    job = Job(*row)
+    job.params = json.loads(job.params)
+    job.result = json.loads(job.result) if job.result is not None else None
+    return job
+
+
+class JobQueue:
+    """Jobs in a WAL-mode SQLite file, shared by workers on this machine.
+
+    A claimed job carries a lease that its worker renews with heartbeats; jobs
+    whose lease runs out are handed to the next worker that asks.
+    """
+
+    def __init__(self, path: Optional[Path] = None, timeout: float = 30.0):
+        self.path = Path(path) if path else JOBS_FILE
+        self.timeout = timeout
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=self.timeout, isolation_level=None)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.timeout * 1000)}")
+        with self._init_lock:
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode = WAL")
+                conn.executescript(_SCHEMA)
+                self._initialized = True
+        conn.execute("PRAGMA synchronous = NORMAL")
+        self._local.conn = conn
+        return conn
+
+    def __repr__(self) -> str:
+        return str(self.path)
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def submit(self, workflow: str, params: Dict[str, Any], retries: int = 0) -> str:
+        job_id = uuid.uuid4().hex[:16]
+        now = time.time()
+        self.connect().execute(
+            "INSERT INTO jobs (id, workflow, params, status, max_attempts, created, available) VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+            (job_id, workflow, json.dumps(params, default=str), retries + 1, now, now),
+        )
+        return job_id
+
+    def claim(self, worker: str, lease: float, workflows: Optional[List[str]] = None) -> Optional[Job]:
+        """Lease the oldest runnable job (optionally only of `workflows`) to `worker`."""
+        conn = self.connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._expire(conn, now)
+            query = f"SELECT {_COLUMNS} FROM jobs WHERE status = 'queued' AND available <= ?"
+            args: List[Any] = [now]
+            if workflows:
+                query += f" AND workflow IN ({', '.join('?' * len(workflows))})"
+                args += workflows
+            row = conn.execute(query + " ORDER BY available, created LIMIT 1", args).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            job = _job(row)
+            job.lease = uuid.uuid4().hex
+            job.status, job.worker, job.attempts, job.started = "running", worker, job.attempts + 1, now
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, lease = ?, lease_until = ?, attempts = ?, started = ? WHERE id = ?",
+                (worker, job.lease, now + lease, job.attempts, now, job.id),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return job
+
+    def _expire(self, conn: sqlite3.Connection, now: float) -> None:
+        # Jobs of workers that stopped heartbeating go back in the queue, unless out of attempts
+        conn.execute(
+            "UPDATE jobs SET status = 'error', finished = ?, lease = NULL, error = 'worker ' || worker || ' stopped responding' "
+            "WHERE status = 'running' AND lease_until < ? AND attempts >= max_attempts",
+            (now, now),
+        )
+        conn.execute(
+            "UPDATE jobs SET status = 'queued', lease = NULL, available = ? WHERE status = 'running' AND lease_until < ?",
+            (now, now),
+        )
+
+    def heartbeat(self, leases: List[str], lease: float) -> List[str]:
+        """Extend these leases; returns the ones that were lost (expired and reclaimed)."""
+        conn = self.connect()
+        until = time.time() + lease
+        lost = []
+        for lease_id in leases:
+            cur = conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE lease = ? AND status = 'running'", (until, lease_id)
+            )
+            if cur.rowcount == 0:
+                lost.append(lease_id)
+        return lost
+
+    def complete(self, lease: str, result: Any) -> bool:
+        cur = self.connect().execute(
+            "UPDATE jobs SET status = 'ok', finished = ?, result = ?, error = NULL, lease = NULL "
+            "WHERE lease = ? AND status = 'running'",
+            (time.time(), json.dumps(jsonable(result)), lease),
+        )
+        return cur.rowcount == 1
+
+    def fail(self, lease: str, error: str, retry: bool = True, retry_delay: float = 5.0) -> bool:
+        """Record a failed attempt; the job is re-queued with backoff while it has attempts left."""
+        conn = self.connect()
+        now = time.time()
+        # Read and update under one write lock so a concurrent reclaim cannot slip in between
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE lease = ? AND status = 'running'", (lease,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return False
+            attempts, max_attempts = row
+            if retry and attempts < max_attempts:
+                cur = conn.execute(
+                    "UPDATE jobs SET status = 'queued', available = ?, error = ?, lease = NULL "
+                    "WHERE lease = ? AND status = 'running'",
+                    (now + retry_delay * 2 ** (attempts - 1), error, lease),
+                )
+            else:
+                cur = conn.execute(
+                    "UPDATE jobs SET status = 'error', finished = ?, error = ?, lease = NULL "
+                    "WHERE lease = ? AND status = 'running'",
+                    (now, error, lease),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return cur.rowcount == 1
+
+    def release(self, lease: str) -> bool:
+        """Give a job back without using up an attempt (e.g. the worker is shutting down)."""
+        cur = self.connect().execute(
+            "UPDATE jobs SET status = 'queued', attempts = attempts - 1, available = ?, lease = NULL WHERE lease = ? AND status = 'running'",
+            (time.time(), lease),
+        )
+        return cur.rowcount > 0
+
+    def get(self, job_id: str) -> Optional[Job]:
+        row = self.connect().execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job(row) if row else None
+
+    def list(self, limit: int = 20, status: Optional[str] = None) -> List[Job]:
+        query = f"SELECT {_COLUMNS} FROM jobs"
+        args: List[Any] = []
+        if status:
+            query += " WHERE status = ?"
+            args.append(status)
+        rows = self.connect().execute(query + " ORDER BY created DESC LIMIT ?", (*args, limit)).fetchall()
+        return [_job(row) for row in rows]
+
+    def counts(self, workflows: Optional[List[str]] = None) -> Dict[str, int]:
+        query, args = "SELECT status, COUNT(*) FROM jobs", []
+        if workflows:
+            query += f" WHERE workflow IN ({', '.join('?' * len(workflows))})"
+            args = list(workflows)
+        rows = self.connect().execute(query + " GROUP BY status", args).fetchall()
+        return {status: dict(rows).get(status, 0) for status in JOB_STATUSES}
+
+
+def open_queue(broker: Optional[str] = None, token: Optional[str] = None):
+    """A JobQueue for a SQLite path (default: <config dir>/jobs.db), or a client for tcp://host:port."""
+    if broker and broker.startswith("tcp://"):
+        from .broker import RemoteQueue
+
+        host, _, port = broker[len("tcp://") :].rpartition(":")
+        if not host or not port.isdigit():
+            raise JobError(f"Broker address must look like tcp://host:port, not '{broker}'")
+        return RemoteQueue(host, int(port), token)
+    if broker and broker.startswith("sqlite://"):
+        broker = broker[len("sqlite://") :]
+    return JobQueue(Path(broker).expanduser() if broker else None)
+
+
+def wait_for_job(queue, job_id: str, timeout: Optional[float] = None, poll: float = 0.05) -> Job:
+    """Poll until the job is done; raises TimeoutError after `timeout` seconds."""
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    while True:
+        job = queue.get(job_id)
+        if job is None:
+            raise JobError(f"Job '{job_id}' not found")
+        if job.done:
+            return job
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(f"Job '{job_id}' is still {job.status} after {timeout:g}s")
+        time.sleep(poll)
+        poll = min(poll * 2, 1.0)
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def run_worker(
+    queue,
+    runtime: WorkflowRuntime,
+    concurrency: int = 4,
+    lease: float = 30.0,
+    heartbeat: float = 10.0,
+    poll: float = 0.5,
+    retry_delay: float = 5.0,
+    workflows: Optional[List[str]] = None,
+    drain: bool = False,
+    stop: Optional[threading.Event] = None,
+    on_job: Optional[Callable[[Job, str, Optional[str]], None]] = None,
+) -> Dict[str, int]:
+    """Claim and run jobs, at most `concurrency` at a time, until `stop` is set.
+
+    With `drain`, returns once no job is queued or running anywhere. Jobs still
+    running when the worker stops are released back to the queue. Returns
+    counts of ok/error attempts.
+    """
+    stop = stop or threading.Event()
+    name = worker_name()
+    inflight: Dict[concurrent.futures.Future, Job] = {}
+    counts = {"ok": 0, "error": 0}
+    lock = threading.Lock()
+
+    def _beat() -> None:
+        while not stop.wait(heartbeat):
+            with lock:
+                leases = {job.lease: job for job in inflight.values()}
+            if not leases:
+                continue
+            try:
+                lost = queue.heartbeat(list(leases), lease)
+            except Exception as e:
+                _logger.warning("heartbeat failed: %s", e)
+                continue
+            for lease_id in lost:
+                _logger.warning("lost the lease on job %s; its result will be discarded", leases[lease_id].id)
+
+    def _report(job: Job, status: str, error: Optional[str] = None) -> None:
+        counts[status] += 1
+        if on_job is not None:
+            on_job(job, status, error)
+
+    def _start(job: Job) -> None:
+        wf = get_workflow(job.workflow)
+        try:
+            if wf is None:
+                raise LookupError(f"Workflow '{job.workflow}' not found")
+            params = wf.coerce_params(job.params)
+        except (LookupError, ParamError) as e:
+            # Retrying cannot fix these
+            error = f"{type(e).__name__}: {e}"
+            if queue.fail(job.lease, error, retry=False):
+                _report(job, "error", error)
+            else:
+                _logger.warning("lost the lease on job %s; its failure was not recorded", job.id)
+            return
+        future = runtime.submit(wf, params)
+        with lock:
+            inflight[future] = job
+
+    def _finish(future: concurrent.futures.Future) -> None:
+        with lock:
+            job = inflight.pop(future)
+        try:
+            result = future.result()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if queue.fail(job.lease, error, retry_delay=retry_delay):
+                _report(job, "error", error)
+            else:
+                _logger.warning("lost the lease on job %s; its failure was not recorded", job.id)
+            return
+        if queue.complete(job.lease, result):
+            _report(job, "ok")
+
+    beat = threading.Thread(target=_beat, name="agnocli-heartbeat", daemon=True)
+    beat.start()
+    try:
+        while not stop.is_set():
+            claimed = False
+            while len(inflight) < concurrency and not stop.is_set():
+                job = queue.claim(name, lease, workflows)
+                if job is None:
+                    break
+                claimed = True
+                _start(job)
+            if drain and not claimed and not inflight:
+                # Jobs in a retry backoff, or running on a worker that may die, are still work to drain
+                pending = queue.counts(workflows)
+                if not pending["queued"] and not pending["running"]:
+                    break
+            if inflight:
+                done, _ = concurrent.futures.wait(list(inflight), timeout=poll, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    _finish(future)
+            elif not claimed:
+                stop.wait(poll)
+    finally:
+        stop.set()
+        with lock:
+            leftover = list(inflight.items())
+            inflight.clear()
+        for future, job in leftover:
+            future.cancel()
+            queue.release(job.lease)
+        beat.join()
+    return counts
+
+
+def job_record(job: Job) -> Dict[str, Any]:
+    return {k: v for k, v in asdict(job).items() if v is not None and k != "lease"}
@@ -1,32 +1,167 @@
 from __future__ import annotations
 
+import atexit
+import contextvars
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+import random
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, List, Optional, Tuple
 
+from .config import LOG_FORMATS, LoggingSettings
 
-def setup_logging(log_dir: Path, level: int = logging.INFO, name: str = "agnocli") -> logging.Logger:
+
+# (run id, workflow) of the run executing in this context
+_RUN: contextvars.ContextVar[Optional[Tuple[str, str]]] = contextvars.ContextVar("agnocli_run", default=None)
+
+
+@contextmanager
+def run_scope(workflow: str) -> Iterator[str]:
+    """Tag log records emitted in this context (and threads it spawns) with a new run id."""
+    run_id = uuid.uuid4().hex[:12]
+    token = _RUN.set((run_id, workflow))
+    try:
+        yield run_id
+    finally:
+        _RUN.reset(token)
+
+
+def current_run_id() -> Optional[str]:
+    run = _RUN.get()
+    return run[0] if run else None
+
+
+class _RunFilter(logging.Filter):
+    """Runs in the calling thread before enqueueing: attaches the run id, samples DEBUG records."""
+
+    def __init__(self, debug_sample_rate: float = 1.0):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno <= logging.DEBUG and self.debug_sample_rate < 1.0 and random.random() >= self.debug_sample_rate:
+            return False
+        run = _RUN.get()
+        record.run_id, record.workflow = run if run else ("-", None)
+        return True
+
+
+class _EnqueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args now (they may change later); tracebacks are formatted by the listener
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "run_id": getattr(record, "run_id", "-"),
+        }
+        workflow = getattr(record, "workflow", None)
+        if workflow:
+            data["workflow"] = workflow
+        data["thread"] = record.threadName
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def _level(value: str) -> int:
+    level = logging.getLevelName(str(value).upper())
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown log level '{value}'")
+    return level
+
+
+_LISTENER: Optional[QueueListener] = None
+_HANDLER: Optional[_EnqueueHandler] = None
+
+
+def _start_listener(handlers: List[logging.Handler]) -> queue.SimpleQueue:
+    global _LISTENER
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    _LISTENER = QueueListener(records, *handlers, respect_handler_level=True)
+    _LISTENER.start()
+    return records
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _LISTENER
+    listener, _LISTENER = _LISTENER, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def _restart_in_child() -> None:
+    # A forked process worker inherits the queue but not the writer thread, and
+    # the forking thread's run id, which belongs to the parent's run
+    _RUN.set(None)
+    if _LISTENER is not None and _HANDLER is not None:
+        _HANDLER.queue = _start_listener(list(_LISTENER.handlers))
+
+
+def setup_logging(
+    log_dir: Path, settings: Optional[LoggingSettings] = None, name: str = "agnocli"
+) -> logging.Logger:
+    """Log through a queue: callers only enqueue, a listener thread formats and writes.
+
+    Calling it again replaces the previous setup.
+    """
+    global _HANDLER
+    settings = settings or LoggingSettings()
+    if settings.format not in LOG_FORMATS:
+        raise ValueError(f"logging.format must be one of {LOG_FORMATS}, not '{settings.format}'")
+    level = _level(settings.level)
+    console_level = _level(settings.console_level) if settings.console_level else None
     log_dir.mkdir(parents=True, exist_ok=True)
     log_file = log_dir / f"{name}.log"
 
     logger = logging.getLogger(name)
-    logger.setLevel(level)
     logger.propagate = False
+    if _HANDLER is not None:
+        logger.removeHandler(_HANDLER)
+        stop_logging()
 
-    if not any(isinstance(h, RotatingFileHandler) for h in logger.handlers):
-        fh = RotatingFileHandler(str(log_file), maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8")
-        fmt = logging.Formatter(
-            fmt="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S",
+    fh = RotatingFileHandler(str(log_file), maxBytes=settings.max_bytes, backupCount=settings.backups, encoding="utf-8")
+    fh.setLevel(level)
+    if settings.format == "json":
+        fh.setFormatter(JsonFormatter())
+    else:
+        fh.setFormatter(
+            logging.Formatter(
+                fmt="%(asctime)s | %(levelname)s | %(name)s | %(run_id)s | %(message)s",
+                datefmt="%Y-%m-%d %H:%M:%S",
+            )
         )
-        fh.setFormatter(fmt)
-        logger.addHandler(fh)
-
-    if not any(isinstance(h, logging.StreamHandler) for h in logger.handlers):
+    handlers: List[logging.Handler] = [fh]
+    if console_level is not None:
         sh = logging.StreamHandler()
-        sh.setLevel(level)
+        sh.setLevel(console_level)
         sh.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
-        logger.addHandler(sh)
+        handlers.append(sh)
 
+    _HANDLER = _EnqueueHandler(_start_listener(handlers))
+    _HANDLER.addFilter(_RunFilter(settings.debug_sample_rate))
+    logger.addHandler(_HANDLER)
+    logger.setLevel(min(level, console_level) if console_level is not None else level)
     return logger
+
+
+atexit.register(stop_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_in_child)
@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import ast
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import _platform_config_dir
+
+
+MANIFEST_FILE = _platform_config_dir() / "manifest.json"
+MANIFEST_VERSION = 3
+
+_DECORATOR_NAME = "register_workflow"
+# Positional order of register_workflow(name, description, render_markdown)
+_DECORATOR_ARGS = ("name", "description", "render_markdown")
+
+
+@dataclass
+class ParamInfo:
+    name: str
+    kind: str = "POSITIONAL_OR_KEYWORD"
+    default: Optional[str] = None
+    has_default: bool = False
+    annotation: Optional[str] = None
+
+    def display_default(self) -> str:
+        try:
+            return str(ast.literal_eval(self.default)) if self.default is not None else ""
+        except (ValueError, SyntaxError):
+            return self.default or ""
+
+
+@dataclass
+class WorkflowInfo:
+    """Import-free description of a registered workflow."""
+
+    name: str
+    description: str = ""
+    render_markdown: Optional[bool] = None
+    params: List[ParamInfo] = field(default_factory=list)
+
+    @staticmethod
+    def from_dict(d: Dict[str, Any]) -> "WorkflowInfo":
+        return WorkflowInfo(
+            name=d["name"],
+            description=d.get("description", ""),
+            render_markdown=d.get("render_markdown"),
+            params=[ParamInfo(**p) for p in d.get("params", [])],
+        )
+
+
+class StaticScanError(Exception):
+    pass
+
+
+def find_module_source(module_path: str) -> Optional[Path]:
+    # find_spec does not execute the module itself (only its parent packages)
+    try:
+        spec = importlib.util.find_spec(module_path)
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not spec.origin or not spec.has_location:
+        return None
+    origin = Path(spec.origin)
+    if origin.suffix != ".py":
+        return None
+    return origin
+
+
+def _literal(node: ast.AST) -> Any:
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        raise StaticScanError(f"non-literal decorator argument at line {node.lineno}")
+
+
+def _is_register_call(node: ast.AST) -> bool:
+    if not isinstance(node, ast.Call):
+        return False
+    fn = node.func
+    if isinstance(fn, ast.Name):
+        return fn.id == _DECORATOR_NAME
+    if isinstance(fn, ast.Attribute):
+        return fn.attr == _DECORATOR_NAME
+    return False
+
+
+def _default_repr(node: ast.AST) -> str:
+    try:
+        return repr(ast.literal_eval(node))
+    except ValueError:
+        return ast.unparse(node)
+
+
+def _is_resource(default: Optional[ast.AST]) -> bool:
+    # `x = resource(...)` parameters are injected, not prompted for
+    if not isinstance(default, ast.Call):
+        return False
+    fn = default.func
+    if isinstance(fn, ast.Name):
+        return fn.id == "resource"
+    if isinstance(fn, ast.Attribute):
+        return fn.attr == "resource"
+    return False
+
+
+def _params_from_args(args: ast.arguments) -> List[ParamInfo]:
+    params: List[ParamInfo] = []
+    positional = [(a, "POSITIONAL_ONLY") for a in args.posonlyargs]
+    positional += [(a, "POSITIONAL_OR_KEYWORD") for a in args.args]
+    # Defaults align with the tail of the positional parameters
+    pos_defaults: List[Optional[ast.AST]] = [None] * (len(positional) - len(args.defaults)) + list(args.defaults)
+    for (arg, kind), default in zip(positional, pos_defaults):
+        if not _is_resource(default):
+            params.append(_param(arg, kind, default))
+    if args.vararg is not None:
+        params.append(_param(args.vararg, "VAR_POSITIONAL", None))
+    for arg, default in zip(args.kwonlyargs, args.kw_defaults):
+        if not _is_resource(default):
+            params.append(_param(arg, "KEYWORD_ONLY", default))
+    if args.kwarg is not None:
+        params.append(_param(args.kwarg, "VAR_KEYWORD", None))
+    return params
+
+
+def _param(arg: ast.arg, kind: str, default: Optional[ast.AST]) -> ParamInfo:
+    return ParamInfo(
+        name=arg.arg,
+        kind=kind,
+        default=_default_repr(default) if default is not None else None,
+        has_default=default is not None,
+        annotation=ast.unparse(arg.annotation) if arg.annotation is not None else None,
+    )
+
+
+def scan_source(source: str, filename: str = "<unknown>") -> List[WorkflowInfo]:
+    """Extract @register_workflow metadata from source without executing it.
+
+    Raises StaticScanError when a decorator cannot be evaluated statically, or
+    when no workflow is found in a module that imports others, since it may
+    register them through re-exports or `from x import *`.
+    """
+    try:
+        tree = ast.parse(source, filename=filename)
+    except SyntaxError as e:
+        raise StaticScanError(str(e))
+
+    infos: List[WorkflowInfo] = []
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for deco in node.decorator_list:
+            if not _is_register_call(deco):
+                continue
+            values: Dict[str, Any] = {}
+            if len(deco.args) > len(_DECORATOR_ARGS):
+                raise StaticScanError(f"unexpected positional arguments at line {deco.lineno}")
+            for key, arg in zip(_DECORATOR_ARGS, deco.args):
+                values[key] = _literal(arg)
+            for kw in deco.keywords:
+                if kw.arg is None:
+                    raise StaticScanError(f"**kwargs in decorator at line {deco.lineno}")
+                if kw.arg in _DECORATOR_ARGS:
+                    values[kw.arg] = _literal(kw.value)
+            infos.append(
+                WorkflowInfo(
+                    name=values.get("name") or node.name,
+                    description=values.get("description") or "",
+                    render_markdown=values.get("render_markdown"),
+                    params=_params_from_args(node.args),
+                )
+            )
+    if not infos and any(isinstance(node, (ast.Import, ast.ImportFrom)) for node in ast.walk(tree)):
+        raise StaticScanError("no workflows found; they may come from imported modules")
+    return infos
+
+
+def _read_cache() -> Dict[str, Any]:
+    try:
+        data = json.loads(MANIFEST_FILE.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data
+
+
+def _write_cache(data: Dict[str, Any]) -> None:
+    try:
+        MANIFEST_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = MANIFEST_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, MANIFEST_FILE)
+    except Exception:
+        # Cache is an optimization only
+        pass
+
+
+def _describe(cache: Dict[str, Any], module_path: str, source_path: Optional[Path]) -> Tuple[Optional[List[WorkflowInfo]], bool]:
+    """Look module_path up in (and update) the loaded cache; returns (infos, changed)."""
+    if source_path is None:
+        source_path = find_module_source(module_path)
+    if source_path is None or source_path.suffix != ".py":
+        return None, False
+    try:
+        st = source_path.stat()
+    except OSError:
+        return None, False
+
+    modules = cache.setdefault("modules", {})
+    entry = modules.get(module_path)
+    if entry and entry.get("source") == str(source_path):
+        if entry.get("mtime_ns") == st.st_mtime_ns and entry.get("size") == st.st_size:
+            return [WorkflowInfo.from_dict(d) for d in entry["workflows"]], False
+
+    try:
+        raw = source_path.read_bytes()
+    except OSError:
+        return None, False
+    digest = hashlib.sha256(raw).hexdigest()
+
+    if entry and entry.get("source") == str(source_path) and entry.get("sha256") == digest:
+        # Touched but unchanged: refresh the stat key and reuse
+        infos = [WorkflowInfo.from_dict(d) for d in entry["workflows"]]
+    else:
+        try:
+            infos = scan_source(raw.decode("utf-8"), filename=str(source_path))
+        except (StaticScanError, UnicodeDecodeError):
+            return None, False
+
+    cache["version"] = MANIFEST_VERSION
+    modules[module_path] = {
+        "source": str(source_path),
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "sha256": digest,
+        "workflows": [asdict(i) for i in infos],
+    }
+    return infos, True
+
+
+def load_manifest(module_path: str, source_path: Optional[Path] = None) -> Optional[Dict[str, WorkflowInfo]]:
+    """Return workflow metadata for module_path without importing it.
+
+    Returns None if the module cannot be described statically; callers should
+    then fall back to importing it.
+    """
+    cache = _read_cache()
+    infos, changed = _describe(cache, module_path, source_path)
+    if changed:
+        _write_cache(cache)
+    return {i.name: i for i in infos} if infos is not None else None
+
+
+def load_manifests(sources: Dict[str, Optional[Path]]) -> Tuple[Dict[str, WorkflowInfo], List[str]]:
+    """Describe many modules with one cache read and write.
+
+    Returns the combined metadata and the modules that must be imported instead.
+    """
+    cache = _read_cache()
+    found: Dict[str, WorkflowInfo] = {}
+    pending: List[str] = []
+    dirty = False
+    for module_path, source_path in sources.items():
+        infos, changed = _describe(cache, module_path, source_path)
+        dirty = dirty or changed
+        if infos is None:
+            pending.append(module_path)
+        else:
+            found.update((i.name, i) for i in infos)
+    if dirty:
+        _write_cache(cache)
+    return found, pending
+
+
+def clear_manifest() -> None:
+    try:
+        MANIFEST_FILE.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def info_from_workflow(wf: Any) -> WorkflowInfo:
+    # Reuse the schema computed at registration instead of re-inspecting
+    params: List[ParamInfo] = []
+    for p in wf.schema.params:
+        annotation = None
+        if isinstance(p.annotation, str):
+            annotation = p.annotation
+        elif p.annotation is not inspect.Parameter.empty:
+            annotation = getattr(p.annotation, "__name__", repr(p.annotation))
+        params.append(
+            ParamInfo(
+                name=p.name,
+                kind=p.kind.name,
+                default=repr(p.default) if p.has_default else None,
+                has_default=p.has_default,
+                annotation=annotation,
+            )
+        )
+    return WorkflowInfo(
+        name=wf.name,
+        description=wf.description,
+        render_markdown=wf.render_markdown,
+        params=params,
+    )
@@ -1,14 +1,25 @@
 from __future__ import annotations
 
-from typing import Optional
+import os
+import shlex
+import subprocess
+import sys
+import time
+from typing import IO, Any, Iterable, List, Optional
 
 from rich.console import Console
+from rich.live import Live
 from rich.markdown import Markdown
 
+from .config import OutputSettings
 
-def get_console(force_ansi: bool = False) -> Console:
+
+BINARY_TYPES = (bytes, bytearray, memoryview)
+
+
+def get_console(force_ansi: bool = False, stderr: bool = False) -> Console:
     # Rich auto-detects most terminals; allow forcing if requested
-    return Console(force_terminal=force_ansi or None)
+    return Console(force_terminal=force_ansi or None, stderr=stderr)
 
 
 def render_markdown(console: Console, text: str) -> None:
@@ -17,3 +28,195 @@ def render_markdown(console: Console, text: str) -> None:
 
 def render_plain(console: Console, text: str) -> None:
     console.print(text)
+
+
+def result_size(result: Any) -> int:
+    if isinstance(result, memoryview):
+        return result.nbytes
+    if isinstance(result, (str, bytes, bytearray)):
+        return len(result)
+    return -1
+
+
+def write_raw(stream: IO, data: Any, chunk_size: int = 64 * 1024, newline: bool = True) -> None:
+    """Write a result straight to a stream, bypassing Rich.
+
+    Binary results go to the underlying buffer through memoryview slices, so
+    large bytes are never copied into a str.
+    """
+    if isinstance(data, BINARY_TYPES):
+        view = memoryview(data).cast("B")
+        buf = getattr(stream, "buffer", None)
+        if buf is None:
+            # Text-only stream (e.g. a StringIO); decoding is unavoidable here
+            for i in range(0, len(view), chunk_size):
+                stream.write(bytes(view[i : i + chunk_size]).decode("utf-8", "replace"))
+            last = bytes(view[-1:]) if len(view) else b"\n"
+        else:
+            stream.flush()
+            for i in range(0, len(view), chunk_size):
+                buf.write(view[i : i + chunk_size])
+            last = bytes(view[-1:]) if len(view) else b"\n"
+            if newline and last != b"\n":
+                buf.write(b"\n")
+            buf.flush()
+            return
+        ends_with_newline = last == b"\n"
+    else:
+        text = data if isinstance(data, str) else str(data)
+        for i in range(0, len(text), chunk_size):
+            stream.write(text[i : i + chunk_size])
+        ends_with_newline = text.endswith("\n")
+    if newline and not ends_with_newline:
+        stream.write("\n")
+    stream.flush()
+
+
+def _pager_command() -> List[str]:
+    default = "more" if sys.platform.startswith("win") else "less -R"
+    return shlex.split(os.environ.get("PAGER") or default)
+
+
+def page_raw(data: Any, chunk_size: int = 64 * 1024) -> bool:
+    """Pipe a result through $PAGER. Returns False if no pager could be started."""
+    try:
+        proc = subprocess.Popen(_pager_command(), stdin=subprocess.PIPE)
+    except OSError:
+        return False
+    assert proc.stdin is not None
+    try:
+        if isinstance(data, BINARY_TYPES):
+            view = memoryview(data).cast("B")
+            for i in range(0, len(view), chunk_size):
+                proc.stdin.write(view[i : i + chunk_size])
+        else:
+            text = data if isinstance(data, str) else str(data)
+            for i in range(0, len(text), chunk_size):
+                proc.stdin.write(text[i : i + chunk_size].encode("utf-8", "replace"))
+        proc.stdin.close()
+    except BrokenPipeError:
+        # User quit the pager early
+        pass
+    proc.wait()
+    return True
+
+
+def render_result(
+    console: Console,
+    result: Any,
+    markdown: bool,
+    settings: Optional[OutputSettings] = None,
+    pager: Optional[bool] = None,
+) -> None:
+    """Print a workflow result, skipping Rich when it would only cost time.
+
+    Off a terminal, or above the size threshold, output is written raw in
+    chunks (or paged, if enabled and on a terminal). Small results on a
+    terminal keep the markdown/plain Rich rendering.
+    """
+    settings = settings or OutputSettings()
+    use_pager = settings.pager if pager is None else pager
+    size = result_size(result)
+    large = size > settings.large_threshold
+    if not console.is_terminal or isinstance(result, BINARY_TYPES) or large:
+        if large and use_pager and console.is_terminal and page_raw(result, settings.chunk_size):
+            return
+        write_raw(console.file, result, settings.chunk_size)
+        return
+    if isinstance(result, str) and markdown:
+        render_markdown(console, result)
+    else:
+        render_plain(console, str(result))
+
+
+class StreamRenderer:
+    """Displays streamed text chunks as they arrive.
+
+    Markdown is re-rendered in a Rich Live region (throttled, since every update
+    re-parses the accumulated text); plain output is written straight through.
+    Once the stream grows past the size threshold it switches to raw writes.
+    """
+
+    def __init__(
+        self,
+        console: Console,
+        markdown: bool,
+        refresh_interval: float = 0.1,
+        large_threshold: int = OutputSettings.large_threshold,
+        file: Optional[IO] = None,
+    ):
+        self.console = console
+        self.markdown = markdown
+        self.refresh_interval = refresh_interval
+        self.large_threshold = large_threshold
+        self._file = file
+        self._parts: List[str] = []
+        self._size = 0
+        self._live: Optional[Live] = None
+        self._last_refresh = 0.0
+        self._ends_with_newline = True
+        # Off a terminal there is nothing to redraw, so stream the raw text
+        self._raw = file is not None or not markdown or not console.is_terminal
+
+    def _write_raw(self, text: str) -> None:
+        out = self._file or self.console.file
+        out.write(text)
+        out.flush()
+        self._ends_with_newline = text.endswith("\n")
+
+    def write(self, chunk: Any) -> None:
+        text = chunk if isinstance(chunk, str) else str(chunk)
+        if not text:
+            return
+        if self._raw:
+            self._write_raw(text)
+            return
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size > self.large_threshold:
+            # Too big to keep re-parsing: flush what we have and go raw
+            self._finish_markdown()
+            self._raw = True
+            return
+        if self._live is None:
+            self._live = Live(console=self.console, auto_refresh=False, vertical_overflow="visible")
+            self._live.start()
+        now = time.monotonic()
+        if now - self._last_refresh >= self.refresh_interval:
+            self._live.update(Markdown("".join(self._parts)), refresh=True)
+            self._last_refresh = now
+
+    def _finish_markdown(self) -> None:
+        text = "".join(self._parts)
+        self._parts = []
+        if self._live is not None:
+            self._live.update(Markdown(text), refresh=True)
+            self._live.stop()
+            self._live = None
+        elif text:
+            self._write_raw(text)
+
+    def close(self) -> None:
+        if not self._raw:
+            self._finish_markdown()
+        elif not self._ends_with_newline:
+            self._write_raw("\n")
+
+    def __enter__(self) -> "StreamRenderer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def render_stream(
+    console: Console,
+    chunks: Iterable[Any],
+    markdown: bool,
+    settings: Optional[OutputSettings] = None,
+    file: Optional[IO] = None,
+) -> None:
+    settings = settings or OutputSettings()
+    with StreamRenderer(console, markdown, large_threshold=settings.large_threshold, file=file) as renderer:
+        for chunk in chunks:
+            renderer.write(chunk)
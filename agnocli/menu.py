@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import shlex
+from dataclasses import dataclass, field
+from typing import Any, Container, Dict, Hashable, List, Optional, Tuple
+
+from rich.console import Console
+from rich.table import Table
+from rich.text import Text
+
+from .search import TrigramIndex, paginate
+
+
+COMMANDS_HELP = (
+    "Commands: [number]=run, s [number]=switch, r [name]=run, <name> [key=value ...]=run with args, "
+    "n/p=next/prev page, /query=search, /=clear search, q=quit"
+)
+
+# Rule, header, footer, help and the input prompt
+_CHROME_LINES = 9
+_MAX_RENDERED = 64
+
+
+class WorkflowMenu:
+    """The TUI's paginated, searchable workflow list.
+
+    The sorted list and search index are rebuilt only when `set_workflows` sees
+    a new version; rendered pages are cached until the list, the page, the
+    search or the terminal size changes.
+    """
+
+    def __init__(self, console: Console, page_size: Optional[int] = None):
+        self.console = console
+        self.fixed_page_size = page_size
+        self.page = 0
+        self.query = ""
+        self._version: Optional[Hashable] = None
+        self._by_name: Dict[str, Any] = {}
+        self._sorted: List[Any] = []
+        self._visible: List[Any] = []
+        self._index: Optional[TrigramIndex] = None
+        self._rendered: Dict[Tuple, str] = {}
+
+    def set_workflows(self, infos: Dict[str, Any], version: Hashable) -> None:
+        if version == self._version:
+            return
+        self._version = version
+        self._by_name = dict(infos)
+        self._sorted = sorted(infos.values(), key=lambda wf: wf.name.lower())
+        # Built lazily on the first search
+        self._index = None
+        self._rendered.clear()
+        self.search(self.query)
+
+    @property
+    def page_size(self) -> int:
+        if self.fixed_page_size:
+            return self.fixed_page_size
+        return max(5, self.console.size.height - _CHROME_LINES)
+
+    @property
+    def visible(self) -> List[Any]:
+        return self._visible
+
+    def search(self, query: str) -> int:
+        """Filter the menu with a fuzzy query ("" shows everything); returns the match count."""
+        self.query = query.strip()
+        self.page = 0
+        if not self.query:
+            self._visible = self._sorted
+        else:
+            if self._index is None:
+                self._index = TrigramIndex((wf.name, wf.description or "") for wf in self._sorted)
+            self._visible = [self._by_name[n] for n in self._index.search(self.query, limit=len(self._sorted))]
+        return len(self._visible)
+
+    def next_page(self) -> None:
+        self.page, _, _ = paginate(self._visible, self.page + 1, self.page_size)
+
+    def prev_page(self) -> None:
+        self.page, _, _ = paginate(self._visible, self.page - 1, self.page_size)
+
+    def item(self, number: int) -> Any:
+        """The workflow shown as `number` (1-based, counted across pages)."""
+        if number < 1:
+            raise IndexError(number)
+        return self._visible[number - 1]
+
+    def _render(self, page: int, start: int, pages: int, page_size: int) -> str:
+        table = Table(show_header=True, header_style="bold magenta")
+        table.add_column("#", style="dim", width=len(str(len(self._visible))) + 1)
+        table.add_column("Name", style="cyan")
+        table.add_column("Description")
+        for i, wf in enumerate(self._visible[start : start + page_size], start=start + 1):
+            table.add_row(str(i), wf.name, wf.description or "")
+        footer = f"Page {page + 1}/{pages} - {len(self._visible)} of {len(self._sorted)} workflows"
+        if self.query:
+            footer += f" matching '{self.query}'"
+        with self.console.capture() as capture:
+            self.console.rule("AgnoCLI")
+            self.console.print(table)
+            self.console.print(Text(footer, style="dim"))
+            self.console.print(Text(COMMANDS_HELP))
+        return capture.get()
+
+    def draw(self) -> None:
+        page_size = self.page_size
+        self.page, start, pages = paginate(self._visible, self.page, page_size)
+        key = (self.query, self.page, page_size, self.console.width)
+        text = self._rendered.get(key)
+        if text is None:
+            if len(self._rendered) >= _MAX_RENDERED:
+                self._rendered.clear()
+            text = self._rendered[key] = self._render(self.page, start, pages, page_size)
+        self.console.clear()
+        self.console.file.write(text)
+        self.console.file.flush()
+
+
+@dataclass
+class MenuCommand:
+    """One parsed line of the TUI grammar (also read by `agnocli shell --script`).
+
+    action: quit, next, prev, search, run (a named workflow), select (run by
+    number), switch (by number), invalid (with `error`) or unknown.
+    """
+
+    action: str
+    name: Optional[str] = None
+    number: Optional[int] = None
+    query: str = ""
+    # key=value arguments given after a workflow name
+    params: Dict[str, str] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+def parse_command(line: str, workflows: Container[str]) -> Optional[MenuCommand]:
+    """Parse a TUI command; None for a blank line. `workflows` are the names that can be run directly."""
+    cmd = line.strip()
+    if not cmd:
+        return None
+    lowered = cmd.lower()
+    if lowered in {"q", "quit", "exit"}:
+        return MenuCommand("quit")
+    if lowered in {"n", "next"}:
+        return MenuCommand("next")
+    if lowered in {"p", "prev"}:
+        return MenuCommand("prev")
+    if cmd.startswith("/"):
+        return MenuCommand("search", query=cmd[1:])
+    # ": image ..." and "image ..." are the same command
+    if cmd.startswith(":"):
+        cmd = cmd[1:].lstrip()
+        if not cmd:
+            return MenuCommand("unknown")
+    # <workflow_name> [key=value ...]; words without '=' are ignored
+    try:
+        parts = shlex.split(cmd)
+    except ValueError:
+        parts = []
+    if parts and parts[0] in workflows:
+        params = dict(p.split("=", 1) for p in parts[1:] if "=" in p)
+        return MenuCommand("run", name=parts[0], params=params)
+    if cmd[0].isdigit():
+        try:
+            return MenuCommand("select", number=int(cmd))
+        except ValueError:
+            return MenuCommand("invalid", error="Invalid selection")
+    if cmd.startswith("s "):
+        try:
+            return MenuCommand("switch", number=int(cmd.split()[1]))
+        except ValueError:
+            return MenuCommand("invalid", error="Invalid switch command")
+    if cmd.startswith("r "):
+        return MenuCommand("run", name=cmd.split(maxsplit=1)[1])
+    return MenuCommand("unknown")
+
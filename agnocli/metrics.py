@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import cProfile
+import json
+import logging
+import os
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class Timings:
+    """Wall-clock spans for the phases of one CLI invocation."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: List[Tuple[str, float]] = []
+        self.labels: Dict[str, str] = {}
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((name, time.perf_counter() - start))
+
+    def phases(self) -> Dict[str, float]:
+        """Seconds per phase; repeated spans of one phase are summed."""
+        out: Dict[str, float] = {}
+        for name, seconds in self.spans:
+            out[name] = out.get(name, 0.0) + seconds
+        return out
+
+    def total(self) -> float:
+        return time.perf_counter() - self.started
+
+
+# One invocation per process; the daemon does not record spans
+_TIMINGS = Timings()
+
+
+def span(name: str):
+    return _TIMINGS.span(name)
+
+
+def label(**labels: Any) -> None:
+    _TIMINGS.labels.update({k: str(v) for k, v in labels.items() if v is not None})
+
+
+def get_timings() -> Timings:
+    return _TIMINGS
+
+
+def _format_ms(phases: Dict[str, float]) -> str:
+    return " ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in phases.items())
+
+
+def write_jsonl(path: Path, command: str, timings: Timings) -> None:
+    record = {
+        "ts": time.time(),
+        "command": command,
+        **timings.labels,
+        "phases": {k: round(v, 6) for k, v in timings.phases().items()},
+        "total": round(timings.total(), 6),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # One short append per invocation; O_APPEND keeps concurrent writers' lines intact
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+_PROM_SAMPLE = re.compile(r"^(\w+)(\{.*\})?\s+(\S+)$")
+_PROM_HELP = {
+    "agnocli_phase_seconds": ("gauge", "Duration of each phase of the last agnocli invocation."),
+    "agnocli_invocation_seconds": ("gauge", "Total duration of the last agnocli invocation."),
+    "agnocli_last_invocation_timestamp_seconds": ("gauge", "Unix time of the last agnocli invocation."),
+}
+
+
+def _prom_labels(labels: Dict[str, str]) -> str:
+    escaped = (f'{k}="{v}"'.replace("\n", " ") for k, v in sorted(labels.items()))
+    return "{" + ",".join(escaped) + "}"
+
+
+def write_prometheus(path: Path, command: str, timings: Timings) -> None:
+    """Update a node_exporter textfile with the latest spans for this command/workflow.
+
+    Samples for other commands and workflows already in the file are kept.
+    """
+    samples: Dict[Tuple[str, str], str] = {}
+    try:
+        for line in path.read_text(encoding="utf-8").splitlines():
+            match = _PROM_SAMPLE.match(line)
+            if match and not line.startswith("#"):
+                samples[(match.group(1), match.group(2) or "")] = match.group(3)
+    except OSError:
+        pass
+    base = {"command": command, **{k: v.replace('"', "'") for k, v in timings.labels.items()}}
+    for phase, seconds in timings.phases().items():
+        samples[("agnocli_phase_seconds", _prom_labels({**base, "phase": phase}))] = f"{seconds:.6f}"
+    samples[("agnocli_invocation_seconds", _prom_labels(base))] = f"{timings.total():.6f}"
+    samples[("agnocli_last_invocation_timestamp_seconds", _prom_labels(base))] = f"{time.time():.3f}"
+
+    lines: List[str] = []
+    for metric in sorted({m for m, _ in samples}):
+        kind, help_text = _PROM_HELP.get(metric, ("gauge", metric))
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        lines.extend(f"{metric}{labels} {value}" for (m, labels), value in sorted(samples.items()) if m == metric)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # The textfile collector may read at any moment; replace atomically
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def report_timings(logger: logging.Logger, command: Optional[str], settings: Any = None) -> None:
+    """Log the invocation's spans and write them to the configured metrics sinks."""
+    command = command or "-"
+    timings = _TIMINGS
+    phases = timings.phases()
+    logger.info("timings %s: %s total=%.1fms", command, _format_ms(phases), timings.total() * 1000)
+    if settings is None:
+        return
+    for writer, path in ((write_jsonl, settings.jsonl), (write_prometheus, settings.prometheus)):
+        if path:
+            try:
+                writer(Path(path), command, timings)
+            except OSError as e:
+                logger.warning("could not write metrics to %s: %s", path, e)
+
+
+def profile_call(fn: Callable[[], Any], path: Path) -> Any:
+    """Run fn under cProfile (on this thread) and dump pstats to path."""
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn)
+    finally:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(path))
+
+
+def trace_memory_call(fn: Callable[[], Any], top: int = 10, frames: int = 1) -> Tuple[Any, str]:
+    """Run fn with tracemalloc on; returns (result, top-N allocation report)."""
+    already = tracemalloc.is_tracing()
+    if not already:
+        tracemalloc.start(frames)
+    tracemalloc.reset_peak()
+    try:
+        result = fn()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not already:
+            tracemalloc.stop()
+    snapshot = snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        )
+    )
+    lines = [f"Memory: current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB", f"Top {top} allocations by line:"]
+    for i, stat in enumerate(snapshot.statistics("lineno")[:top], start=1):
+        frame = stat.traceback[0]
+        lines.append(f"{i:>3}. {frame.filename}:{frame.lineno}: {stat.size / 1024:.1f} KiB in {stat.count} blocks")
+    return result, "\n".join(lines)
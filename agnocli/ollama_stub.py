@@ -0,0 +1,418 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import yaml
+
+from .config import StubSettings, _YAML_LOADER
+
+_logger = logging.getLogger("agnocli")
+
+# Read by the ollama client (and so agno's Ollama model) when it is created
+HOST_ENV = "OLLAMA_HOST"
+STUB_VERSION = "0.0.0-agnocli-stub"
+STUB_MODES = ("synthetic", "record", "replay")
+REPLAY_TIMINGS = ("recorded", "configured")
+
+_TOKEN = re.compile(r"\s*\S+")
+
+
+class StubError(ValueError):
+    """Invalid stub settings, responses or recordings."""
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into word tokens (leading whitespace kept) that join back to it."""
+    tokens = _TOKEN.findall(text)
+    tail = text[sum(map(len, tokens)) :]
+    if tail:
+        tokens.append(tail)
+    return tokens
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _prompt_text(endpoint: str, body: Dict[str, Any]) -> str:
+    if endpoint == "generate":
+        return str(body.get("prompt") or "")
+    for message in reversed(body.get("messages") or []):
+        if isinstance(message, dict) and message.get("role") == "user":
+            return str(message.get("content") or "")
+    return ""
+
+
+def request_key(endpoint: str, body: Dict[str, Any]) -> str:
+    """Identifies a request for record/replay: everything that affects the model's answer."""
+    relevant = {k: body.get(k) for k in ("model", "messages", "prompt", "system", "tools", "format", "options")}
+    relevant["endpoint"] = endpoint
+    relevant["stream"] = body.get("stream", True) is not False
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:24]
+
+
+def load_responses(path: Path) -> List[Tuple[re.Pattern, str]]:
+    """Canned responses: a YAML/JSON list of {match: <regex>, response: <text>}, tried in order."""
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            data = yaml.load(f, Loader=_YAML_LOADER)
+    except (OSError, yaml.YAMLError) as e:
+        raise StubError(f"Cannot read responses from {path}: {e}") from e
+    if not isinstance(data, list):
+        raise StubError(f"{path}: expected a list of {{match, response}} entries")
+    rules = []
+    for i, entry in enumerate(data):
+        if not isinstance(entry, dict) or not isinstance(entry.get("response"), str):
+            raise StubError(f"{path}: entry {i} needs a 'response' string")
+        try:
+            rules.append((re.compile(str(entry.get("match") or ""), re.IGNORECASE), entry["response"]))
+        except re.error as e:
+            raise StubError(f"{path}: entry {i}: bad 'match' pattern: {e}") from e
+    return rules
+
+
+class Cassette:
+    """Recorded upstream exchanges, one JSON object per line, keyed by request_key()."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if path.exists():
+            with path.open("r", encoding="utf-8") as f:
+                for n, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                        self._entries[entry["key"]] = entry
+                    except (ValueError, KeyError, TypeError) as e:
+                        raise StubError(f"{path}:{n}: not a recording ({e})") from e
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._entries.get(key)
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[entry["key"]] = entry
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "OllamaStub"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        _logger.debug("ollama stub: " + format, *args)
+
+    def do_HEAD(self) -> None:
+        if self.path.rstrip("/") == "":
+            self._raw(200, b"", "text/plain; charset=utf-8")
+        else:
+            self._json(404, {"error": "not found"})
+
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path == "":
+            self._raw(200, b"Ollama is running", "text/plain; charset=utf-8")
+        elif path == "/api/version":
+            self._json(200, {"version": STUB_VERSION})
+        elif path in ("/api/tags", "/api/ps"):
+            self._json(200, {"models": [self.server.model_info(name) for name in self.server.models()]})
+        else:
+            self._json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        path = self.path.split("?", 1)[0].rstrip("/")
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            self._json(400, {"error": f"invalid request body: {e}"})
+            return
+        if path == "/api/show":
+            self._json(200, {**self.server.model_info(str(body.get("model") or body.get("name") or "stub")), "modelfile": ""})
+            return
+        endpoint = {"/api/chat": "chat", "/api/generate": "generate"}.get(path)
+        if endpoint is None:
+            self._json(404, {"error": "not found"})
+            return
+        self.server.count_request()
+        try:
+            self.server.respond(self, endpoint, body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _raw(self, status: int, data: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _json(self, status: int, data: Dict[str, Any]) -> None:
+        self._raw(status, json.dumps(data).encode("utf-8"), "application/json; charset=utf-8")
+
+    def start_stream(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def write_line(self, obj: Dict[str, Any]) -> None:
+        data = json.dumps(obj).encode("utf-8") + b"\n"
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def end_stream(self) -> None:
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class OllamaStub(ThreadingHTTPServer):
+    """An offline server speaking enough of the Ollama API for agents and benchmarks.
+
+    Answers come from canned responses (or a default reply) paced by the
+    configured latency, time to first token and tokens per second. In record
+    mode they are proxied from a real server and saved to a cassette; in replay
+    mode they are served from it.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, settings: StubSettings, host: str = "127.0.0.1", port: Optional[int] = None):
+        if settings.mode not in STUB_MODES:
+            raise StubError(f"mode must be one of {', '.join(STUB_MODES)}")
+        if settings.replay_timing not in REPLAY_TIMINGS:
+            raise StubError(f"replay_timing must be one of {', '.join(REPLAY_TIMINGS)}")
+        if settings.tokens_per_second <= 0:
+            raise StubError("tokens_per_second must be positive")
+        self.settings = settings
+        self.rules = load_responses(settings.responses) if settings.responses else []
+        if settings.mode != "synthetic" and settings.cassette is None:
+            raise StubError(f"{settings.mode} mode needs a cassette file")
+        if settings.mode == "replay" and not settings.cassette.exists():
+            raise StubError(f"No recordings at {settings.cassette}")
+        self.cassette = Cassette(settings.cassette) if settings.mode != "synthetic" else None
+        self.requests = 0
+        self._count_lock = threading.Lock()
+        super().__init__((host, settings.port if port is None else port), _Handler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_request(self) -> None:
+        with self._count_lock:
+            self.requests += 1
+
+    def models(self) -> List[str]:
+        return [self.settings.model]
+
+    def model_info(self, name: str) -> Dict[str, Any]:
+        return {
+            "name": name,
+            "model": name,
+            "modified_at": _now(),
+            "size": 0,
+            "digest": hashlib.sha256(name.encode("utf-8")).hexdigest(),
+            "details": {"format": "stub", "family": "stub", "parameter_size": "0", "quantization_level": "none"},
+        }
+
+    # --- answers ------------------------------------------------------------
+
+    def respond(self, handler: _Handler, endpoint: str, body: Dict[str, Any]) -> None:
+        if self.settings.mode == "replay":
+            entry = self.cassette.get(request_key(endpoint, body))
+            if entry is None:
+                handler._json(404, {"error": "no recording matches this request"})
+                return
+            self._replay(handler, entry)
+        elif self.settings.mode == "record":
+            self._record(handler, endpoint, body)
+        else:
+            self._synthesize(handler, endpoint, body)
+
+    def _reply_text(self, endpoint: str, body: Dict[str, Any]) -> str:
+        prompt = _prompt_text(endpoint, body)
+        for pattern, response in self.rules:
+            if pattern.search(prompt):
+                return response
+        return self.settings.response or f"This is a stub reply to: {prompt[:200]}"
+
+    def _schedule(self, count: int) -> Iterator[int]:
+        """Yield 0..count-1, sleeping so item i goes out at ttft + i / tokens_per_second."""
+        s = self.settings
+        time.sleep(s.latency)
+        start = time.perf_counter() + s.ttft
+        for i in range(count):
+            delay = start + i / s.tokens_per_second - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            yield i
+
+    def _synthesize(self, handler: _Handler, endpoint: str, body: Dict[str, Any]) -> None:
+        model = str(body.get("model") or self.settings.model)
+        text = self._reply_text(endpoint, body)
+        tokens = tokenize(text) or [""]
+        started = time.perf_counter()
+        first = None
+
+        def _chunk(content: str, done: bool) -> Dict[str, Any]:
+            out: Dict[str, Any] = {"model": model, "created_at": _now()}
+            if endpoint == "chat":
+                out["message"] = {"role": "assistant", "content": content}
+            else:
+                out["response"] = content
+            out["done"] = done
+            return out
+
+        def _final(content: str) -> Dict[str, Any]:
+            total = time.perf_counter() - started
+            out = _chunk(content, True)
+            out.update(
+                done_reason="stop",
+                total_duration=int(total * 1e9),
+                load_duration=0,
+                prompt_eval_count=len(tokenize(_prompt_text(endpoint, body))),
+                prompt_eval_duration=int(((first or started) - started) * 1e9),
+                eval_count=len(tokens),
+                eval_duration=int((time.perf_counter() - (first or started)) * 1e9),
+            )
+            if endpoint == "generate":
+                out["context"] = []
+            return out
+
+        if body.get("stream", True) is False:
+            for i in self._schedule(len(tokens)):
+                if i == 0:
+                    first = time.perf_counter()
+            handler._json(200, _final(text))
+            return
+        schedule = self._schedule(len(tokens))
+        next(schedule)
+        # Headers go out with the first token, as a real server's do
+        handler.start_stream()
+        first = time.perf_counter()
+        handler.write_line(_chunk(tokens[0], False))
+        for i in schedule:
+            handler.write_line(_chunk(tokens[i], False))
+        handler.write_line(_final(""))
+        handler.end_stream()
+
+    def _replay(self, handler: _Handler, entry: Dict[str, Any]) -> None:
+        lines, offsets = entry["lines"], entry["offsets"]
+        if self.settings.replay_timing == "configured":
+            schedule: Iterator[int] = self._schedule(len(lines))
+        else:
+            schedule = self._recorded_schedule(offsets)
+        if not entry.get("stream", True):
+            for _ in schedule:
+                pass
+            handler._json(200, lines[0])
+            return
+        for i in schedule:
+            if i == 0:
+                handler.start_stream()
+            handler.write_line(lines[i])
+        handler.end_stream()
+
+    @staticmethod
+    def _recorded_schedule(offsets: List[float]) -> Iterator[int]:
+        start = time.perf_counter()
+        for i, offset in enumerate(offsets):
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            yield i
+
+    def _record(self, handler: _Handler, endpoint: str, body: Dict[str, Any]) -> None:
+        stream = body.get("stream", True) is not False
+        request = urllib.request.Request(
+            f"{self.settings.upstream.rstrip('/')}/api/{endpoint}",
+            data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        started = time.perf_counter()
+        lines: List[Dict[str, Any]] = []
+        offsets: List[float] = []
+        try:
+            with urllib.request.urlopen(request, timeout=self.settings.upstream_timeout) as upstream:
+                if not stream:
+                    lines.append(json.loads(upstream.read()))
+                    offsets.append(time.perf_counter() - started)
+                    handler._json(200, lines[0])
+                else:
+                    handler.start_stream()
+                    for raw in upstream:
+                        if not raw.strip():
+                            continue
+                        lines.append(json.loads(raw))
+                        offsets.append(time.perf_counter() - started)
+                        handler.write_line(lines[-1])
+                    handler.end_stream()
+        except urllib.error.HTTPError as e:
+            # Not recorded: a replay should not reproduce a transient upstream failure
+            handler._raw(e.code, e.read(), e.headers.get("Content-Type") or "application/json")
+            return
+        except (OSError, ValueError) as e:
+            if not lines:
+                handler._json(502, {"error": f"upstream {self.settings.upstream} failed: {e}"})
+            return
+        self.cassette.add(
+            {
+                "key": request_key(endpoint, body),
+                "endpoint": endpoint,
+                "model": body.get("model"),
+                "stream": stream,
+                "prompt": _prompt_text(endpoint, body)[:200],
+                "lines": lines,
+                "offsets": [round(o, 6) for o in offsets],
+            }
+        )
+
+
+def start_stub(settings: StubSettings, host: str = "127.0.0.1", port: Optional[int] = None) -> OllamaStub:
+    """Start a stub on a background thread (port 0 picks a free port); call shutdown() to stop it."""
+    stub = OllamaStub(settings, host, port)
+    threading.Thread(target=stub.serve_forever, name="agnocli-ollama-stub", daemon=True).start()
+    return stub
+
+
+@contextmanager
+def stub_ollama(settings: StubSettings, port: Optional[int] = 0) -> Iterator[OllamaStub]:
+    """Run a stub for the duration of the block, with OLLAMA_HOST pointing at it."""
+    stub = start_stub(settings, port=port)
+    previous = os.environ.get(HOST_ENV)
+    os.environ[HOST_ENV] = stub.url
+    try:
+        yield stub
+    finally:
+        if previous is None:
+            os.environ.pop(HOST_ENV, None)
+        else:
+            os.environ[HOST_ENV] = previous
+        stub.shutdown()
+        stub.server_close()
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import sys
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+_OUTPUT_SINK: contextvars.ContextVar[Optional[Callable[[str], None]]] = contextvars.ContextVar(
+    "agnocli_output_sink", default=None
+)
+
+
+def jsonable(value: Any) -> Any:
+    """value if it serializes to JSON as is, else its str()."""
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return str(value)
+
+
+class StdoutRouter:
+    """Sends stdout writes made inside routed_stdout() to that context's sink.
+
+    Writes from anywhere else (other runs, other threads) reach the wrapped stream.
+    """
+
+    def __init__(self, wrapped):
+        self._wrapped = wrapped
+
+    def write(self, data: str) -> int:
+        sink = _OUTPUT_SINK.get()
+        if sink is None:
+            return self._wrapped.write(data)
+        if data:
+            sink(data)
+        return len(data)
+
+    def flush(self) -> None:
+        if _OUTPUT_SINK.get() is None:
+            self._wrapped.flush()
+
+    def isatty(self) -> bool:
+        if _OUTPUT_SINK.get() is not None:
+            return False
+        return self._wrapped.isatty()
+
+    def __getattr__(self, name: str):
+        return getattr(self._wrapped, name)
+
+
+def install_stdout_router() -> None:
+    if not isinstance(sys.stdout, StdoutRouter):
+        sys.stdout = StdoutRouter(sys.stdout)
+
+
+@contextmanager
+def routed_stdout(sink: Callable[[str], None]) -> Iterator[None]:
+    """Route what this context prints (and the runtime threads it starts) to `sink`."""
+    install_stdout_router()
+    token = _OUTPUT_SINK.set(sink)
+    try:
+        yield
+    finally:
+        _OUTPUT_SINK.reset(token)
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import enum
+import inspect
+import json
+import types
+import typing
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .resources import ResourceRef
+
+
+_EMPTY = inspect.Parameter.empty
+
+_TRUE = {"1", "true", "yes", "y", "on"}
+_FALSE = {"0", "false", "no", "n", "off"}
+_NONE = {"none", "null"}
+
+# Annotation strings we can resolve even when get_type_hints() fails
+_BUILTIN_NAMES = {"str": str, "int": int, "float": float, "bool": bool, "list": list, "dict": dict}
+
+# `int | None` (PEP 604) has its own origin type from Python 3.10
+_UNION_ORIGINS = (typing.Union, getattr(types, "UnionType", typing.Union))
+
+
+class ParamError(ValueError):
+    """Params that do not match a workflow's signature."""
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(f"expected a boolean, got {value!r}")
+
+
+def _to_int(value: Any) -> int:
+    if isinstance(value, bool):
+        raise ValueError(f"expected an integer, got {value!r}")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return int(str(value).strip())
+
+
+def _to_float(value: Any) -> float:
+    if isinstance(value, bool):
+        raise ValueError(f"expected a number, got {value!r}")
+    if isinstance(value, (int, float)):
+        return float(value)
+    return float(str(value).strip())
+
+
+def _json_or(value: Any, kind: type) -> Any:
+    if isinstance(value, kind):
+        return value
+    loaded = json.loads(value)
+    if not isinstance(loaded, kind):
+        raise ValueError(f"expected JSON {kind.__name__}, got {value!r}")
+    return loaded
+
+
+def _list_converter(item: Optional[Callable[[Any], Any]]) -> Callable[[Any], Any]:
+    def convert(value: Any) -> List[Any]:
+        if isinstance(value, (list, tuple)):
+            items = list(value)
+        else:
+            text = str(value).strip()
+            # key=[1,2] is JSON; key=a,b,c is a comma-separated list
+            items = json.loads(text) if text.startswith("[") else ([p.strip() for p in text.split(",")] if text else [])
+            if not isinstance(items, list):
+                raise ValueError(f"expected a list, got {value!r}")
+        return [item(v) for v in items] if item else items
+
+    return convert
+
+
+def _enum_converter(cls: type) -> Callable[[Any], Any]:
+    def convert(value: Any) -> Any:
+        if isinstance(value, cls):
+            return value
+        try:
+            return cls[str(value)]
+        except KeyError:
+            pass
+        for member in cls:
+            if str(member.value) == str(value):
+                return member
+        choices = ", ".join(m.name for m in cls)
+        raise ValueError(f"expected one of {choices}, got {value!r}")
+
+    return convert
+
+
+def _literal_converter(choices: Tuple[Any, ...]) -> Callable[[Any], Any]:
+    def convert(value: Any) -> Any:
+        for choice in choices:
+            if value == choice or str(choice) == str(value):
+                return choice
+        raise ValueError(f"expected one of {', '.join(map(str, choices))}, got {value!r}")
+
+    return convert
+
+
+def _optional_converter(inner: Optional[Callable[[Any], Any]]) -> Callable[[Any], Any]:
+    def convert(value: Any) -> Any:
+        if value is None or (isinstance(value, str) and value.strip().lower() in _NONE):
+            return None
+        return inner(value) if inner else value
+
+    return convert
+
+
+def converter_for(annotation: Any) -> Optional[Callable[[Any], Any]]:
+    """Build a converter for an annotation, or None to pass values through."""
+    if isinstance(annotation, str):
+        annotation = _BUILTIN_NAMES.get(annotation, _EMPTY)
+    if annotation is _EMPTY or annotation is Any or annotation is str:
+        return None
+    if annotation is bool:
+        return _to_bool
+    if annotation is int:
+        return _to_int
+    if annotation is float:
+        return _to_float
+    if annotation is list:
+        return _list_converter(None)
+    if annotation is dict:
+        return lambda v: _json_or(v, dict)
+    if isinstance(annotation, type) and issubclass(annotation, enum.Enum):
+        return _enum_converter(annotation)
+
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin in _UNION_ORIGINS:
+        non_none = [a for a in args if a is not type(None)]
+        inner = converter_for(non_none[0]) if len(non_none) == 1 else None
+        return _optional_converter(inner) if len(non_none) < len(args) else inner
+    if origin in (list, List, set):
+        return _list_converter(converter_for(args[0]) if args else None)
+    if origin is tuple:
+        # Only tuple[X, ...] has one item type; tuple[int, str] is passed through
+        if not args or (len(args) == 2 and args[1] is Ellipsis):
+            return _list_converter(converter_for(args[0]) if args else None)
+        return None
+    if origin is dict:
+        return lambda v: _json_or(v, dict)
+    if origin is typing.Literal:
+        return _literal_converter(args)
+    return None
+
+
+class ParamSpec:
+    __slots__ = ("name", "kind", "default", "annotation", "convert")
+
+    def __init__(
+        self,
+        name: str,
+        kind: inspect._ParameterKind,
+        default: Any = _EMPTY,
+        annotation: Any = _EMPTY,
+        convert: Optional[Callable[[Any], Any]] = None,
+    ):
+        self.name = name
+        self.kind = kind
+        self.default = default
+        self.annotation = annotation
+        self.convert = convert
+
+    @property
+    def has_default(self) -> bool:
+        return self.default is not _EMPTY
+
+    @property
+    def required(self) -> bool:
+        return not self.has_default and self.kind not in (
+            inspect.Parameter.VAR_POSITIONAL,
+            inspect.Parameter.VAR_KEYWORD,
+        )
+
+    def __repr__(self) -> str:
+        return f"ParamSpec({self.name!r}, {self.kind.name})"
+
+
+class ParamSchema:
+    """A workflow signature, introspected once at registration."""
+
+    __slots__ = ("params", "by_name", "var_keyword")
+
+    def __init__(self, params: Tuple[ParamSpec, ...]):
+        self.params = params
+        self.by_name = {p.name: p for p in params if p.kind is not inspect.Parameter.VAR_POSITIONAL}
+        self.var_keyword = any(p.kind is inspect.Parameter.VAR_KEYWORD for p in params)
+
+    @staticmethod
+    def from_function(func: Callable[..., Any]) -> "ParamSchema":
+        try:
+            sig = inspect.signature(func)
+        except (ValueError, TypeError):
+            # Unknown signature: accept anything, convert nothing
+            return ParamSchema((ParamSpec("kwargs", inspect.Parameter.VAR_KEYWORD),))
+        try:
+            hints = typing.get_type_hints(func)
+        except Exception:
+            hints = {}
+        specs = []
+        for p in sig.parameters.values():
+            if isinstance(p.default, ResourceRef):
+                # Injected at run time, never set by callers
+                continue
+            annotation = hints.get(p.name, p.annotation)
+            convert = converter_for(annotation)
+            if convert is None and annotation is _EMPTY and p.default is not _EMPTY and p.default is not None:
+                # Unannotated: infer from the default's type
+                convert = converter_for(type(p.default))
+            specs.append(ParamSpec(p.name, p.kind, p.default, annotation, convert))
+        return ParamSchema(tuple(specs))
+
+    @property
+    def names(self) -> List[str]:
+        return [p.name for p in self.params if p.kind not in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)]
+
+    def split_unknown(self, raw: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+        if self.var_keyword:
+            return dict(raw), []
+        known = {k: v for k, v in raw.items() if k in self.by_name}
+        unknown = sorted(k for k in raw if k not in self.by_name)
+        return known, unknown
+
+    def missing(self, raw: Dict[str, Any]) -> List[str]:
+        return [p.name for p in self.params if p.required and p.name not in raw]
+
+    def coerce(self, raw: Dict[str, Any], partial: bool = False) -> Dict[str, Any]:
+        """Validate and convert params, reporting every problem at once.
+
+        With partial=True, missing required params are not an error.
+        """
+        errors: List[str] = []
+        out: Dict[str, Any] = {}
+        for key, value in raw.items():
+            spec = self.by_name.get(key)
+            if spec is None or spec.kind is inspect.Parameter.VAR_KEYWORD:
+                if not self.var_keyword:
+                    errors.append(f"unknown param '{key}'")
+                    continue
+                out[key] = value
+                continue
+            if spec.kind is inspect.Parameter.POSITIONAL_ONLY:
+                errors.append(f"'{key}' is positional-only")
+                continue
+            if spec.convert is None:
+                out[key] = value
+                continue
+            try:
+                out[key] = spec.convert(value)
+            except (ValueError, TypeError) as e:
+                errors.append(f"'{key}': {e}")
+        if not partial:
+            errors.extend(f"missing required param '{name}'" for name in self.missing(raw))
+        if errors:
+            raise ParamError("; ".join(errors))
+        return out
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import yaml
+
+from .cache import cache_key
+from .config import _YAML_LOADER
+from .params import ParamError
+from .runner import WorkflowRuntime, get_runtime
+from .workflows import Workflow, get_workflow
+
+
+ON_ERROR = ("fail", "continue", "ignore")
+STEP_STATUSES = ("ok", "error", "skipped", "cancelled")
+
+# ${params.topic} or ${steps.image.output}
+_REF = re.compile(r"\$\{\s*(?:params\.([\w-]+)|steps\.([\w-]+)\.output)\s*\}")
+
+
+class PipelineError(ValueError):
+    """A pipeline file that cannot be run as written."""
+
+
+@dataclass
+class Step:
+    id: str
+    workflow: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    needs: List[str] = field(default_factory=list)
+    # fail: stop the pipeline; continue: skip steps that depend on it; ignore: use `default`
+    on_error: str = "fail"
+    retries: int = 0
+    default: Any = None
+
+
+@dataclass
+class Pipeline:
+    name: str
+    steps: Dict[str, Step]
+    params: Dict[str, Any] = field(default_factory=dict)
+    # Steps whose output is printed; defaults to the steps nothing depends on
+    outputs: List[str] = field(default_factory=list)
+
+    def order(self) -> List[str]:
+        """Step ids in dependency order (raises PipelineError on cycles)."""
+        remaining = {sid: set(step.needs) for sid, step in self.steps.items()}
+        ordered: List[str] = []
+        while remaining:
+            ready = [sid for sid, needs in remaining.items() if not needs]
+            if not ready:
+                raise PipelineError(f"dependency cycle between steps: {', '.join(sorted(remaining))}")
+            for sid in ready:
+                del remaining[sid]
+                ordered.append(sid)
+            for needs in remaining.values():
+                needs.difference_update(ready)
+        return ordered
+
+
+@dataclass
+class StepResult:
+    id: str
+    workflow: str
+    status: str
+    output: Any = None
+    error: Optional[str] = None
+    seconds: float = 0.0
+    attempts: int = 0
+    # Reused the result of an identical step earlier in this run
+    shared: bool = False
+
+
+def _references(value: Any, steps: Set[str], params: Set[str]) -> None:
+    if isinstance(value, str):
+        for match in _REF.finditer(value):
+            if match.group(1):
+                params.add(match.group(1))
+            else:
+                steps.add(match.group(2))
+    elif isinstance(value, dict):
+        for item in value.values():
+            _references(item, steps, params)
+    elif isinstance(value, list):
+        for item in value:
+            _references(item, steps, params)
+
+
+def _substitute(value: Any, inputs: Dict[str, Any], outputs: Dict[str, Any]) -> Any:
+    if isinstance(value, str):
+        match = _REF.fullmatch(value.strip())
+        if match:
+            # A value that is only a reference keeps the referenced object's type
+            return inputs[match.group(1)] if match.group(1) else outputs[match.group(2)]
+        return _REF.sub(lambda m: str(inputs[m.group(1)] if m.group(1) else outputs[m.group(2)]), value)
+    if isinstance(value, dict):
+        return {k: _substitute(v, inputs, outputs) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_substitute(v, inputs, outputs) for v in value]
+    return value
+
+
+def _parse_step(sid: str, raw: Any) -> Step:
+    if not isinstance(raw, dict):
+        raise PipelineError(f"step '{sid}': expected a mapping, got {raw!r}")
+    unknown = set(raw) - {"workflow", "params", "needs", "on_error", "retries", "default"}
+    if unknown:
+        raise PipelineError(f"step '{sid}': unknown keys {', '.join(sorted(unknown))}")
+    workflow = raw.get("workflow", sid)
+    params = raw.get("params") or {}
+    needs = raw.get("needs") or []
+    if isinstance(needs, str):
+        needs = [needs]
+    on_error = raw.get("on_error", "fail")
+    retries = raw.get("retries", 0)
+    if not isinstance(workflow, str):
+        raise PipelineError(f"step '{sid}': 'workflow' must be a workflow name")
+    if not isinstance(params, dict):
+        raise PipelineError(f"step '{sid}': 'params' must be a mapping")
+    if not isinstance(needs, list) or not all(isinstance(n, str) for n in needs):
+        raise PipelineError(f"step '{sid}': 'needs' must be a list of step ids")
+    if on_error not in ON_ERROR:
+        raise PipelineError(f"step '{sid}': on_error must be one of {', '.join(ON_ERROR)}, got {on_error!r}")
+    if not isinstance(retries, int) or isinstance(retries, bool) or retries < 0:
+        raise PipelineError(f"step '{sid}': retries must be a non-negative integer")
+    return Step(sid, workflow, params, list(needs), on_error, retries, raw.get("default"))
+
+
+def parse_pipeline(data: Any, name: str = "pipeline") -> Pipeline:
+    """Build a Pipeline from parsed YAML; references and dependencies are checked here."""
+    if not isinstance(data, dict) or not isinstance(data.get("steps"), dict) or not data["steps"]:
+        raise PipelineError("a pipeline needs a 'steps' mapping of step id to step")
+    params = data.get("params") or {}
+    if not isinstance(params, dict):
+        raise PipelineError("'params' must be a mapping of pipeline inputs")
+    steps = {str(sid): _parse_step(str(sid), raw) for sid, raw in data["steps"].items()}
+    for step in steps.values():
+        step_refs: Set[str] = set()
+        param_refs: Set[str] = set()
+        _references(step.params, step_refs, param_refs)
+        missing = param_refs - set(params)
+        if missing:
+            raise PipelineError(f"step '{step.id}': unknown pipeline param(s) {', '.join(sorted(missing))}")
+        unknown = (step_refs | set(step.needs)) - set(steps)
+        if unknown:
+            raise PipelineError(f"step '{step.id}': unknown step(s) {', '.join(sorted(unknown))}")
+        if step.id in step_refs | set(step.needs):
+            raise PipelineError(f"step '{step.id}' depends on itself")
+        # Referencing a step's output implies waiting for it
+        step.needs = sorted(set(step.needs) | step_refs)
+    outputs = data.get("output") or []
+    if isinstance(outputs, str):
+        outputs = [outputs]
+    if not isinstance(outputs, list) or any(o not in steps for o in outputs):
+        raise PipelineError("'output' must name one or more steps")
+    if not outputs:
+        needed = {n for step in steps.values() for n in step.needs}
+        outputs = [sid for sid in steps if sid not in needed]
+    pipeline = Pipeline(name=str(data.get("name") or name), steps=steps, params=dict(params), outputs=outputs)
+    pipeline.order()
+    return pipeline
+
+
+def load_pipeline(path: Path) -> Pipeline:
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            data = yaml.load(f, Loader=_YAML_LOADER)
+    except OSError as e:
+        raise PipelineError(f"{path}: {e.strerror or e}") from e
+    except yaml.YAMLError as e:
+        raise PipelineError(f"{path}: invalid YAML: {e}") from e
+    return parse_pipeline(data, name=path.stem)
+
+
+def check_pipeline(pipeline: Pipeline, inputs: Dict[str, Any]) -> Dict[str, Workflow]:
+    """Resolve every step's workflow and check its literal params before anything runs."""
+    problems: List[str] = []
+    workflows: Dict[str, Workflow] = {}
+    unknown_inputs = set(inputs) - set(pipeline.params)
+    if unknown_inputs:
+        problems.append(f"unknown pipeline param(s) {', '.join(sorted(unknown_inputs))}")
+    for sid, step in pipeline.steps.items():
+        wf = get_workflow(step.workflow)
+        if wf is None:
+            problems.append(f"step '{sid}': workflow '{step.workflow}' not found")
+            continue
+        workflows[sid] = wf
+        literal = {k: v for k, v in step.params.items() if not _REF.search(str(v))}
+        try:
+            wf.coerce_params(literal, partial=True)
+        except ParamError as e:
+            problems.append(f"step '{sid}': {e}")
+            continue
+        missing = set(wf.schema.missing(step.params))
+        if missing:
+            problems.append(f"step '{sid}': missing required param(s) {', '.join(sorted(missing))}")
+    if problems:
+        raise PipelineError("\n".join(problems))
+    return workflows
+
+
+async def run_pipeline_async(
+    runtime: WorkflowRuntime,
+    pipeline: Pipeline,
+    inputs: Optional[Dict[str, Any]] = None,
+    cache_mode: str = "use",
+    on_step: Optional[Callable[[StepResult], None]] = None,
+) -> Dict[str, StepResult]:
+    """Run every step once its dependencies are done; independent steps run concurrently.
+
+    Steps with the same workflow and params share one run. A failing step with
+    on_error=fail cancels the steps still running and skips the rest.
+    """
+    workflows = check_pipeline(pipeline, inputs or {})
+    values = {**pipeline.params, **(inputs or {})}
+    outputs: Dict[str, Any] = {}
+    results: Dict[str, StepResult] = {}
+    shared: Dict[str, "asyncio.Future[Any]"] = {}
+    tasks: Dict[str, "asyncio.Task[None]"] = {}
+    failed = asyncio.Event()
+
+    def _finish(result: StepResult) -> None:
+        results[result.id] = result
+        if on_step is not None:
+            on_step(result)
+
+    async def _attempts(step: Step, wf: Workflow, params: Dict[str, Any]) -> Any:
+        for attempt in range(step.retries + 1):
+            try:
+                return await runtime.run_async(wf, params, cache_mode), attempt + 1
+            except Exception:
+                if attempt == step.retries:
+                    raise
+
+    async def _run(step: Step) -> None:
+        wf = workflows[step.id]
+        if step.needs:
+            await asyncio.gather(*(tasks[n] for n in step.needs), return_exceptions=True)
+        blocked = [n for n in step.needs if results[n].status != "ok"]
+        if blocked or failed.is_set():
+            reason = f"{', '.join(blocked)} did not succeed" if blocked else "pipeline failed"
+            _finish(StepResult(step.id, step.workflow, "skipped", error=reason))
+            return
+        start = time.perf_counter()
+        try:
+            params = wf.coerce_params(_substitute(step.params, values, outputs))
+            key = cache_key(wf.name, params, wf.func)
+            reused = key in shared
+            if not reused:
+                shared[key] = asyncio.ensure_future(_attempts(step, wf, params))
+            output, attempts = await asyncio.shield(shared[key])
+        except asyncio.CancelledError:
+            _finish(StepResult(step.id, step.workflow, "cancelled", seconds=time.perf_counter() - start))
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if step.on_error == "ignore":
+                outputs[step.id] = step.default
+                _finish(StepResult(step.id, step.workflow, "ok", step.default, error, time.perf_counter() - start))
+                return
+            _finish(StepResult(step.id, step.workflow, "error", error=error, seconds=time.perf_counter() - start))
+            if step.on_error == "fail":
+                failed.set()
+                for sid, task in tasks.items():
+                    if sid != step.id and not task.done():
+                        task.cancel()
+            return
+        outputs[step.id] = output
+        _finish(StepResult(step.id, step.workflow, "ok", output, None, time.perf_counter() - start, attempts, reused))
+
+    for sid in pipeline.order():
+        tasks[sid] = asyncio.ensure_future(_run(pipeline.steps[sid]))
+    await asyncio.gather(*tasks.values(), return_exceptions=True)
+    for future in shared.values():
+        if not future.done():
+            future.cancel()
+    # Steps cancelled before they started report as skipped
+    for sid, step in pipeline.steps.items():
+        if sid not in results:
+            _finish(StepResult(sid, step.workflow, "skipped", error="pipeline failed"))
+    return {sid: results[sid] for sid in pipeline.order()}
+
+
+def run_pipeline(
+    pipeline: Pipeline,
+    inputs: Optional[Dict[str, Any]] = None,
+    cache_mode: str = "use",
+    on_step: Optional[Callable[[StepResult], None]] = None,
+    runtime: Optional[WorkflowRuntime] = None,
+) -> Dict[str, StepResult]:
+    runtime = runtime or get_runtime()
+    return runtime.call(run_pipeline_async(runtime, pipeline, inputs, cache_mode, on_step))
@@ -0,0 +1,419 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+_logger = logging.getLogger("agnocli")
+
+SCOPES = ("process", "session", "run")
+
+
+class ResourceError(LookupError):
+    """A workflow asked for a resource that is not registered."""
+
+
+class ResourceRef:
+    """Default value marking a workflow parameter as injected: `agent: Agent = resource()`."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: Optional[str] = None):
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f"resource({self.name!r})" if self.name else "resource()"
+
+
+def resource(name: Optional[str] = None) -> Any:
+    """Inject the resource `name` (default: the parameter's name) into a workflow parameter.
+
+    Injected parameters are not workflow params: they cannot be passed with --arg.
+    """
+    return ResourceRef(name)
+
+
+class Resource:
+    __slots__ = ("name", "factory", "scope", "pool", "teardown", "reset")
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[..., Any],
+        scope: str = "process",
+        pool: Optional[int] = None,
+        teardown: Optional[Callable[[Any], None]] = None,
+        reset: Optional[Callable[[Any], None]] = None,
+    ):
+        self.name = name
+        # A plain factory, or a generator that yields the value and cleans up after the yield
+        self.factory = factory
+        self.scope = scope
+        # None: one instance shared by concurrent runs; N: up to N instances, one run each
+        self.pool = pool
+        self.teardown = teardown
+        # Called on a pooled instance when a run gives it back, before the next run gets it
+        self.reset = reset
+
+    def create(self) -> Tuple[Any, Optional[Callable[[], None]]]:
+        """(value, finalizer).
+
+        Factory parameters defaulting to resource() are leased for the life of the instance.
+        """
+        refs = resource_params(self.factory)
+        if not refs:
+            return self._build({})
+        creating = _creating()
+        creating.append(self.name)
+        lease = _Lease(refs)
+        try:
+            deps = lease.acquire()
+            value, finalizer = self._build(deps)
+        except BaseException:
+            lease.release()
+            raise
+        finally:
+            creating.pop()
+        return value, functools.partial(_finalize_then, finalizer, lease.release)
+
+    def _build(self, deps: Dict[str, Any]) -> Tuple[Any, Optional[Callable[[], None]]]:
+        if inspect.isgeneratorfunction(self.factory):
+            gen = self.factory(**deps)
+            value = next(gen)
+            return value, functools.partial(next, gen, None)
+        value = self.factory(**deps)
+        if self.teardown is not None:
+            return value, functools.partial(self.teardown, value)
+        return value, None
+
+    def __repr__(self) -> str:
+        return f"Resource(name={self.name!r}, scope={self.scope!r}, pool={self.pool!r})"
+
+
+def _finalize_then(finalizer: Optional[Callable[[], None]], after: Callable[[], None]) -> None:
+    try:
+        if finalizer is not None:
+            finalizer()
+    finally:
+        after()
+
+
+# Names of the resources this thread is building, to report dependency cycles
+_CREATING = threading.local()
+
+
+def _creating() -> List[str]:
+    names = getattr(_CREATING, "names", None)
+    if names is None:
+        names = _CREATING.names = []
+    return names
+
+_RESOURCES: Dict[str, Resource] = {}
+_RESOURCES_LOCK = threading.Lock()
+
+
+def register_resource(
+    name: Optional[str] = None,
+    scope: str = "process",
+    pool: Optional[int] = None,
+    teardown: Optional[Callable[[Any], None]] = None,
+    reset: Optional[Callable[[Any], None]] = None,
+):
+    """Register a factory for a value workflows can share instead of rebuilding per run.
+
+    scope: "process" (lives until exit), "session" (one TUI session or CLI
+    command) or "run" (created and torn down around each run). Resources that
+    are not thread-safe should set `pool` so each run gets an instance of its own;
+    `reset` clears a pooled instance's per-run state when it goes back to the pool.
+    The factory may itself take `resource()` parameters.
+    """
+    if scope not in SCOPES:
+        raise ValueError(f"scope must be one of {SCOPES}, not {scope!r}")
+    if pool is not None and pool < 1:
+        raise ValueError(f"pool must be at least 1, not {pool!r}")
+
+    def decorator(factory: Callable[..., Any]):
+        res = Resource(name or factory.__name__, factory, scope=scope, pool=pool, teardown=teardown, reset=reset)
+        # Re-registering (e.g. a hot reload) replaces the definition; cached
+        # instances of the old one are dropped the next time they are looked up
+        with _RESOURCES_LOCK:
+            _RESOURCES[res.name] = res
+        return factory
+
+    return decorator
+
+
+def get_resource(name: str) -> Optional[Resource]:
+    return _RESOURCES.get(name)
+
+
+def list_resources() -> Dict[str, Resource]:
+    return dict(_RESOURCES)
+
+
+def resource_params(func: Callable[..., Any]) -> Dict[str, str]:
+    """Parameter name -> resource name for parameters defaulting to resource()."""
+    try:
+        sig = inspect.signature(func)
+    except (ValueError, TypeError):
+        return {}
+    return {
+        p.name: p.default.name or p.name for p in sig.parameters.values() if isinstance(p.default, ResourceRef)
+    }
+
+
+_UNSET = object()
+
+
+class _Holder:
+    """The instances of one resource within one scope."""
+
+    def __init__(self, res: Resource):
+        self.resource = res
+        self._lock = threading.Lock()
+        self._shared: Any = _UNSET
+        self._idle: List[Any] = []
+        # id(value) -> (value, finalizer) for every live instance
+        self._live: Dict[int, Tuple[Any, Optional[Callable[[], None]]]] = {}
+        self._slots = threading.BoundedSemaphore(res.pool) if res.pool else None
+        self._closed = False
+
+    def _create(self) -> Any:
+        value, finalizer = self.resource.create()
+        with self._lock:
+            self._live[id(value)] = (value, finalizer)
+        return value
+
+    def acquire(self) -> Any:
+        if self._slots is None:
+            with self._lock:
+                if self._shared is not _UNSET:
+                    return self._shared
+                # Created under the lock so concurrent first runs build it once
+                value, finalizer = self.resource.create()
+                self._live[id(value)] = (value, finalizer)
+                self._shared = value
+                return value
+        # Blocks while all pooled instances are leased
+        self._slots.acquire()
+        try:
+            with self._lock:
+                if self._idle:
+                    return self._idle.pop()
+            return self._create()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, value: Any) -> None:
+        if self._slots is None:
+            return
+        reusable = not self._closed
+        if reusable and self.resource.reset is not None:
+            try:
+                self.resource.reset(value)
+            except Exception:
+                # Never hand a half-reset instance to the next run
+                _logger.exception("Reset of resource '%s' failed", self.resource.name)
+                reusable = False
+        with self._lock:
+            reusable = reusable and not self._closed
+            if reusable:
+                self._idle.append(value)
+        if not reusable:
+            self._finalize(value)
+        self._slots.release()
+
+    def _finalize(self, value: Any) -> None:
+        with self._lock:
+            _, finalizer = self._live.pop(id(value), (value, None))
+        if finalizer is None:
+            return
+        try:
+            finalizer()
+        except Exception:
+            _logger.exception("Teardown of resource '%s' failed", self.resource.name)
+
+    def close(self) -> None:
+        """Tear down idle instances now; leased pooled instances when they are released."""
+        with self._lock:
+            self._closed = True
+            values = list(self._idle)
+            self._idle.clear()
+            if self._shared is not _UNSET:
+                values.append(self._shared)
+                self._shared = _UNSET
+        for value in reversed(values):
+            self._finalize(value)
+
+
+class ResourceScope:
+    def __init__(self, kind: str):
+        self.kind = kind
+        self._holders: Dict[str, _Holder] = {}
+        self._lock = threading.Lock()
+
+    def holder(self, res: Resource) -> _Holder:
+        with self._lock:
+            old = self._holders.get(res.name)
+            if old is not None and old.resource is res:
+                return old
+            holder = self._holders[res.name] = _Holder(res)
+        if old is not None:
+            old.close()
+        return holder
+
+    def close(self) -> None:
+        with self._lock:
+            holders = list(self._holders.values())
+            self._holders.clear()
+        # Last created first, so resources built from others go before them
+        for holder in reversed(holders):
+            holder.close()
+
+
+_PROCESS = ResourceScope("process")
+_SESSION: contextvars.ContextVar[Optional[ResourceScope]] = contextvars.ContextVar("agnocli_session", default=None)
+
+
+@contextmanager
+def resource_session() -> Iterator[ResourceScope]:
+    """Session-scoped resources used in this context are torn down on exit.
+
+    Outside any session (e.g. in `serve` or a process worker) they live as long as the process.
+    """
+    scope = ResourceScope("session")
+    token = _SESSION.set(scope)
+    try:
+        yield scope
+    finally:
+        _SESSION.reset(token)
+        scope.close()
+
+
+def close_resources() -> None:
+    """Tear down process-scoped resources."""
+    _PROCESS.close()
+
+
+class _Lease:
+    def __init__(self, refs: Dict[str, str]):
+        self.refs = refs
+        self._run = ResourceScope("run")
+        self._held: List[Tuple[_Holder, Any]] = []
+
+    def _scope(self, res: Resource) -> ResourceScope:
+        if res.scope == "run":
+            return self._run
+        if res.scope == "session":
+            return _SESSION.get() or _PROCESS
+        return _PROCESS
+
+    def acquire(self) -> Dict[str, Any]:
+        values: Dict[str, Any] = {}
+        try:
+            for param, name in self.refs.items():
+                res = get_resource(name)
+                if res is None:
+                    raise ResourceError(f"Resource '{name}' is not registered")
+                creating = _creating()
+                if name in creating:
+                    # Checked before the holder's lock, which the outer factory still holds
+                    raise ResourceError(f"Resources depend on each other: {' -> '.join(creating + [name])}")
+                holder = self._scope(res).holder(res)
+                values[param] = holder.acquire()
+                self._held.append((holder, values[param]))
+        except BaseException:
+            self.release()
+            raise
+        return values
+
+    def release(self) -> None:
+        held, self._held = self._held, []
+        for holder, value in reversed(held):
+            holder.release(value)
+        self._run.close()
+
+
+@contextmanager
+def leased(refs: Dict[str, str]) -> Iterator[Dict[str, Any]]:
+    lease = _Lease(refs)
+    values = lease.acquire()
+    try:
+        yield values
+    finally:
+        lease.release()
+
+
+@asynccontextmanager
+async def aleased(refs: Dict[str, str]) -> AsyncIterator[Dict[str, Any]]:
+    # Factories and exhausted pools block, so leasing happens off the event loop
+    loop = asyncio.get_running_loop()
+    lease = _Lease(refs)
+    pending = loop.run_in_executor(None, contextvars.copy_context().run, lease.acquire)
+    try:
+        values = await asyncio.shield(pending)
+    except asyncio.CancelledError:
+        pending.add_done_callback(lambda f: f.exception() is None and lease.release())
+        raise
+    try:
+        yield values
+    finally:
+        await loop.run_in_executor(None, lease.release)
+
+
+def _call(func, refs, /, *args, **kwargs):
+    with leased(refs) as values:
+        return func(*args, **kwargs, **values)
+
+
+def _iterate(func, refs, /, *args, **kwargs):
+    with leased(refs) as values:
+        yield from func(*args, **kwargs, **values)
+
+
+async def _acall(func, refs, /, *args, **kwargs):
+    async with aleased(refs) as values:
+        return await func(*args, **kwargs, **values)
+
+
+async def _aiterate(func, refs, /, *args, **kwargs):
+    async with aleased(refs) as values:
+        async for chunk in func(*args, **kwargs, **values):
+            yield chunk
+
+
+def inject(func: Callable[..., Any], refs: Dict[str, str]) -> Callable[..., Any]:
+    """func with the resources in `refs` leased for each call (or iteration).
+
+    The result is picklable whenever func is, so it can run in a process worker.
+    """
+    if not refs:
+        return func
+    if inspect.isasyncgenfunction(func):
+        wrapper = _aiterate
+    elif asyncio.iscoroutinefunction(func):
+        wrapper = _acall
+    elif inspect.isgeneratorfunction(func):
+        wrapper = _iterate
+    else:
+        wrapper = _call
+    return functools.partial(wrapper, func, refs)
+
+
+def _reset_in_child() -> None:
+    # Instances built before a fork (HTTP clients, sockets) belong to the parent
+    global _PROCESS
+    _PROCESS = ResourceScope("process")
+
+
+atexit.register(close_resources)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_in_child)
@@ -1,9 +1,40 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Any, Dict
+import atexit
+import concurrent.futures
+import contextvars
+import functools
+import hashlib
+import inspect
+import multiprocessing.util
+import pickle
+import queue
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, Optional, Tuple
 
-from .workflows import Workflow
+from .cache import cache_key, get_result_cache, is_miss
+from .discovery import discover_modules
+from .logging_setup import run_scope
+from .resources import close_resources, inject
+from .store import RunRecord, encode_params, get_recorder
+from .throughput import StreamTimer, UsageCollector, collect_usage
+from .workflows import EXECUTOR_KINDS, Workflow
+
+
+class WorkflowPickleError(TypeError):
+    """A workflow, its params or its result cannot cross a process boundary."""
+
+
+class WorkflowTimeout(TimeoutError):
+    """A workflow run exceeded its timeout and was cancelled."""
+
+    def __init__(self, wf: Workflow, timeout: float):
+        super().__init__(f"Workflow '{wf.name}' timed out after {timeout:g}s")
+        self.workflow = wf.name
+        self.timeout = timeout
 
 
 async def _maybe_await(result):
@@ -12,18 +43,649 @@ async def _maybe_await(result):
     return result
 
 
-async def run_workflow_async(wf: Workflow, params: Dict[str, Any]) -> Any:
-    fn = wf.func
-    if asyncio.iscoroutinefunction(fn):
+async def run_workflow_async(
+    wf: Workflow,
+    params: Dict[str, Any],
+    executor: Optional[Executor] = None,
+    cache_mode: str = "use",
+    timeout: Optional[float] = None,
+) -> Any:
+    """Run a workflow; cache_mode is "use", "off" or "refresh" for cache=True workflows.
+
+    Streaming workflows are drained and their chunks joined into one string. With
+    a timeout, an overrunning run is cancelled and WorkflowTimeout is raised; sync
+    workflows then run on their own thread so a hung call cannot hold a pool worker.
+    """
+    if wf.streaming:
+        parts = [str(chunk) async for chunk in stream_workflow_async(wf, params, executor, cache_mode, timeout)]
+        return "".join(parts)
+    recorder = get_recorder()
+    with run_scope(wf.name), collect_usage() as usage:
+        if recorder is None:
+            result, cached = await _with_timeout(wf, _run_cached(wf, params, executor, cache_mode, timeout), timeout)
+            if not cached:
+                usage.add_output(result)
+            return result
+        started = time.time()
+        try:
+            result, cached = await _with_timeout(wf, _run_cached(wf, params, executor, cache_mode, timeout), timeout)
+        except BaseException as e:
+            recorder.record(_run_record(wf, params, started, error=e, usage=usage))
+            raise
+        if not cached:
+            usage.add_output(result)
+    recorder.record(_run_record(wf, params, started, cached=cached, usage=usage), result)
+    return result
+
+
+async def _with_timeout(wf: Workflow, coro: Awaitable[Any], timeout: Optional[float]) -> Any:
+    if timeout is None:
+        return await coro
+    try:
+        return await asyncio.wait_for(coro, timeout)
+    except asyncio.TimeoutError:
+        raise WorkflowTimeout(wf, timeout) from None
+
+
+async def _run_cached(
+    wf: Workflow, params: Dict[str, Any], executor: Optional[Executor], cache_mode: str, timeout: Optional[float] = None
+) -> Tuple[Any, bool]:
+    """Returns (result, was_cache_hit)."""
+    isolate = timeout is not None
+    cache = get_result_cache() if wf.cache and cache_mode != "off" else None
+    if cache is None:
+        return await _call_workflow(wf, params, executor, isolate), False
+    key = cache_key(wf.name, params, wf.func)
+    if cache_mode != "refresh":
+        hit = cache.get(wf.name, key)
+        if not is_miss(hit):
+            return hit, True
+    result = await _call_workflow(wf, params, executor, isolate)
+    cache.put(wf.name, key, result, ttl=wf.cache_ttl)
+    return result, False
+
+
+def _run_record(
+    wf: Workflow,
+    params: Dict[str, Any],
+    started: float,
+    error: Optional[BaseException] = None,
+    cached: bool = False,
+    usage: Optional[UsageCollector] = None,
+) -> RunRecord:
+    if error is None:
+        status = "ok"
+    elif isinstance(error, WorkflowTimeout):
+        status = "timeout"
+    elif isinstance(error, (asyncio.CancelledError, KeyboardInterrupt, GeneratorExit)):
+        status = "cancelled"
+    else:
+        status = "error"
+    return RunRecord(
+        workflow=wf.name,
+        params=encode_params(params),
+        started=started,
+        finished=time.time(),
+        status=status,
+        error=f"{type(error).__name__}: {error}" if status in ("error", "timeout") else None,
+        cached=cached,
+        llm=usage.usage() if usage else [],
+    )
+
+
+_STREAM_END = object()
+
+
+async def stream_workflow_async(
+    wf: Workflow,
+    params: Dict[str, Any],
+    executor: Optional[Executor] = None,
+    cache_mode: str = "use",
+    timeout: Optional[float] = None,
+) -> AsyncIterator[Any]:
+    """Yield a workflow's output as it is produced.
+
+    Generator workflows (sync or async) yield each chunk; other workflows yield
+    their whole result once. A cached result is yielded as a single chunk. The
+    timeout covers the whole stream, not each chunk.
+    """
+    if not wf.streaming:
+        yield await run_workflow_async(wf, params, executor, cache_mode, timeout)
+        return
+    recorder = get_recorder()
+    started = time.time()
+    cache = get_result_cache() if wf.cache and cache_mode != "off" else None
+    key = cache_key(wf.name, params, wf.func) if cache is not None else ""
+    if cache is not None and cache_mode != "refresh":
+        hit = cache.get(wf.name, key)
+        if not is_miss(hit):
+            if recorder is not None:
+                recorder.record(_run_record(wf, params, started, cached=True), hit)
+            yield hit
+            return
+
+    parts = []
+    size = 0
+    digest = hashlib.sha256()
+    if inspect.isasyncgenfunction(wf.func):
+        chunks = inject(wf.func, wf.resources)(**params)
+    else:
+        chunks = _iterate_in_executor(wf, params, executor, isolate=timeout is not None)
+    if timeout is not None:
+        chunks = _with_deadline(wf, chunks, timeout)
+    with collect_usage() as usage:
+        timer = StreamTimer(usage)
+        try:
+            async for chunk in chunks:
+                timer.chunk(chunk)
+                if cache is not None:
+                    parts.append(str(chunk))
+                if recorder is not None:
+                    # Hash as we go so the joined text never has to be built for history
+                    text = str(chunk)
+                    size += len(text)
+                    digest.update(text.encode("utf-8", "replace"))
+                yield chunk
+        except BaseException as e:
+            timer.finish()
+            if recorder is not None:
+                recorder.record(_run_record(wf, params, started, error=e, usage=usage))
+            raise
+        timer.finish()
+    if recorder is not None:
+        record = _run_record(wf, params, started, usage=usage)
+        record.result_size, record.result_hash = size, digest.hexdigest()[:16]
+        recorder.record(record)
+    if cache is not None:
+        cache.put(wf.name, key, "".join(parts), ttl=wf.cache_ttl)
+
+
+async def _with_deadline(wf: Workflow, chunks: AsyncIterator[Any], timeout: float) -> AsyncIterator[Any]:
+    loop = asyncio.get_event_loop()
+    deadline = loop.time() + timeout
+    iterator = chunks.__aiter__()
+    try:
+        while True:
+            try:
+                chunk = await asyncio.wait_for(iterator.__anext__(), max(0.0, deadline - loop.time()))
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                raise WorkflowTimeout(wf, timeout) from None
+            yield chunk
+    finally:
+        await iterator.aclose()
+
+
+def _run_isolated(loop: asyncio.AbstractEventLoop, fn: Callable[[], Any]) -> "asyncio.Future[Any]":
+    """Run fn on a dedicated daemon thread.
+
+    If the caller gives up (timeout, Ctrl-C) a hung call keeps only this thread
+    busy, never a pool worker, and does not block interpreter exit.
+    """
+    future = loop.create_future()
+
+    def _settle(result: Any, error: Optional[BaseException]) -> None:
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _target():
+        try:
+            outcome = (fn(), None)
+        except BaseException as e:
+            outcome = (None, e)
+        try:
+            loop.call_soon_threadsafe(_settle, *outcome)
+        except RuntimeError:
+            # The loop is gone; nobody is waiting any more
+            pass
+
+    threading.Thread(target=_target, name="agnocli-isolated", daemon=True).start()
+    return future
+
+
+async def _iterate_in_executor(
+    wf: Workflow, params: Dict[str, Any], executor: Optional[Executor], isolate: bool = False
+) -> AsyncIterator[Any]:
+    # Generators cannot cross process boundaries; iterate them on a thread
+    if isinstance(executor, ProcessPoolExecutor):
+        executor = None
+    loop = asyncio.get_event_loop()
+    chunks: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+    ctx = contextvars.copy_context()
+    fn = inject(wf.func, wf.resources)
+
+    def _pump():
+        try:
+            with run_scope(wf.name):
+                for chunk in fn(**params):
+                    loop.call_soon_threadsafe(chunks.put_nowait, (chunk, None))
+                    if stop.is_set():
+                        break
+        except BaseException as e:
+            loop.call_soon_threadsafe(chunks.put_nowait, (_STREAM_END, e))
+            return
+        loop.call_soon_threadsafe(chunks.put_nowait, (_STREAM_END, None))
+
+    if isolate:
+        pump = _run_isolated(loop, lambda: ctx.run(_pump))
+    else:
+        pump = loop.run_in_executor(executor, ctx.run, _pump)
+    try:
+        while True:
+            chunk, error = await chunks.get()
+            if chunk is _STREAM_END:
+                if error is not None:
+                    raise error
+                break
+            yield chunk
+    finally:
+        # Tell the generator thread to stop early if the consumer went away
+        stop.set()
+        if pump.done():
+            pump.result()
+
+
+async def _call_workflow(wf: Workflow, params: Dict[str, Any], executor: Optional[Executor], isolate: bool = False) -> Any:
+    fn = inject(wf.func, wf.resources)
+    if asyncio.iscoroutinefunction(wf.func):
         return await fn(**params)
     else:
         loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, lambda: fn(**params))
+        if isinstance(executor, ProcessPoolExecutor):
+            # Must be picklable: no lambdas or contexts across the process boundary
+            call = functools.partial(fn, **params)
+            _check_picklable(wf, call)
+            try:
+                return await loop.run_in_executor(executor, call)
+            except (pickle.PicklingError, AttributeError, TypeError) as e:
+                # Failures to send the result back are raised with the worker's traceback as cause
+                if "_sendback_result" not in str(e.__cause__ or ""):
+                    raise
+                raise WorkflowPickleError(f"Workflow '{wf.name}' returned a result that cannot be pickled: {e}") from e
+        # Carry context variables (e.g. the daemon's output sink) into the worker thread
+        ctx = contextvars.copy_context()
+        if isolate:
+            return await _run_isolated(loop, lambda: ctx.run(fn, **params))
+        return await loop.run_in_executor(executor, lambda: ctx.run(fn, **params))
 
 
-def run_workflow(wf: Workflow, params: Dict[str, Any]) -> Any:
+def _check_picklable(wf: Workflow, call: functools.partial) -> None:
     try:
-        return asyncio.run(run_workflow_async(wf, params))
-    except RuntimeError:
-        # Already in an event loop (e.g., notebook); fallback
-        return asyncio.get_event_loop().create_task(run_workflow_async(wf, params))
+        pickle.dumps(wf.func)
+    except Exception as e:
+        raise WorkflowPickleError(
+            f"Workflow '{wf.name}' cannot run in a process pool: its function must be importable "
+            f"as a unique module-level name ({e}). Use executor='thread' instead."
+        ) from e
+    try:
+        pickle.dumps(call.keywords)
+    except Exception as e:
+        raise WorkflowPickleError(f"Workflow '{wf.name}' params cannot be pickled for a process pool: {e}") from e
+
+
+def _init_process_worker(modules: Tuple[str, ...]) -> None:
+    # Pay for the heavy workflow imports once per worker, not per job; a broken
+    # module only fails the workflows that live in it
+    discover_modules(modules)
+    # Workers exit without running atexit hooks
+    multiprocessing.util.Finalize(None, close_resources, exitpriority=10)
+
+
+class WorkflowRuntime:
+    """One event loop (on a background thread) plus reusable executors.
+
+    Sync workflows run in a thread pool, or in a process pool when the workflow
+    (or the runtime default) asks for executor="process". Process workers import
+    `preload` modules once at startup. Per-workflow timeouts and concurrency
+    limits (or the defaults given here) are enforced on every run.
+
+    `run` blocks the calling thread, `run_async` can be awaited from any loop, and
+    `submit` returns a concurrent Future. Safe to use from multiple threads.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        executor: str = "thread",
+        process_workers: Optional[int] = None,
+        preload: Iterable[str] = (),
+        default_timeout: Optional[float] = None,
+        default_max_concurrency: Optional[int] = None,
+    ):
+        if executor not in EXECUTOR_KINDS:
+            raise ValueError(f"executor must be one of {EXECUTOR_KINDS}, not {executor!r}")
+        self.max_workers = max_workers
+        self.executor_kind = executor
+        self.process_workers = process_workers
+        self.preload = tuple(m for m in preload if m)
+        self.default_timeout = default_timeout
+        self.default_max_concurrency = default_max_concurrency
+        # Only touched on the loop thread
+        self._limits: Dict[Tuple[str, int], asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self) -> "WorkflowRuntime":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self.start()
+
+    @property
+    def executor(self) -> Executor:
+        self.start()
+        assert self._executor is not None
+        return self._executor
+
+    def process_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("WorkflowRuntime has been shut down")
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.process_workers,
+                    initializer=_init_process_worker,
+                    initargs=(self.preload,),
+                )
+            return self._process_pool
+
+    def recycle_process_pool(self) -> None:
+        """Start fresh process workers on next use (e.g. after a hot reload).
+
+        Jobs already submitted finish on the old workers.
+        """
+        with self._lock:
+            old, self._process_pool = self._process_pool, None
+        if old is not None:
+            old.shutdown(wait=False)
+
+    def _kill_process_pool(self, pool: ProcessPoolExecutor) -> None:
+        # A worker stuck in a timed-out run cannot be cancelled, and would block
+        # exit; replace the pool and terminate its workers (other jobs on it fail)
+        with self._lock:
+            if self._process_pool is pool:
+                self._process_pool = None
+        processes = list((getattr(pool, "_processes", None) or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    def executor_for(self, wf: Workflow) -> Executor:
+        kind = wf.executor or self.executor_kind
+        if kind == "process" and not wf.streaming:
+            return self.process_pool()
+        return self.executor
+
+    def timeout_for(self, wf: Workflow) -> Optional[float]:
+        return wf.timeout if wf.timeout is not None else self.default_timeout
+
+    def _limit_for(self, wf: Workflow) -> Optional[asyncio.Semaphore]:
+        limit = wf.max_concurrency or self.default_max_concurrency
+        if not limit:
+            return None
+        # Keyed on the limit too, so a hot reload that changes it takes effect
+        key = (wf.name, limit)
+        semaphore = self._limits.get(key)
+        if semaphore is None:
+            semaphore = self._limits[key] = asyncio.Semaphore(limit)
+        return semaphore
+
+    async def _execute(self, wf: Workflow, params: Dict[str, Any], cache_mode: str) -> Any:
+        limit = self._limit_for(wf)
+        if limit is None:
+            return await self._execute_now(wf, params, cache_mode)
+        # Waiting for a slot does not count against the run's timeout
+        async with limit:
+            return await self._execute_now(wf, params, cache_mode)
+
+    async def _execute_now(self, wf: Workflow, params: Dict[str, Any], cache_mode: str) -> Any:
+        executor = self.executor_for(wf)
+        try:
+            return await run_workflow_async(wf, params, executor, cache_mode, self.timeout_for(wf))
+        except WorkflowTimeout:
+            if isinstance(executor, ProcessPoolExecutor):
+                self._kill_process_pool(executor)
+            raise
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("WorkflowRuntime has been shut down")
+            if self._loop is not None:
+                return self._loop
+            self._executor = self._make_thread_pool()
+            loop = asyncio.new_event_loop()
+            # Workflows calling run_in_executor(None, ...) share the same pool
+            loop.set_default_executor(self._executor)
+            ready = threading.Event()
+
+            def _serve():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=_serve, name="agnocli-runtime", daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+            return loop
+
+    def _make_thread_pool(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="agnocli-worker")
+
+    def _on_own_loop(self) -> bool:
+        try:
+            return self._loop is not None and asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def submit(self, wf: Workflow, params: Dict[str, Any], cache_mode: str = "use") -> concurrent.futures.Future:
+        return self.submit_coro(lambda: self._execute(wf, params, cache_mode))
+
+    def submit_coro(self, factory) -> concurrent.futures.Future:
+        """Schedule `factory()` on the runtime loop, in the caller's contextvars context."""
+        loop = self.start()
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        ctx = contextvars.copy_context()
+
+        def _start():
+            if future.cancelled():
+                return
+            # Creating the task inside ctx.run makes it inherit the caller's context
+            task = ctx.run(loop.create_task, factory())
+
+            def _done(t: asyncio.Task):
+                if future.done():
+                    return
+                if t.cancelled():
+                    future.cancel()
+                elif t.exception() is not None:
+                    future.set_exception(t.exception())
+                else:
+                    future.set_result(t.result())
+
+            task.add_done_callback(_done)
+            future.add_done_callback(lambda f: f.cancelled() and loop.call_soon_threadsafe(task.cancel))
+
+        loop.call_soon_threadsafe(_start)
+        return future
+
+    def run(
+        self,
+        wf: Workflow,
+        params: Dict[str, Any],
+        timeout: Optional[float] = None,
+        cache_mode: str = "use",
+    ) -> Any:
+        if self._on_own_loop():
+            raise RuntimeError("WorkflowRuntime.run() would block its own loop; use run_async()")
+        future = self.submit(wf, params, cache_mode)
+        try:
+            return future.result(timeout)
+        except (KeyboardInterrupt, concurrent.futures.TimeoutError):
+            future.cancel()
+            raise
+
+    async def run_async(self, wf: Workflow, params: Dict[str, Any], cache_mode: str = "use") -> Any:
+        if self._on_own_loop():
+            return await self._execute(wf, params, cache_mode)
+        return await asyncio.wrap_future(self.submit(wf, params, cache_mode))
+
+    def stream(self, wf: Workflow, params: Dict[str, Any], cache_mode: str = "use") -> Iterator[Any]:
+        """Iterate a workflow's output chunks from a synchronous caller."""
+        if self._on_own_loop():
+            raise RuntimeError("WorkflowRuntime.stream() would block its own loop; use stream_workflow_async()")
+        chunks: "queue.Queue[Tuple[Any, Optional[BaseException]]]" = queue.Queue()
+
+        async def _pump():
+            limit = self._limit_for(wf)
+            try:
+                if limit is not None:
+                    await limit.acquire()
+            except BaseException as e:
+                chunks.put((_STREAM_END, e))
+                raise
+            try:
+                async for chunk in stream_workflow_async(wf, params, self.executor_for(wf), cache_mode, self.timeout_for(wf)):
+                    chunks.put((chunk, None))
+            except BaseException as e:
+                chunks.put((_STREAM_END, e))
+                raise
+            finally:
+                if limit is not None:
+                    limit.release()
+            chunks.put((_STREAM_END, None))
+
+        future = self.submit_coro(_pump)
+        try:
+            while True:
+                chunk, error = chunks.get()
+                if chunk is _STREAM_END:
+                    if error is not None and not isinstance(error, asyncio.CancelledError):
+                        raise error
+                    return
+                yield chunk
+        finally:
+            if not future.done():
+                future.cancel()
+
+    def call(self, coro: Awaitable[Any]) -> Any:
+        """Run an arbitrary coroutine on the runtime loop and wait for it."""
+        future = self.submit_coro(lambda: coro)
+        try:
+            return future.result()
+        except KeyboardInterrupt:
+            future.cancel()
+            raise
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            loop, thread, executor = self._loop, self._thread, self._executor
+            process_pool = self._process_pool
+        if loop is not None:
+
+            async def _cancel_all():
+                tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+                for t in tasks:
+                    t.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+            if loop.is_running():
+                asyncio.run_coroutine_threadsafe(_cancel_all(), loop).result()
+                loop.call_soon_threadsafe(loop.stop)
+            if thread is not None:
+                thread.join()
+            loop.close()
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+        if process_pool is not None:
+            process_pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_RUNTIME: Optional[WorkflowRuntime] = None
+_RUNTIME_LOCK = threading.Lock()
+_RUNTIME_OPTIONS: Dict[str, Any] = {}
+
+
+def configure_runtime(
+    max_workers: Optional[int] = None,
+    executor: str = "thread",
+    process_workers: Optional[int] = None,
+    preload: Iterable[str] = (),
+    default_timeout: Optional[float] = None,
+    default_max_concurrency: Optional[int] = None,
+) -> None:
+    """Set options for the shared runtime; takes effect when it is first used."""
+    global _RUNTIME
+    with _RUNTIME_LOCK:
+        _RUNTIME_OPTIONS.update(
+            max_workers=max_workers,
+            executor=executor,
+            process_workers=process_workers,
+            preload=tuple(preload),
+            default_timeout=default_timeout,
+            default_max_concurrency=default_max_concurrency,
+        )
+        if _RUNTIME is not None:
+            old, _RUNTIME = _RUNTIME, None
+            old.shutdown()
+
+
+def get_runtime() -> WorkflowRuntime:
+    global _RUNTIME
+    with _RUNTIME_LOCK:
+        if _RUNTIME is None:
+            _RUNTIME = WorkflowRuntime(**_RUNTIME_OPTIONS)
+        return _RUNTIME
+
+
+@atexit.register
+def shutdown_runtime() -> None:
+    global _RUNTIME
+    with _RUNTIME_LOCK:
+        runtime, _RUNTIME = _RUNTIME, None
+    if runtime is not None:
+        runtime.shutdown(wait=False)
+
+
+def run_inline(wf: Workflow, params: Dict[str, Any]) -> Any:
+    """Run a workflow on the calling thread, bypassing the runtime, cache and history.
+
+    For profilers that only see the current thread; streamed chunks are joined.
+    """
+    fn = inject(wf.func, wf.resources)
+    if inspect.isasyncgenfunction(wf.func):
+
+        async def _drain():
+            return "".join([str(chunk) async for chunk in fn(**params)])
+
+        return asyncio.run(_drain())
+    if asyncio.iscoroutinefunction(wf.func):
+        return asyncio.run(fn(**params))
+    if wf.streaming:
+        return "".join(str(chunk) for chunk in fn(**params))
+    return fn(**params)
+
+
+def run_workflow(wf: Workflow, params: Dict[str, Any], cache_mode: str = "use") -> Any:
+    # Works from inside a running event loop too (e.g. notebooks): the workflow
+    # runs on the shared runtime's own loop and the result is returned.
+    return get_runtime().run(wf, params, cache_mode=cache_mode)
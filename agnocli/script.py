@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from .menu import WorkflowMenu, parse_command
+from .output import jsonable, routed_stdout
+from .runner import WorkflowRuntime
+from .state import set_current_workflow
+from .workflows import Workflow
+
+
+class ScriptError(Exception):
+    """A script command that cannot run; reported in its record, never prompted for."""
+
+
+def run_script(
+    lines: Iterable[str],
+    infos: Dict[str, Any],
+    menu: WorkflowMenu,
+    resolve: Callable[[str], Optional[Workflow]],
+    runtime: WorkflowRuntime,
+    emit: Callable[[Dict[str, Any]], None],
+    fail_fast: bool = False,
+    cache_mode: str = "use",
+) -> Dict[str, int]:
+    """Run TUI commands from `lines` in order, one record per command to `emit`.
+
+    Nothing is drawn and nothing waits for input: a run with missing params is
+    an error. Blank lines and lines starting with '#' are skipped. Returns
+    counts of ok/error commands.
+    """
+    counts = {"ok": 0, "error": 0}
+    menu.set_workflows(infos, len(infos))
+    for number, line in enumerate(lines, start=1):
+        text = line.strip()
+        if text.startswith("#"):
+            continue
+        command = parse_command(text, infos)
+        if command is None:
+            continue
+        if command.action == "quit":
+            break
+        record: Dict[str, Any] = {"line": number, "command": text}
+        outcome: Dict[str, Any] = {}
+        start = time.perf_counter()
+        try:
+            if command.action == "next":
+                menu.next_page()
+                outcome["result"] = {"page": menu.page + 1}
+            elif command.action == "prev":
+                menu.prev_page()
+                outcome["result"] = {"page": menu.page + 1}
+            elif command.action == "search":
+                outcome["result"] = {"matches": menu.search(command.query)}
+            elif command.action == "switch":
+                record["workflow"] = _item(menu, command.number).name
+                set_current_workflow(record["workflow"])
+            elif command.action in ("run", "select"):
+                name = command.name if command.action == "run" else _item(menu, command.number).name
+                record["workflow"] = name
+                wf = resolve(name)
+                if wf is None:
+                    raise ScriptError(f"Workflow '{name}' not found")
+                params = wf.coerce_params(command.params)
+                # Workflows that print (e.g. agno's print_response) must not corrupt the records;
+                # routed per run, so the records and other threads keep the real stdout
+                with routed_stdout(sys.stderr.write):
+                    result = runtime.run(wf, params, cache_mode=cache_mode)
+                outcome["result"] = jsonable(result)
+            elif command.action == "invalid":
+                raise ScriptError(command.error)
+            else:
+                raise ScriptError("Unknown command")
+            record["status"] = "ok"
+        except Exception as e:
+            record["status"] = "error"
+            outcome = {"error": str(e) if isinstance(e, ScriptError) else f"{type(e).__name__}: {e}"}
+        record.update(outcome)
+        record["duration"] = round(time.perf_counter() - start, 6)
+        counts[record["status"]] += 1
+        emit(record)
+        if fail_fast and record["status"] == "error":
+            break
+    return counts
+
+
+def _item(menu: WorkflowMenu, number: int) -> Any:
+    try:
+        return menu.item(number)
+    except IndexError:
+        raise ScriptError(f"No workflow number {number} ({len(menu.visible)} listed)") from None
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Fuzzy search over (name, description) pairs.
+
+    Trigrams are precomputed once, so a query only touches the postings of
+    its own trigrams instead of scanning every entry.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str]]):
+        self._names: List[str] = []
+        self._name_text: List[str] = []
+        self._full_text: List[str] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        for i, (name, description) in enumerate(entries):
+            self._names.append(name)
+            self._name_text.append(name.lower())
+            full = f"{name} {description or ''}".lower()
+            self._full_text.append(full)
+            for gram in _trigrams(full):
+                self._postings[gram].append(i)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def search(self, query: str, limit: int = 50) -> List[str]:
+        """Names ranked by relevance; exact and prefix name matches come first."""
+        q = query.strip().lower()
+        if not q:
+            return []
+        grams = _trigrams(q)
+        scores: Dict[int, float] = defaultdict(float)
+        for gram in grams:
+            for i in self._postings.get(gram, ()):
+                scores[i] += 1.0
+        if len(q) < 3:
+            # Too short for trigrams to be selective; the padded grams still find prefixes
+            for i, text in enumerate(self._full_text):
+                if q in text:
+                    scores[i] += 1.0
+        # Require a reasonable share of the query's trigrams to avoid noise
+        threshold = max(1.0, len(grams) * 0.6)
+        ranked = []
+        for i, score in scores.items():
+            name = self._name_text[i]
+            if name == q:
+                score += 100
+            elif name.startswith(q):
+                score += 50
+            elif q in name:
+                score += 25
+            elif q in self._full_text[i]:
+                score += 10
+            elif score < threshold:
+                continue
+            ranked.append((-score, name, i))
+        ranked.sort()
+        return [self._names[i] for _, _, i in ranked[:limit]]
+
+
+def paginate(items: Sequence, page: int, page_size: int) -> Tuple[int, int, int]:
+    """Clamp `page` and return (page, start, page_count)."""
+    page_size = max(1, page_size)
+    pages = max(1, -(-len(items) // page_size))
+    page = min(max(0, page), pages - 1)
+    return page, page * page_size, pages
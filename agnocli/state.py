@@ -1,22 +1,20 @@
 from __future__ import annotations
 
 import json
-from pathlib import Path
+import sqlite3
 from typing import Optional
 
 from .config import _platform_config_dir
+from .store import get_store
 
 
+# Pre-SQLite location; read once to migrate the current workflow
 STATE_FILE = _platform_config_dir() / "state.json"
 
-
-def set_current_workflow(name: str) -> None:
-    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    data = {"current_workflow": name}
-    STATE_FILE.write_text(json.dumps(data), encoding="utf-8")
+_CURRENT_KEY = "current_workflow"
 
 
-def get_current_workflow() -> Optional[str]:
+def _legacy_current_workflow() -> Optional[str]:
     try:
         if STATE_FILE.exists():
             data = json.loads(STATE_FILE.read_text(encoding="utf-8"))
@@ -24,3 +22,21 @@ def get_current_workflow() -> Optional[str]:
     except Exception:
         return None
     return None
+
+
+def set_current_workflow(name: str) -> None:
+    # A single upsert: concurrent switches cannot leave a torn file behind
+    get_store().set_state(_CURRENT_KEY, name)
+
+
+def get_current_workflow() -> Optional[str]:
+    try:
+        store = get_store()
+        value = store.get_state(_CURRENT_KEY)
+        if value is None:
+            value = _legacy_current_workflow()
+            if value is not None:
+                store.set_state(_CURRENT_KEY, value)
+        return value
+    except sqlite3.Error:
+        return _legacy_current_workflow()
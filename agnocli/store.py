@@ -0,0 +1,456 @@
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import queue
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .config import _platform_config_dir
+from .throughput import LLMUsage
+
+
+STORE_FILE = _platform_config_dir() / "agnocli.db"
+
+RUN_STATUSES = ("ok", "error", "cancelled", "timeout")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    workflow TEXT NOT NULL,
+    params TEXT,
+    started REAL NOT NULL,
+    finished REAL NOT NULL,
+    duration REAL NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    cached INTEGER NOT NULL DEFAULT 0,
+    result_size INTEGER,
+    result_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started);
+CREATE INDEX IF NOT EXISTS runs_workflow_started ON runs (workflow, started);
+CREATE INDEX IF NOT EXISTS runs_status_started ON runs (status, started);
+CREATE TABLE IF NOT EXISTS llm_usage (
+    id INTEGER PRIMARY KEY,
+    workflow TEXT NOT NULL,
+    model TEXT NOT NULL,
+    started REAL NOT NULL,
+    calls INTEGER NOT NULL,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    ttft REAL,
+    seconds REAL,
+    ttft_total REAL
+);
+CREATE INDEX IF NOT EXISTS llm_usage_workflow_started ON llm_usage (workflow, started);
+"""
+
+
+@dataclass
+class RunRecord:
+    workflow: str
+    started: float
+    finished: float
+    status: str
+    params: Optional[str] = None
+    error: Optional[str] = None
+    cached: bool = False
+    result_size: Optional[int] = None
+    result_hash: Optional[str] = None
+    id: Optional[int] = None
+    # Per-model LLM usage reported during the run
+    llm: List[LLMUsage] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        return self.finished - self.started
+
+
+@dataclass
+class LatencyStats:
+    workflow: str
+    runs: int
+    errors: int
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+
+@dataclass
+class ThroughputStats:
+    workflow: str
+    model: str
+    runs: int
+    calls: int
+    input_tokens: Optional[float]
+    output_tokens: Optional[float]
+    ttft_p50: Optional[float]
+    ttft_p95: Optional[float]
+    tps_p50: Optional[float]
+    tps_mean: Optional[float]
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    # Databases created before ttft_total was recorded
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(llm_usage)")}
+    if "ttft_total" not in columns:
+        conn.execute("ALTER TABLE llm_usage ADD COLUMN ttft_total REAL")
+
+
+def _mean(values: List[float]) -> Optional[float]:
+    return sum(values) / len(values) if values else None
+
+
+def encode_params(params: Dict[str, Any]) -> str:
+    return json.dumps(params, sort_keys=True, default=repr, ensure_ascii=False)
+
+
+def digest_result(result: Any) -> Tuple[Optional[int], Optional[str]]:
+    """Size and short sha256 of a result (bytes as-is, anything else as text)."""
+    if result is None:
+        return None, None
+    if isinstance(result, (bytes, bytearray, memoryview)):
+        data = bytes(result)
+        size = len(data)
+    else:
+        text = result if isinstance(result, str) else str(result)
+        data = text.encode("utf-8", "replace")
+        size = len(text)
+    return size, hashlib.sha256(data).hexdigest()[:16]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def _filters(
+    workflow: Optional[str], status: Optional[str], since: Optional[float], until: Optional[float]
+) -> Tuple[str, List[Any]]:
+    clauses, args = [], []
+    if workflow:
+        clauses.append("workflow = ?")
+        args.append(workflow)
+    if status:
+        clauses.append("status = ?")
+        args.append(status)
+    if since is not None:
+        clauses.append("started >= ?")
+        args.append(since)
+    if until is not None:
+        clauses.append("started < ?")
+        args.append(until)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+
+class Store:
+    """WAL-mode SQLite database for CLI state and run history.
+
+    One connection per thread; WAL lets readers and many writer processes
+    (batch jobs, cron) share the file, with busy_timeout absorbing lock waits.
+    """
+
+    def __init__(self, path: Optional[Path] = None, timeout: float = 30.0):
+        self.path = Path(path) if path else STORE_FILE
+        self.timeout = timeout
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=self.timeout, isolation_level=None)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.timeout * 1000)}")
+        with self._init_lock:
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode = WAL")
+                conn.executescript(_SCHEMA)
+                _migrate(conn)
+                self._initialized = True
+        conn.execute("PRAGMA synchronous = NORMAL")
+        self._local.conn = conn
+        return conn
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def get_state(self, key: str) -> Optional[str]:
+        row = self.connect().execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_state(self, key: str, value: str) -> None:
+        self.connect().execute(
+            "INSERT INTO state (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    def insert_runs(self, records: Iterable[RunRecord]) -> None:
+        records = list(records)
+        rows = [
+            (
+                r.workflow,
+                r.params,
+                r.started,
+                r.finished,
+                r.duration,
+                r.status,
+                r.error,
+                int(r.cached),
+                r.result_size,
+                r.result_hash,
+            )
+            for r in records
+        ]
+        if not rows:
+            return
+        usage = [
+            (r.workflow, u.model, r.started, u.calls, u.input_tokens, u.output_tokens, u.ttft, u.seconds, u.ttft_total)
+            for r in records
+            for u in r.llm
+        ]
+        conn = self.connect()
+        # One transaction per batch keeps fsyncs (and lock hold time) low
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO runs (workflow, params, started, finished, duration, status, error, cached,"
+                " result_size, result_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            if usage:
+                conn.executemany(
+                    "INSERT INTO llm_usage (workflow, model, started, calls, input_tokens, output_tokens, ttft,"
+                    " seconds, ttft_total) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    usage,
+                )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def query_runs(
+        self,
+        workflow: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 50,
+    ) -> List[RunRecord]:
+        where, args = _filters(workflow, status, since, until)
+        rows = self.connect().execute(
+            "SELECT id, workflow, params, started, finished, status, error, cached, result_size, result_hash"
+            f" FROM runs{where} ORDER BY started DESC LIMIT ?",
+            (*args, limit),
+        )
+        return [
+            RunRecord(
+                id=r[0],
+                workflow=r[1],
+                params=r[2],
+                started=r[3],
+                finished=r[4],
+                status=r[5],
+                error=r[6],
+                cached=bool(r[7]),
+                result_size=r[8],
+                result_hash=r[9],
+            )
+            for r in rows
+        ]
+
+    def latency_stats(
+        self,
+        workflow: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> List[LatencyStats]:
+        where, args = _filters(workflow, status, since, until)
+        durations: Dict[str, List[float]] = {}
+        errors: Dict[str, int] = {}
+        rows = self.connect().execute(f"SELECT workflow, duration, status FROM runs{where} ORDER BY workflow", args)
+        for name, duration, run_status in rows:
+            durations.setdefault(name, []).append(duration)
+            if run_status in ("error", "timeout"):
+                errors[name] = errors.get(name, 0) + 1
+        stats = []
+        for name, values in durations.items():
+            values.sort()
+            stats.append(
+                LatencyStats(
+                    workflow=name,
+                    runs=len(values),
+                    errors=errors.get(name, 0),
+                    mean=sum(values) / len(values),
+                    p50=percentile(values, 50),
+                    p95=percentile(values, 95),
+                    p99=percentile(values, 99),
+                    max=values[-1],
+                )
+            )
+        return stats
+
+    def throughput_stats(
+        self,
+        workflow: Optional[str] = None,
+        model: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> List[ThroughputStats]:
+        """TTFT, token counts and generation tokens/s per workflow and model."""
+        where, args = _filters(workflow, None, since, until)
+        if model:
+            where += (" AND" if where else " WHERE") + " model = ?"
+            args.append(model)
+        groups: Dict[Tuple[str, str], List[LLMUsage]] = {}
+        rows = self.connect().execute(
+            "SELECT workflow, model, calls, input_tokens, output_tokens, ttft, seconds, ttft_total"
+            f" FROM llm_usage{where} ORDER BY workflow, model",
+            args,
+        )
+        for r in rows:
+            groups.setdefault((r[0], r[1]), []).append(LLMUsage(*r[1:]))
+        stats = []
+        for (name, model_name), usages in groups.items():
+            ttfts = sorted(u.ttft for u in usages if u.ttft is not None)
+            rates = sorted(u.tokens_per_second for u in usages if u.tokens_per_second is not None)
+            stats.append(
+                ThroughputStats(
+                    workflow=name,
+                    model=model_name,
+                    runs=len(usages),
+                    calls=sum(u.calls for u in usages),
+                    input_tokens=_mean([u.input_tokens for u in usages if u.input_tokens is not None]),
+                    output_tokens=_mean([u.output_tokens for u in usages if u.output_tokens is not None]),
+                    ttft_p50=percentile(ttfts, 50) if ttfts else None,
+                    ttft_p95=percentile(ttfts, 95) if ttfts else None,
+                    tps_p50=percentile(rates, 50) if rates else None,
+                    tps_mean=_mean(rates),
+                )
+            )
+        return stats
+
+
+_STOP = object()
+
+
+class RunRecorder:
+    """Writes run records on a background thread so runs never wait on SQLite.
+
+    Records are queued and inserted in batches; `close` drains the queue (at exit).
+    """
+
+    def __init__(self, store: Store, batch_size: int = 256):
+        self.store = store
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def record(self, record: RunRecord, result: Any = None) -> None:
+        # Hashing large results happens on the writer thread, not here
+        self._ensure_thread()
+        self._queue.put((record, result))
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._write_loop, name="agnocli-history", daemon=True)
+                self._thread.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            items = [item]
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(i is _STOP for i in items)
+            records = []
+            for i in items:
+                if i is _STOP:
+                    continue
+                record, result = i
+                if result is not None and record.result_hash is None:
+                    record.result_size, record.result_hash = digest_result(result)
+                records.append(record)
+            try:
+                self.store.insert_runs(records)
+            except sqlite3.Error:
+                # History is best effort; never break a run over it
+                pass
+            for _ in items:
+                self._queue.task_done()
+            if stop:
+                self.store.close()
+                return
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+
+_STORE: Optional[Store] = None
+_RECORDER: Optional[RunRecorder] = None
+_STORE_LOCK = threading.Lock()
+
+
+def configure_history(settings: Any) -> None:
+    """Set the store location and whether runs are recorded, from HistorySettings."""
+    global _STORE, _RECORDER
+    with _STORE_LOCK:
+        if _RECORDER is not None:
+            _RECORDER.close()
+        _STORE = Store(settings.path) if settings.path else None
+        _RECORDER = RunRecorder(_default_store()) if settings.enabled else None
+
+
+def _default_store() -> Store:
+    global _STORE
+    if _STORE is None:
+        _STORE = Store()
+    return _STORE
+
+
+def get_store() -> Store:
+    with _STORE_LOCK:
+        return _default_store()
+
+
+def get_recorder() -> Optional[RunRecorder]:
+    return _RECORDER
+
+
+@atexit.register
+def _flush_history() -> None:
+    recorder = _RECORDER
+    if recorder is not None:
+        recorder.close()
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+UNKNOWN_MODEL = "unknown"
+
+
+@dataclass
+class LLMUsage:
+    """Token counts and timing of one model's calls within one run."""
+
+    model: str
+    calls: int = 0
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    # Seconds to the first token of the first call
+    ttft: Optional[float] = None
+    # Wall time of the calls, first token wait included
+    seconds: Optional[float] = None
+    # Summed first token wait of every call; None means just `ttft`
+    ttft_total: Optional[float] = None
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Generation rate: output tokens over the time after each call's first token."""
+        if not self.output_tokens or not self.seconds:
+            return None
+        waiting = self.ttft_total if self.ttft_total is not None else self.ttft
+        generating = self.seconds - (waiting or 0.0)
+        return self.output_tokens / (generating if generating > 0 else self.seconds)
+
+
+def _add(a: Optional[float], b: Optional[float]) -> Optional[float]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a + b
+
+
+def _metric(metrics: Any, *names: str) -> Any:
+    for name in names:
+        value = metrics.get(name) if isinstance(metrics, dict) else getattr(metrics, name, None)
+        if value is not None:
+            return value
+    return None
+
+
+def _total(value: Any) -> Optional[float]:
+    # agno 1.x keeps one entry per model call; 2.x a single number
+    if isinstance(value, (list, tuple)):
+        value = [v for v in value if isinstance(v, (int, float))]
+        return sum(value) if value else None
+    return value if isinstance(value, (int, float)) else None
+
+
+def _first(value: Any) -> Optional[float]:
+    if isinstance(value, (list, tuple)):
+        value = next((v for v in value if isinstance(v, (int, float))), None)
+    return value if isinstance(value, (int, float)) else None
+
+
+def usage_from_output(output: Any) -> List[LLMUsage]:
+    """LLMUsage from an agno run output (Agent or Team), or [] if it carries no metrics.
+
+    Team outputs contribute one entry per member response as well.
+    """
+    found: List[LLMUsage] = []
+    metrics = getattr(output, "metrics", None)
+    if metrics is not None and not isinstance(output, (str, bytes)):
+        calls = _metric(metrics, "time_to_first_token", "input_tokens")
+        ttfts = _metric(metrics, "time_to_first_token")
+        usage = LLMUsage(
+            model=str(getattr(output, "model", None) or UNKNOWN_MODEL),
+            calls=len(calls) if isinstance(calls, (list, tuple)) else 1,
+            input_tokens=_total(_metric(metrics, "input_tokens", "prompt_tokens")),
+            output_tokens=_total(_metric(metrics, "output_tokens", "completion_tokens")),
+            ttft=_first(ttfts),
+            seconds=_total(_metric(metrics, "duration", "time")),
+            ttft_total=_total(ttfts),
+        )
+        if usage.input_tokens is not None or usage.output_tokens is not None or usage.ttft is not None:
+            found.append(usage)
+    for member in getattr(output, "member_responses", None) or []:
+        found.extend(usage_from_output(member))
+    return found
+
+
+class UsageCollector:
+    """Gathers LLMUsage reported during one run, merged per model."""
+
+    def __init__(self):
+        # Model named by record_llm(model=...) for metrics that carry none
+        self.model: Optional[str] = None
+        self._usage: Dict[str, LLMUsage] = {}
+        self._lock = threading.Lock()
+
+    def add(self, usage: LLMUsage) -> None:
+        with self._lock:
+            current = self._usage.get(usage.model)
+            if current is None:
+                self._usage[usage.model] = LLMUsage(**vars(usage))
+                return
+            current.calls += usage.calls
+            current.input_tokens = _add(current.input_tokens, usage.input_tokens)
+            current.output_tokens = _add(current.output_tokens, usage.output_tokens)
+            current.seconds = _add(current.seconds, usage.seconds)
+            current.ttft_total = _add(
+                current.ttft_total if current.ttft_total is not None else current.ttft,
+                usage.ttft_total if usage.ttft_total is not None else usage.ttft,
+            )
+            if current.ttft is None:
+                current.ttft = usage.ttft
+
+    def add_output(self, output: Any) -> bool:
+        found = usage_from_output(output)
+        for usage in found:
+            self.add(usage)
+        return bool(found)
+
+    def usage(self) -> List[LLMUsage]:
+        with self._lock:
+            return [LLMUsage(**vars(u)) for u in self._usage.values()]
+
+    def __bool__(self) -> bool:
+        return bool(self._usage)
+
+
+_COLLECTOR: contextvars.ContextVar[Optional[UsageCollector]] = contextvars.ContextVar("agnocli_usage", default=None)
+
+
+@contextmanager
+def collect_usage() -> Iterator[UsageCollector]:
+    """Collect the LLM usage of runs in this context (and the threads they start).
+
+    Nested collectors pass what they gathered on to the enclosing one on exit.
+    """
+    parent = _COLLECTOR.get()
+    collector = UsageCollector()
+    token = _COLLECTOR.set(collector)
+    try:
+        yield collector
+    finally:
+        try:
+            _COLLECTOR.reset(token)
+        except ValueError:
+            # A stream closed from another context (e.g. by the garbage collector)
+            pass
+        if parent is not None:
+            for usage in collector.usage():
+                parent.add(usage)
+
+
+def record_llm(
+    output: Any = None,
+    *,
+    model: Optional[str] = None,
+    input_tokens: Optional[int] = None,
+    output_tokens: Optional[int] = None,
+    ttft: Optional[float] = None,
+    seconds: Optional[float] = None,
+) -> None:
+    """Report LLM usage from inside a workflow; a no-op outside a run.
+
+    Pass an agno run output (`agent.run(...)`) to take its metrics, explicit
+    counts, or just `model=` to name the model of a streamed run's timing.
+    """
+    collector = _COLLECTOR.get()
+    if collector is None:
+        return
+    if output is not None:
+        collector.add_output(output)
+        return
+    if input_tokens is None and output_tokens is None and ttft is None and seconds is None:
+        collector.model = model
+        return
+    collector.add(
+        LLMUsage(
+            model=model or collector.model or UNKNOWN_MODEL,
+            calls=1,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            ttft=ttft,
+            seconds=seconds,
+        )
+    )
+
+
+class StreamTimer:
+    """Times a run's yielded chunks: first chunk as TTFT, one chunk per token.
+
+    Used only when the run reported no metrics of its own but named its model
+    with record_llm(model=...); other generators are not LLM calls.
+    """
+
+    def __init__(self, collector: UsageCollector):
+        self.collector = collector
+        self.started = time.perf_counter()
+        self.first: Optional[float] = None
+        self.chunks = 0
+        self.reported = False
+
+    def chunk(self, chunk: Any) -> None:
+        if self.first is None:
+            self.first = time.perf_counter() - self.started
+        if isinstance(chunk, str):
+            if chunk:
+                self.chunks += 1
+        elif getattr(chunk, "metrics", None) is not None:
+            # agno stream events: the completed-run event carries the run's metrics
+            self.reported = self.collector.add_output(chunk) or self.reported
+        elif getattr(chunk, "content", None):
+            self.chunks += 1
+
+    def finish(self) -> None:
+        if self.reported or self.collector or not self.chunks or self.collector.model is None:
+            return
+        self.collector.add(
+            LLMUsage(
+                model=self.collector.model,
+                calls=1,
+                output_tokens=self.chunks,
+                ttft=self.first,
+                seconds=time.perf_counter() - self.started,
+            )
+        )
@@ -1,53 +1,179 @@
 from __future__ import annotations
 
-import importlib
 import inspect
-from dataclasses import dataclass
-from typing import Any, Callable, Dict, Optional
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from .params import ParamSchema
+from .resources import resource_params
 
 
 _REGISTRY: Dict[str, "Workflow"] = {}
+# Bumped on every registration so views (e.g. the TUI menu) know when to rebuild
+_REGISTRY_VERSION = 0
+_REGISTRY_LOCK = threading.Lock()
+_STAGING = threading.local()
 
 
-@dataclass
 class Workflow:
-    name: str
-    description: str
-    func: Callable[..., Any]
-    render_markdown: Optional[bool] = None
+    """A registered workflow.
+
+    Uses __slots__ rather than a dataclass to stay compact with thousands of
+    registrations; the parameter schema is built once here, not per run.
+    """
+
+    __slots__ = (
+        "name",
+        "description",
+        "func",
+        "render_markdown",
+        "executor",
+        "cache",
+        "cache_ttl",
+        "streaming",
+        "schema",
+        "timeout",
+        "max_concurrency",
+        "resources",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        func: Callable[..., Any],
+        render_markdown: Optional[bool] = None,
+        executor: Optional[str] = None,
+        cache: bool = False,
+        cache_ttl: Optional[float] = None,
+        streaming: Optional[bool] = None,
+        schema: Optional[ParamSchema] = None,
+        timeout: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        self.name = name
+        self.description = description
+        self.func = func
+        self.render_markdown = render_markdown
+        # "thread" or "process" for sync workflows; None uses the runtime default
+        self.executor = executor
+        # Opt-in result caching; ttl in seconds (None uses the configured default)
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        # Sync or async generator functions yield text chunks
+        if streaming is None:
+            streaming = inspect.isgeneratorfunction(func) or inspect.isasyncgenfunction(func)
+        self.streaming = streaming
+        self.schema = schema if schema is not None else ParamSchema.from_function(func)
+        # Seconds per run and runs in flight at once; None uses the runtime default
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        # Parameter name -> registered resource injected into it on each run
+        self.resources = resource_params(func)
+
+    def coerce_params(self, params: Dict[str, Any], partial: bool = False) -> Dict[str, Any]:
+        """Validate and convert raw params; raises ParamError listing every problem."""
+        return self.schema.coerce(params, partial=partial)
+
+    def __repr__(self) -> str:
+        return f"Workflow(name={self.name!r}, func={getattr(self.func, '__qualname__', self.func)!r})"
+
+
+EXECUTOR_KINDS = ("thread", "process")
 
 
 def register_workflow(
     name: Optional[str] = None,
     description: str = "",
     render_markdown: Optional[bool] = None,
+    executor: Optional[str] = None,
+    cache: bool = False,
+    ttl: Optional[float] = None,
+    timeout: Optional[float] = None,
+    max_concurrency: Optional[int] = None,
 ):
+    if executor is not None and executor not in EXECUTOR_KINDS:
+        raise ValueError(f"executor must be one of {EXECUTOR_KINDS}, not {executor!r}")
+    if timeout is not None and timeout <= 0:
+        raise ValueError(f"timeout must be positive, not {timeout!r}")
+    if max_concurrency is not None and max_concurrency < 1:
+        raise ValueError(f"max_concurrency must be at least 1, not {max_concurrency!r}")
+
     def decorator(func: Callable[..., Any]):
+        global _REGISTRY_VERSION
         wf_name = name or func.__name__
-        _REGISTRY[wf_name] = Workflow(
+        wf = Workflow(
             name=wf_name,
             description=description,
             func=func,
             render_markdown=render_markdown,
+            executor=executor,
+            cache=cache,
+            cache_ttl=ttl,
+            timeout=timeout,
+            max_concurrency=max_concurrency,
         )
+        staged = getattr(_STAGING, "workflows", None)
+        if staged is not None:
+            # A hot reload is collecting this module's workflows to swap in at once
+            staged[wf_name] = wf
+            return func
+        # Modules may be imported concurrently during discovery
+        with _REGISTRY_LOCK:
+            _REGISTRY_VERSION += 1
+            _REGISTRY[wf_name] = wf
         return func
 
     return decorator
 
 
-def discover_from_module(module_path: str) -> Dict[str, Workflow]:
-    # Import triggers decorator registration if present in module
-    importlib.invalidate_caches()
-    module = importlib.import_module(module_path)
+def discover_from_module(module_path: Union[str, List[str]]) -> Dict[str, Workflow]:
+    """Import workflow modules (a name, a list, or packages) so their decorators register.
 
-    # Also scan module for callables with a `__agnoworkflow__` attribute if needed later
-    # For now, rely on explicit decorator registration into _REGISTRY.
+    Modules are imported concurrently; failures are recorded in
+    `discovery.failed_modules()` instead of being raised.
+    """
+    from .config import module_list
+    from .discovery import discover_modules
+
+    discover_modules(module_list(module_path))
     return dict(_REGISTRY)
 
 
+@contextmanager
+def staged_registrations() -> Iterator[Dict[str, Workflow]]:
+    """Collect registrations made on this thread instead of publishing them."""
+    previous = getattr(_STAGING, "workflows", None)
+    staged: Dict[str, Workflow] = {}
+    _STAGING.workflows = staged
+    try:
+        yield staged
+    finally:
+        _STAGING.workflows = previous
+
+
+def replace_module_workflows(module: str, workflows: Dict[str, Workflow]) -> None:
+    """Atomically swap the workflows defined in `module` for `workflows`.
+
+    The registry is replaced, not mutated, so readers see either the old or the
+    new set. Runs already holding a Workflow keep using the old function.
+    """
+    global _REGISTRY, _REGISTRY_VERSION
+    with _REGISTRY_LOCK:
+        registry = {n: wf for n, wf in _REGISTRY.items() if getattr(wf.func, "__module__", None) != module}
+        registry.update(workflows)
+        _REGISTRY = registry
+        _REGISTRY_VERSION += 1
+
+
 def list_workflows() -> Dict[str, Workflow]:
     return dict(_REGISTRY)
 
 
+def registry_version() -> int:
+    return _REGISTRY_VERSION
+
+
 def get_workflow(name: str) -> Optional[Workflow]:
     return _REGISTRY.get(name)
@@ -5,6 +5,8 @@ from agno.team import Team
 from agno.tools.duckduckgo import DuckDuckGoTools
 from agno.tools.hackernews import HackerNewsTools
 
+from agnocli.resources import register_resource, resource
+from agnocli.throughput import record_llm
 from agnocli.workflows import register_workflow
 
 from agno.agent import Agent
@@ -15,21 +17,50 @@ from agno.tools.yfinance import YFinanceTools
 OLLAMA_MODEL = "minimax-m2:cloud"
 OLLAMA_TEAM_MODEL = "glm-4.6:cloud"
 
-@register_workflow(name="basic", description="Basic flow")
-def basic_flow() -> str:
-    agent = Agent(
-        model=Ollama(id=OLLAMA_MODEL),
+
+# Built once per process and shared by every run, instead of per call
+@register_resource(name="model")
+def ollama_model():
+    return Ollama(id=OLLAMA_MODEL)
+
+
+@register_resource(name="yfinance")
+def yfinance_tools():
+    return YFinanceTools()
+
+
+def reset_agent(agent: Agent) -> None:
+    # Start every lease on a fresh session, without the previous run's history or memory
+    agent.session_id = None
+    if hasattr(agent, "agent_session"):
+        agent.agent_session = None
+    memory = getattr(agent, "memory", None)
+    if memory is not None and hasattr(memory, "clear"):
+        memory.clear()
+
+
+# Agents keep per-run state, so each concurrent run leases one of its own
+@register_resource(name="basic_agent", pool=4, reset=reset_agent)
+def basic_agent(model: Ollama = resource()):
+    return Agent(
+        model=model,
         instructions="You are an agent focused on responding in one line. All your responses must be super concise and focused.",
         markdown=True,
     )
+
+
+@register_workflow(name="basic", description="Basic flow")
+def basic_flow(agent: Agent = resource("basic_agent")) -> str:
     runx = agent.run("How many planets are in the solar system?")
+    # Token counts and time to first token for `run --stats` and `history --llm`
+    record_llm(runx)
     return runx.content
 
 @register_workflow(name="tools", description="A flow using tools")
-def tools_flow() -> str:
+def tools_flow(model: Ollama = resource(), yfinance: YFinanceTools = resource()) -> str:
     agent = Agent(
-        model=Ollama(id=OLLAMA_MODEL),
-        tools=[YFinanceTools()],
+        model=model,
+        tools=[yfinance],
         instructions=[
             "Use tables to display data.",
             "Only include the table in your response. No other text.",
@@ -41,9 +72,9 @@ def tools_flow() -> str:
 
 # python.exe -m agnocli run code --arg request="write a simple fibonacci application"
 @register_workflow(name="code", description="An agent that writes python code")
-def tools_flow(request: str = "create an hello world application") -> str:
+def tools_flow(request: str = "create an hello world application", model: Ollama = resource()) -> str:
     agent = Agent(
-        model=Ollama(id=OLLAMA_MODEL),
+        model=model,
         instructions=[
             "Write code in python",
             "Add comments and use clean python.",
@@ -54,9 +85,9 @@ def tools_flow(request: str = "create an hello world application") -> str:
     return ""
 
 @register_workflow(name="image", description="Generate prompt images")
-def image_flow(request: str = "generate an image of a cat." , style: str = "toon") -> str:
+def image_flow(request: str = "generate an image of a cat." , style: str = "toon", model: Ollama = resource()) -> str:
     agent = Agent(
-        model=Ollama(id=OLLAMA_MODEL),
+        model=model,
         instructions=[
             f"generate a detailed prompt for generating an image using a {style} style",
             "if user ask to generate the image just generate the prompt.",
@@ -70,9 +101,9 @@ def image_flow(request: str = "generate an image of a cat." , style: str = "toon
     return ""
 
 @register_workflow(name="music", description="Generate prompt for music")
-def music_flow(request: str = "generate an image of a cat." , style: str = "toon") -> str:
+def music_flow(request: str = "generate an image of a cat." , style: str = "toon", model: Ollama = resource()) -> str:
     agent = Agent(
-        model=Ollama(id=OLLAMA_MODEL),
+        model=model,
         instructions=[
             f"generate a detailed prompt for generating a composition with lyrics with the following style: {style}",
             "if user ask to generate the music just generate the prompt.",
@@ -1,3 +1,5 @@
+import time
+
 from agnocli.workflows import register_workflow
 
 @register_workflow(name="hello", description="Hello workflow returning markdown")
@@ -11,5 +13,13 @@ def hello(name: str = "world") -> str:
 
 @register_workflow(name="sum", description="Sum two integers")
 def sum_numbers(a: int = 1, b: int = 2) -> str:
-    s = int(a) + int(b)
+    s = a + b
     return f"Result: {a} + {b} = {s}"
+
+
+@register_workflow(name="countdown", description="Stream a countdown chunk by chunk")
+def countdown(n: int = 5, delay: float = 0.2):
+    for i in range(n, 0, -1):
+        yield f"**{i}**... "
+        time.sleep(delay)
+    yield "\n\nLiftoff!\n"
@@ -0,0 +1,19 @@
+import pytest
+
+from agnocli import config, manifest
+
+
+@pytest.fixture(autouse=True)
+def isolated_config(tmp_path, monkeypatch):
+    """Keep config files, caches and AGNOCLI_* settings of the machine out of the tests."""
+    home = tmp_path / "config-home"
+    monkeypatch.setattr(config, "_platform_config_dir", lambda: home)
+    monkeypatch.setattr(config, "CONFIG_CACHE_FILE", home / "config-cache.json")
+    monkeypatch.setattr(manifest, "MANIFEST_FILE", home / "manifest.json")
+    for var in list(config.os.environ):
+        if var.startswith(config.ENV_PREFIX):
+            monkeypatch.delenv(var)
+    work = tmp_path / "cwd"
+    work.mkdir()
+    monkeypatch.chdir(work)
+    return home
@@ -0,0 +1,116 @@
+import importlib.util
+import os
+import sys
+import time
+
+from agnocli.cache import ResultCache, cache_key, is_miss
+
+
+def _wf(a):
+    return a
+
+
+def test_round_trip_through_disk(tmp_path):
+    ResultCache(tmp_path, memory_entries=0).put("wf", "k", {"answer": 42})
+    # A fresh instance has nothing in memory, so this comes from disk
+    fresh = ResultCache(tmp_path)
+    assert fresh.get("wf", "k") == {"answer": 42}
+    assert (fresh.hits, fresh.misses) == (1, 0)
+
+
+def test_miss_and_expiry(tmp_path):
+    cache = ResultCache(tmp_path, memory_entries=0)
+    assert is_miss(cache.get("wf", "absent"))
+    cache.put("wf", "k", "value", ttl=0.01)
+    time.sleep(0.02)
+    assert is_miss(cache.get("wf", "k"))
+    assert cache.stats().disk_entries == 0
+
+
+def test_corrupt_entry_is_a_miss_and_removed(tmp_path):
+    cache = ResultCache(tmp_path, memory_entries=0)
+    cache.put("wf", "k", "value")
+    path = tmp_path / "wf" / "k.pkl"
+    path.write_bytes(b"not a pickle")
+    assert is_miss(cache.get("wf", "k"))
+    assert not path.exists()
+
+
+def test_evicts_oldest_past_entry_limit(tmp_path):
+    cache = ResultCache(tmp_path, max_entries=3, memory_entries=0)
+    for i in range(5):
+        cache.put("wf", f"k{i}", i)
+        # Distinct mtimes so "oldest" is well defined
+        os.utime(tmp_path / "wf" / f"k{i}.pkl", (i, i))
+    assert cache.stats().disk_entries == 3
+    assert is_miss(cache.get("wf", "k0"))
+    assert cache.get("wf", "k4") == 4
+
+
+def test_evicts_past_byte_limit(tmp_path):
+    cache = ResultCache(tmp_path, max_bytes=2000, memory_entries=0)
+    for i in range(10):
+        cache.put("wf", f"k{i}", "x" * 500)
+    assert cache.stats().disk_bytes <= 2000
+
+
+def test_running_usage_matches_disk(tmp_path):
+    cache = ResultCache(tmp_path, memory_entries=0)
+    cache.put("a", "k1", "x" * 100)
+    cache.put("b", "k2", "y")
+    cache.put("a", "k1", "shorter")
+    stats = cache.stats()
+    assert stats.disk_entries == 2
+    assert (cache._disk_count, cache._disk_bytes) == (stats.disk_entries, stats.disk_bytes)
+
+
+def test_existing_entries_count_towards_limits(tmp_path):
+    seed = ResultCache(tmp_path, memory_entries=0)
+    for i in range(3):
+        seed.put("wf", f"k{i}", i)
+    cache = ResultCache(tmp_path, max_entries=3, memory_entries=0)
+    cache.put("wf", "new", "n")
+    assert cache.stats().disk_entries == 3
+
+
+def test_clear_one_workflow(tmp_path):
+    cache = ResultCache(tmp_path)
+    cache.put("a", "k1", 1)
+    cache.put("b", "k2", 2)
+    assert cache.clear("a") == 1
+    assert is_miss(cache.get("a", "k1"))
+    assert cache.get("b", "k2") == 2
+    assert cache.stats().per_workflow == {"b": 1}
+
+
+def test_key_ignores_param_order_but_not_values():
+    assert cache_key("wf", {"a": 1, "b": 2}, _wf) == cache_key("wf", {"b": 2, "a": 1}, _wf)
+    assert cache_key("wf", {"a": 1}, _wf) != cache_key("wf", {"a": 2}, _wf)
+    assert cache_key("wf", {"a": 1}, _wf) != cache_key("other", {"a": 1}, _wf)
+
+
+def test_hits_are_independent_copies(tmp_path):
+    cache = ResultCache(tmp_path)
+    cache.put("wf", "k", {"items": [1]})
+    first = cache.get("wf", "k")
+    first["items"].append(2)
+    assert cache.get("wf", "k") == {"items": [1]}
+    assert cache.get("wf", "k") is not cache.get("wf", "k")
+
+
+def _load(path, name):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_key_changes_with_the_module_not_just_the_function(tmp_path, monkeypatch):
+    path = tmp_path / "cache_flows.py"
+    path.write_text('MODEL = "a"\n\ndef flow():\n    return MODEL\n', encoding="utf-8")
+    monkeypatch.setitem(sys.modules, "cache_flows", None)
+    before = cache_key("wf", {}, _load(path, "cache_flows").flow)
+    path.write_text('MODEL = "b"\n\ndef flow():\n    return MODEL\n', encoding="utf-8")
+    after = cache_key("wf", {}, _load(path, "cache_flows").flow)
+    assert before != after
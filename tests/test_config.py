@@ -0,0 +1,93 @@
+import pytest
+
+from agnocli import config
+from agnocli.config import ConfigError, config_identity, env_overrides, load_config
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_defaults_without_any_file():
+    cfg = load_config()
+    assert cfg.workflows_module is None
+    assert cfg.runtime.executor == "thread"
+    assert cfg.cache.enabled is True
+
+
+def test_layers_merge_key_by_key(isolated_config, tmp_path):
+    _write(isolated_config / "agnocli.yaml", "runtime:\n  max_workers: 2\n  timeout: 5\ncache:\n  ttl: 60\n")
+    _write(tmp_path / "cwd" / "agnocli.yaml", "runtime:\n  max_workers: 4\n")
+    explicit = _write(tmp_path / "explicit.yaml", "cache:\n  ttl: 10\n")
+    cfg = load_config(str(explicit))
+    assert cfg.runtime.max_workers == 4
+    assert cfg.runtime.timeout == 5
+    assert cfg.cache.ttl == 10
+
+
+def test_environment_overrides_files(monkeypatch, tmp_path):
+    _write(tmp_path / "cwd" / "agnocli.yaml", "runtime:\n  max_workers: 4\ncache:\n  enabled: true\n")
+    monkeypatch.setenv("AGNOCLI_RUNTIME__MAX_WORKERS", "8")
+    monkeypatch.setenv("AGNOCLI_CACHE__ENABLED", "false")
+    monkeypatch.setenv("AGNOCLI_WORKFLOWS_MODULE", "[a, b]")
+    cfg = load_config()
+    assert cfg.runtime.max_workers == 8
+    assert cfg.cache.enabled is False
+    assert cfg.workflow_modules == ["a", "b"]
+
+
+def test_env_overrides_ignore_non_settings():
+    env = {"AGNOCLI_NO_DAEMON": "1", "AGNOCLI_LOG_DIR": "/tmp/x", "AGNOCLI_QUEUE__LEASE": "5", "PATH": "/bin"}
+    assert env_overrides(env) == {"AGNOCLI_LOG_DIR": "/tmp/x", "AGNOCLI_QUEUE__LEASE": "5"}
+
+
+def test_validation_lists_every_problem_with_its_origin(tmp_path):
+    path = _write(
+        tmp_path / "bad.yaml",
+        "runtime:\n  executor: fiber\n  max_wrkers: 2\ncache:\n  ttl: -1\nlogging:\n  debug_sample_rate: 2\nbogus: 1\n",
+    )
+    with pytest.raises(ConfigError) as e:
+        load_config(str(path))
+    lines = str(e.value).splitlines()
+    assert len(lines) == 5
+    assert all(line.startswith(str(path.resolve())) for line in lines)
+    message = str(e.value)
+    assert "runtime.executor" in message
+    assert "did you mean 'max_workers'?" in message
+    assert "cache.ttl" in message
+    assert "logging.debug_sample_rate" in message
+    assert "bogus: unknown setting" in message
+
+
+def test_invalid_env_value_names_the_variable(monkeypatch):
+    monkeypatch.setenv("AGNOCLI_RUNTIME__MAX_WORKERS", "0")
+    with pytest.raises(ConfigError, match="AGNOCLI_RUNTIME__MAX_WORKERS: runtime.max_workers"):
+        load_config()
+
+
+def test_unreadable_and_malformed_files(tmp_path):
+    with pytest.raises(ConfigError, match="config file not found"):
+        load_config(str(tmp_path / "missing.yaml"))
+    with pytest.raises(ConfigError, match="invalid YAML"):
+        load_config(str(_write(tmp_path / "broken.yaml", "runtime: [\n")))
+    with pytest.raises(ConfigError, match="expected a mapping"):
+        load_config(str(_write(tmp_path / "list.yaml", "- a\n- b\n")))
+
+
+def test_parse_cache_notices_edits(tmp_path):
+    path = _write(tmp_path / "cwd" / "agnocli.yaml", "default_workflow: first\n")
+    assert load_config().default_workflow == "first"
+    assert config.CONFIG_CACHE_FILE.exists()
+    # Different size, so the cached parse no longer matches even within one mtime tick
+    _write(path, "default_workflow: second-one\n")
+    assert load_config().default_workflow == "second-one"
+
+
+def test_identity_changes_with_files_and_env(monkeypatch, tmp_path):
+    base = config_identity()
+    explicit = _write(tmp_path / "explicit.yaml", "{}\n")
+    assert config_identity(str(explicit)) != base
+    monkeypatch.setenv("AGNOCLI_CACHE__TTL", "5")
+    assert config_identity() != base
@@ -0,0 +1,133 @@
+import logging
+import time
+
+import pytest
+
+from agnocli.broker import is_loopback, serve_broker
+from agnocli.jobs import JobError, JobQueue, open_queue, run_worker
+from agnocli.runner import WorkflowRuntime
+from agnocli.workflows import register_workflow
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = JobQueue(tmp_path / "jobs.db")
+    yield q
+    q.close()
+
+
+def test_claim_complete(queue):
+    job_id = queue.submit("wf", {"a": 1})
+    job = queue.claim("w1", lease=30)
+    assert (job.id, job.params, job.attempts, job.status) == (job_id, {"a": 1}, 1, "running")
+    assert queue.claim("w2", lease=30) is None
+    assert queue.complete(job.lease, {"ok": True})
+    done = queue.get(job_id)
+    assert (done.status, done.result, done.done) == ("ok", {"ok": True}, True)
+
+
+def test_claim_filters_by_workflow(queue):
+    queue.submit("a", {})
+    other = queue.submit("b", {})
+    assert queue.claim("w", lease=30, workflows=["b"]).id == other
+
+
+def test_retries_with_backoff_then_fails(queue):
+    job_id = queue.submit("wf", {}, retries=1)
+    job = queue.claim("w", lease=30)
+    assert queue.fail(job.lease, "boom", retry_delay=60)
+    retried = queue.get(job_id)
+    assert (retried.status, retried.error) == ("queued", "boom")
+    # Backing off: not runnable yet
+    assert queue.claim("w", lease=30) is None
+
+    queue.connect().execute("UPDATE jobs SET available = 0")
+    job = queue.claim("w", lease=30)
+    assert job.attempts == 2
+    assert queue.fail(job.lease, "boom again")
+    assert queue.get(job_id).status == "error"
+
+
+def test_no_retry(queue):
+    job_id = queue.submit("wf", {}, retries=3)
+    assert queue.fail(queue.claim("w", lease=30).lease, "bad params", retry=False)
+    assert queue.get(job_id).status == "error"
+
+
+def test_expired_lease_is_reclaimed(queue):
+    job_id = queue.submit("wf", {}, retries=1)
+    stale = queue.claim("w1", lease=0.01)
+    time.sleep(0.05)
+    fresh = queue.claim("w2", lease=30)
+    assert (fresh.id, fresh.worker, fresh.attempts) == (job_id, "w2", 2)
+    # The first worker can no longer report on the job
+    assert queue.heartbeat([stale.lease, fresh.lease], lease=30) == [stale.lease]
+    assert not queue.complete(stale.lease, "late")
+    assert not queue.fail(stale.lease, "late")
+    assert queue.get(job_id).status == "running"
+
+
+def test_expired_lease_out_of_attempts_fails(queue):
+    job_id = queue.submit("wf", {})
+    queue.claim("w1", lease=0.01)
+    time.sleep(0.05)
+    assert queue.claim("w2", lease=30) is None
+    job = queue.get(job_id)
+    assert job.status == "error"
+    assert "w1 stopped responding" in job.error
+
+
+def test_release_gives_the_attempt_back(queue):
+    job_id = queue.submit("wf", {})
+    assert queue.release(queue.claim("w", lease=30).lease)
+    job = queue.get(job_id)
+    assert (job.status, job.attempts) == ("queued", 0)
+
+
+def test_counts_and_list(queue):
+    queue.submit("a", {})
+    queue.submit("b", {})
+    queue.complete(queue.claim("w", lease=30).lease, None)
+    assert queue.counts() == {"queued": 1, "running": 0, "ok": 1, "error": 0}
+    assert queue.counts(["b"])["queued"] + queue.counts(["b"])["ok"] == 1
+    assert [j.status for j in queue.list(status="ok")] == ["ok"]
+
+
+def test_open_queue_rejects_bad_broker_address():
+    with pytest.raises(JobError, match="tcp://host:port"):
+        open_queue("tcp://nohost")
+
+
+@register_workflow(name="test_jobs_double")
+def _double(n: int) -> int:
+    return n * 2
+
+
+@register_workflow(name="test_jobs_boom")
+def _boom() -> None:
+    raise RuntimeError("boom")
+
+
+def test_worker_drains_the_queue(queue):
+    ok = queue.submit("test_jobs_double", {"n": "21"})
+    failed = queue.submit("test_jobs_boom", {})
+    missing = queue.submit("test_jobs_missing", {}, retries=3)
+    seen = []
+    with WorkflowRuntime() as runtime:
+        counts = run_worker(
+            queue, runtime, poll=0.01, drain=True, on_job=lambda job, status, error: seen.append((job.id, status))
+        )
+    assert counts == {"ok": 1, "error": 2}
+    assert queue.get(ok).result == 42
+    assert "RuntimeError: boom" in queue.get(failed).error
+    # A missing workflow is not retried
+    assert (queue.get(missing).status, queue.get(missing).attempts) == ("error", 1)
+    assert sorted(seen) == sorted([(ok, "ok"), (failed, "error"), (missing, "error")])
+
+
+def test_broker_refuses_network_host_without_token(queue):
+    log = logging.getLogger("test")
+    with pytest.raises(JobError, match="without queue.token"):
+        serve_broker("0.0.0.0", 0, queue, None, log)
+    assert is_loopback("127.0.0.1") and is_loopback("::1") and is_loopback("localhost")
+    assert not is_loopback("0.0.0.0") and not is_loopback("example.com")
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from agnocli import manifest
+from agnocli.manifest import StaticScanError, load_manifest, load_manifests, scan_source
+
+SOURCE = '''
+from agnocli.resources import resource
+from agnocli.workflows import register_workflow
+
+
+@register_workflow(name="greet", description="Say hello", render_markdown=False)
+def greet(name: str = "world", model=resource()):
+    return f"hello {name}"
+
+
+@register_workflow()
+def plain(count: int):
+    return count
+'''
+
+
+def test_scan_reads_decorators_without_importing():
+    infos = {i.name: i for i in scan_source(SOURCE)}
+    assert set(infos) == {"greet", "plain"}
+    assert infos["greet"].description == "Say hello"
+    assert infos["greet"].render_markdown is False
+    # Injected resources are not params
+    assert [p.name for p in infos["greet"].params] == ["name"]
+    assert infos["greet"].params[0].display_default() == "world"
+    assert infos["plain"].params[0].annotation == "int"
+
+
+def test_scan_rejects_what_it_cannot_evaluate():
+    with pytest.raises(StaticScanError):
+        scan_source("def broken(:\n")
+    with pytest.raises(StaticScanError):
+        scan_source("@register_workflow(**options)\ndef f():\n    pass\n")
+
+
+def test_non_literal_decorator_cannot_be_scanned(tmp_path):
+    path = tmp_path / "dynamic.py"
+    path.write_text('NAME = "x"\n@register_workflow(name=NAME)\ndef f():\n    pass\n', encoding="utf-8")
+    assert load_manifest("dynamic", path) is None
+
+
+def test_cached_until_the_source_changes(tmp_path, monkeypatch):
+    path = tmp_path / "flows.py"
+    path.write_text(SOURCE, encoding="utf-8")
+    assert set(load_manifest("flows", path)) == {"greet", "plain"}
+    assert manifest.MANIFEST_FILE.exists()
+
+    scans = []
+    monkeypatch.setattr(manifest, "scan_source", lambda *a, **k: scans.append(a) or [])
+    assert set(load_manifest("flows", path)) == {"greet", "plain"}
+    # Touched but identical content: reused by hash
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert set(load_manifest("flows", path)) == {"greet", "plain"}
+    assert scans == []
+
+    path.write_text(SOURCE + "\n# edited\n", encoding="utf-8")
+    assert load_manifest("flows", path) == {}
+    assert len(scans) == 1
+
+
+def test_reexporting_module_is_imported_instead(tmp_path):
+    path = tmp_path / "reexport.py"
+    path.write_text("from flows import *\n", encoding="utf-8")
+    assert load_manifest("reexport", path) is None
+    assert not manifest.MANIFEST_FILE.exists()
+
+
+def test_module_without_imports_or_workflows_is_empty(tmp_path):
+    path = tmp_path / "constants.py"
+    path.write_text("ANSWER = 42\n", encoding="utf-8")
+    assert load_manifest("constants", path) == {}
+
+
+def test_many_modules_report_what_must_be_imported(tmp_path):
+    flows = tmp_path / "flows.py"
+    flows.write_text(SOURCE, encoding="utf-8")
+    reexport = tmp_path / "reexport.py"
+    reexport.write_text("from flows import greet\n", encoding="utf-8")
+    infos, pending = load_manifests({"flows": flows, "reexport": reexport, "absent": None})
+    assert set(infos) == {"greet", "plain"}
+    assert pending == ["reexport", "absent"]
+
+
+def test_missing_source_is_not_described(tmp_path):
+    assert load_manifest("gone", tmp_path / "gone.py") is None
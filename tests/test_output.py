@@ -0,0 +1,32 @@
+import threading
+
+from agnocli.output import routed_stdout
+
+
+def test_prints_inside_the_context_go_to_its_sink(capsys):
+    routed = []
+    with routed_stdout(routed.append):
+        print("inside")
+    print("outside")
+    assert "".join(routed) == "inside\n"
+    assert capsys.readouterr().out == "outside\n"
+
+
+def test_other_threads_keep_the_real_stdout(capsys):
+    routed = []
+    started, release = threading.Event(), threading.Event()
+
+    def other():
+        started.set()
+        release.wait()
+        print("other thread")
+
+    thread = threading.Thread(target=other)
+    thread.start()
+    started.wait()
+    with routed_stdout(routed.append):
+        release.set()
+        thread.join()
+        print("routed")
+    assert "".join(routed) == "routed\n"
+    assert capsys.readouterr().out == "other thread\n"
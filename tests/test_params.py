@@ -0,0 +1,102 @@
+import enum
+from typing import List, Literal, Optional, Tuple
+
+import pytest
+
+from agnocli.params import ParamError, ParamSchema
+from agnocli.resources import resource
+
+
+class Color(enum.Enum):
+    RED = "red"
+    BLUE = "blue"
+
+
+def _workflow(
+    count: int,
+    ratio: float = 1.0,
+    verbose: bool = False,
+    tags: List[int] = [],
+    color: Color = Color.RED,
+    mode: Literal["fast", "slow"] = "fast",
+    limit: Optional[int] = None,
+    inferred=3,
+    model=resource(),
+):
+    pass
+
+
+SCHEMA = ParamSchema.from_function(_workflow)
+
+
+def test_coerces_strings_from_annotations():
+    params = SCHEMA.coerce(
+        {"count": "5", "ratio": "0.5", "verbose": "yes", "tags": "1, 2", "color": "blue", "mode": "slow", "limit": "none"}
+    )
+    assert params == {
+        "count": 5,
+        "ratio": 0.5,
+        "verbose": True,
+        "tags": [1, 2],
+        "color": Color.BLUE,
+        "mode": "slow",
+        "limit": None,
+    }
+
+
+def test_json_list_and_enum_by_name():
+    params = SCHEMA.coerce({"count": 1, "tags": "[3, 4]", "color": "RED"})
+    assert params["tags"] == [3, 4]
+    assert params["color"] is Color.RED
+
+
+def test_unannotated_param_is_inferred_from_default():
+    assert SCHEMA.coerce({"count": 1, "inferred": "7"})["inferred"] == 7
+
+
+def test_reports_every_problem_at_once():
+    with pytest.raises(ParamError) as e:
+        SCHEMA.coerce({"ratio": "fast", "verbose": "maybe", "mode": "medium", "bogus": 1})
+    message = str(e.value)
+    for fragment in ("'ratio'", "'verbose'", "'mode'", "unknown param 'bogus'", "missing required param 'count'"):
+        assert fragment in message
+
+
+def test_bool_is_not_an_int():
+    with pytest.raises(ParamError):
+        SCHEMA.coerce({"count": True})
+
+
+def test_partial_skips_missing_required():
+    assert SCHEMA.coerce({"ratio": "2"}, partial=True) == {"ratio": 2.0}
+
+
+def test_injected_resources_are_not_params():
+    assert "model" not in SCHEMA.names
+    with pytest.raises(ParamError, match="unknown param 'model'"):
+        SCHEMA.coerce({"count": 1, "model": "x"})
+
+
+def test_var_keyword_accepts_anything():
+    def wf(a: int, **extra):
+        pass
+
+    assert ParamSchema.from_function(wf).coerce({"a": "1", "other": "x"}) == {"a": 1, "other": "x"}
+
+
+def test_pep604_optional():
+    def wf(limit: "int | None" = None, ratio: "float | None" = None):
+        pass
+
+    schema = ParamSchema.from_function(wf)
+    assert schema.coerce({"limit": "3", "ratio": "null"}) == {"limit": 3, "ratio": None}
+
+
+def test_homogeneous_tuple_converts_every_item():
+    def wf(sizes: Tuple[int, ...], pair: Tuple[int, str] = (0, "")):
+        pass
+
+    params = ParamSchema.from_function(wf).coerce({"sizes": "1,2,3", "pair": "x"})
+    assert params["sizes"] == [1, 2, 3]
+    # Mixed item types cannot be converted from one string; passed through as given
+    assert params["pair"] == "x"
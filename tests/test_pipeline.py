@@ -0,0 +1,183 @@
+import pytest
+
+from agnocli.pipeline import PipelineError, check_pipeline, load_pipeline, parse_pipeline, run_pipeline
+from agnocli.runner import WorkflowRuntime
+from agnocli.workflows import register_workflow
+
+CALLS = []
+FLAKY = {"left": 0}
+
+
+@register_workflow(name="test_pipeline_add")
+def _add(a: int, b: int = 0) -> int:
+    CALLS.append(("add", a, b))
+    return a + b
+
+
+@register_workflow(name="test_pipeline_echo")
+def _echo(text: str) -> str:
+    return text
+
+
+@register_workflow(name="test_pipeline_boom")
+def _boom() -> str:
+    raise RuntimeError("boom")
+
+
+@register_workflow(name="test_pipeline_flaky")
+def _flaky() -> str:
+    if FLAKY["left"]:
+        FLAKY["left"] -= 1
+        raise RuntimeError("not yet")
+    return "done"
+
+
+@pytest.fixture
+def runtime():
+    CALLS.clear()
+    with WorkflowRuntime() as rt:
+        yield rt
+
+
+def _run(data, runtime, inputs=None):
+    return run_pipeline(parse_pipeline(data), inputs, cache_mode="off", runtime=runtime)
+
+
+def test_order_follows_needs_and_references():
+    pipeline = parse_pipeline(
+        {
+            "params": {"who": "x"},
+            "steps": {
+                "c": {"workflow": "test_pipeline_echo", "params": {"text": "${steps.b.output}"}},
+                "b": {"workflow": "test_pipeline_echo", "params": {"text": "${params.who}"}, "needs": "a"},
+                "a": {"workflow": "test_pipeline_add", "params": {"a": 1}},
+            },
+        }
+    )
+    assert pipeline.order() == ["a", "b", "c"]
+    assert pipeline.steps["c"].needs == ["b"]
+    # Only the step nothing depends on is printed by default
+    assert pipeline.outputs == ["c"]
+
+
+@pytest.mark.parametrize(
+    "data, message",
+    [
+        ({}, "needs a 'steps' mapping"),
+        ({"steps": {"a": {"needs": ["b"]}, "b": {"needs": ["a"]}}}, "dependency cycle"),
+        ({"steps": {"a": {"needs": ["a"]}}}, "depends on itself"),
+        ({"steps": {"a": {"needs": ["ghost"]}}}, "unknown step(s) ghost"),
+        ({"steps": {"a": {"params": {"x": "${params.nope}"}}}}, "unknown pipeline param(s) nope"),
+        ({"steps": {"a": {"on_error": "explode"}}}, "on_error must be one of"),
+        ({"steps": {"a": {"retries": -1}}}, "retries must be a non-negative integer"),
+        ({"steps": {"a": {"colour": "red"}}}, "unknown keys colour"),
+        ({"steps": {"a": {}}, "output": "b"}, "'output' must name"),
+    ],
+)
+def test_invalid_pipelines(data, message):
+    with pytest.raises(PipelineError) as e:
+        parse_pipeline(data)
+    assert message in str(e.value)
+
+
+def test_check_reports_unknown_workflows_and_bad_params():
+    pipeline = parse_pipeline(
+        {
+            "steps": {
+                "a": {"workflow": "test_pipeline_missing"},
+                "b": {"workflow": "test_pipeline_add", "params": {"a": "not a number"}},
+                "c": {"workflow": "test_pipeline_add"},
+            }
+        }
+    )
+    with pytest.raises(PipelineError) as e:
+        check_pipeline(pipeline, {"extra": 1})
+    message = str(e.value)
+    assert "unknown pipeline param(s) extra" in message
+    assert "'test_pipeline_missing' not found" in message
+    assert "step 'b'" in message
+    assert "step 'c': missing required param(s) a" in message
+
+
+def test_outputs_flow_between_steps(runtime):
+    results = _run(
+        {
+            "params": {"who": "world"},
+            "steps": {
+                "total": {"workflow": "test_pipeline_add", "params": {"a": 3, "b": 4}},
+                "double": {"workflow": "test_pipeline_add", "params": {"a": "${steps.total.output}", "b": 7}},
+                "greet": {"workflow": "test_pipeline_echo", "params": {"text": "${params.who} ${steps.double.output}"}},
+            },
+        },
+        runtime,
+        inputs={"who": "there"},
+    )
+    assert {sid: r.status for sid, r in results.items()} == {"total": "ok", "double": "ok", "greet": "ok"}
+    # A whole-value reference keeps its type; an embedded one is formatted
+    assert results["double"].output == 14
+    assert results["greet"].output == "there 14"
+
+
+def test_identical_steps_share_one_run(runtime):
+    results = _run(
+        {
+            "steps": {
+                "a": {"workflow": "test_pipeline_add", "params": {"a": 1, "b": 1}},
+                "b": {"workflow": "test_pipeline_add", "params": {"a": 1, "b": 1}},
+            }
+        },
+        runtime,
+    )
+    assert CALLS == [("add", 1, 1)]
+    assert sorted(r.shared for r in results.values()) == [False, True]
+
+
+def test_failure_skips_the_rest(runtime):
+    results = _run(
+        {
+            "steps": {
+                "bad": {"workflow": "test_pipeline_boom"},
+                "after": {"workflow": "test_pipeline_add", "params": {"a": 1}, "needs": ["bad"]},
+            }
+        },
+        runtime,
+    )
+    assert results["bad"].status == "error"
+    assert "RuntimeError: boom" in results["bad"].error
+    assert results["after"].status == "skipped"
+    assert CALLS == []
+
+
+def test_continue_and_ignore(runtime):
+    results = _run(
+        {
+            "steps": {
+                "soft": {"workflow": "test_pipeline_boom", "on_error": "continue"},
+                "blocked": {"workflow": "test_pipeline_add", "params": {"a": 1}, "needs": ["soft"]},
+                "independent": {"workflow": "test_pipeline_add", "params": {"a": 2}},
+                "ignored": {"workflow": "test_pipeline_boom", "on_error": "ignore", "default": "fallback"},
+                "uses_default": {"workflow": "test_pipeline_echo", "params": {"text": "${steps.ignored.output}"}},
+            }
+        },
+        runtime,
+    )
+    assert results["soft"].status == "error"
+    assert results["blocked"].status == "skipped"
+    assert results["independent"].output == 2
+    assert results["ignored"].status == "ok"
+    assert results["uses_default"].output == "fallback"
+
+
+def test_retries(runtime):
+    FLAKY["left"] = 2
+    results = _run({"steps": {"s": {"workflow": "test_pipeline_flaky", "retries": 2}}}, runtime)
+    assert (results["s"].status, results["s"].output, results["s"].attempts) == ("ok", "done", 3)
+
+
+def test_load_pipeline_errors(tmp_path):
+    with pytest.raises(PipelineError, match="No such file"):
+        load_pipeline(tmp_path / "missing.yaml")
+    broken = tmp_path / "broken.yaml"
+    broken.write_text("steps: [\n", encoding="utf-8")
+    with pytest.raises(PipelineError, match="invalid YAML"):
+        load_pipeline(broken)
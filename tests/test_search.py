@@ -0,0 +1,42 @@
+from agnocli.search import TrigramIndex, paginate
+
+ENTRIES = [
+    ("summarize", "Summarize a web page"),
+    ("sum", "Add two numbers"),
+    ("image", "Generate prompt images"),
+    ("music", "Generate prompt for music"),
+    ("translate", "Translate text between languages"),
+]
+
+
+def test_exact_then_prefix_then_substring():
+    index = TrigramIndex(ENTRIES)
+    assert index.search("sum")[:2] == ["sum", "summarize"]
+
+
+def test_matches_descriptions():
+    assert TrigramIndex(ENTRIES).search("languages") == ["translate"]
+
+
+def test_tolerates_typos():
+    assert TrigramIndex(ENTRIES).search("summarise")[0] == "summarize"
+
+
+def test_short_and_empty_queries():
+    index = TrigramIndex(ENTRIES)
+    assert set(index.search("im")) >= {"image"}
+    assert index.search("   ") == []
+    assert index.search("zzzz") == []
+
+
+def test_limit():
+    assert len(TrigramIndex(ENTRIES).search("generate", limit=1)) == 1
+
+
+def test_paginate_clamps():
+    items = list(range(25))
+    assert paginate(items, 0, 10) == (0, 0, 3)
+    assert paginate(items, 7, 10) == (2, 20, 3)
+    assert paginate(items, -1, 10) == (0, 0, 3)
+    assert paginate([], 3, 10) == (0, 0, 1)
+    assert paginate(items, 0, 0) == (0, 0, 25)
@@ -0,0 +1,42 @@
+from agnocli.throughput import LLMUsage, StreamTimer, UsageCollector, collect_usage, record_llm
+
+
+def test_merged_calls_exclude_every_first_token_wait():
+    collector = UsageCollector()
+    for _ in range(2):
+        collector.add(LLMUsage("m", calls=1, output_tokens=10, ttft=0.5, seconds=2.0))
+    (usage,) = collector.usage()
+    assert (usage.calls, usage.output_tokens, usage.ttft, usage.ttft_total) == (2, 20, 0.5, 1.0)
+    assert usage.tokens_per_second == 20 / 3.0
+
+
+def test_record_llm_outside_a_run_is_a_no_op():
+    record_llm(model="m", output_tokens=5)
+
+
+def test_nested_collectors_pass_usage_up():
+    with collect_usage() as outer:
+        with collect_usage():
+            record_llm(model="m", output_tokens=5, seconds=1.0)
+    assert [(u.model, u.output_tokens) for u in outer.usage()] == [("m", 5)]
+
+
+def test_generator_without_a_model_is_not_an_llm_call():
+    with collect_usage() as collector:
+        timer = StreamTimer(collector)
+        for chunk in ("3", "2", "1"):
+            timer.chunk(chunk)
+        timer.finish()
+    assert collector.usage() == []
+
+
+def test_chunks_are_timed_once_the_model_is_named():
+    with collect_usage() as collector:
+        record_llm(model="m")
+        timer = StreamTimer(collector)
+        for chunk in ("a", "", "b"):
+            timer.chunk(chunk)
+        timer.finish()
+    (usage,) = collector.usage()
+    assert (usage.model, usage.calls, usage.output_tokens) == ("m", 1, 2)
+    assert usage.ttft is not None